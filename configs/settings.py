@@ -21,6 +21,14 @@ CHECK_PROXIES: bool = bool(
     False
     #True
 )
+REVALIDATE_PROXIES: bool = bool(
+    False
+    #True
+)
+STREAM_PROXY_LISTS: bool = bool(
+    False
+    #True
+)
 WRITE_LOG_TO_FILE: bool = bool(
     #False
     True
@@ -37,6 +45,26 @@ USE_MULTITHREADS: bool = bool(
     #False
     True
 )
+USE_FETCH_POOL: bool = bool(
+    False
+    #True
+)
+USE_PROXY_RACE: bool = bool(
+    False
+    #True
+)
+USE_FETCH_SCHEDULER: bool = bool(
+    False
+    #True
+)
+USE_ASYNC_PROXY_CHECKER: bool = bool(
+    False
+    #True
+)
+USE_PROXY_HANDSHAKE_CHECK: bool = bool(
+    False
+    #True
+)
 ENABLE_PARSING_MODULES: bool = bool(
     #False
     True
@@ -53,6 +81,38 @@ CELERY_USE_PICKLE_SERIALIZER = bool(
     True
     #False
 )
+USE_REDIS_RATE_LIMITER = bool(
+    False
+    #True
+)
+USE_REDIS_CF_CLEARANCE = bool(
+    False
+    #True
+)
+USE_REDIS_PROXY_POOL = bool(
+    False
+    #True
+)
+USE_CELERY_PROXY_CHECK = bool(
+    False
+    #True
+)
+USE_WRITE_BEHIND_PAGES = bool(
+    False
+    #True
+)
+USE_PAGE_MANIFEST = bool(
+    False
+    #True
+)
+USE_FETCH_METRICS = bool(
+    False
+    #True
+)
+RECORD_FETCH_FIXTURES = bool(
+    #True
+    False
+)
 USE_DATABASE = bool(
     #True
     False
@@ -70,6 +130,66 @@ FLASK_CACHE_TIME_TO_LIVE = FLASK_TIME_TO_LIVE
 FLASK_SESSION_TYPE = 'filesystem'
 FLASK_CACHE_TYPE = 'filesystem'
 TITLES_DUMP_KEY_ERRORS = 'errors'
+SESSION_POOL_CONNECTIONS = 10
+SESSION_POOL_MAX_SESSIONS = 128
+FETCH_POOL_SIZE = 64
+SESSION_POOL_MAXSIZE = FETCH_POOL_SIZE
+FETCH_SCHEDULER_SLOTS = 16
+PROXY_CHECK_CONCURRENCY = 256
+PROXY_CHECK_TIMEOUT = 5.0
+PROXY_HANDSHAKE_CONCURRENCY = 1024
+PROXY_HANDSHAKE_TIMEOUT = 1.5
+PROXY_CHECK_TTL = int(timedelta(hours=1).total_seconds())
+PROXY_RECHECK_LIMIT = 500
+PROXY_ENOUGH_COUNT = 50
+PROXY_DOWNLOAD_TIMEOUT = 10
+PROXY_CHECK_SHARD_SIZE = 250
+PROXY_CHECK_INTERVAL = int(timedelta(minutes=30).total_seconds())
+PROXY_RACE_WIDTH = 3
+PROXY_RACE_POOL_SIZE = 64
+PROXY_HEDGE_LIMIT = 2
+PROXY_HEDGE_DEFAULT_DELAY = 1.0
+PROXY_HEDGE_MIN_SAMPLES = 20
+PROXY_LATENCY_WINDOW = 500
+PROXY_HEALTH_EWMA_ALPHA = 0.3
+PROXY_HEALTH_DEFAULT_LATENCY = 2.0
+PROXY_HEALTH_SAVE_INTERVAL = 30
+PROXY_QUARANTINE_THRESHOLD = 3
+PROXY_QUARANTINE_BASE = int(timedelta(minutes=1).total_seconds())
+PROXY_QUARANTINE_MAX = int(timedelta(hours=1).total_seconds())
+PROXY_POOL_KEY_PREFIX = 'proxy_pool'
+PROXY_LEASE_LIMIT = 4
+PROXY_LEASE_TTL = int(timedelta(minutes=2).total_seconds())
+PROXY_LEASE_WAIT = 0.1
+REDIS_RETRY_AFTER = 30
+RATE_LIMITER_KEY_PREFIX = 'rate_limit'
+CF_CLEARANCE_KEY_PREFIX = 'cf_clearance'
+CF_CLEARANCE_COOKIES = frozenset({'cf_clearance', '__cfduid'})
+CF_CLEARANCE_TTL = int(timedelta(minutes=30).total_seconds())
+FETCH_METRICS_KEY = 'fetch_metrics'
+FETCH_METRICS_BUFFER_SIZE = 10000
+FETCH_METRICS_PERCENTILES = (0.5, 0.9, 0.99)
+WEB_PAGES_MAX_SIZE = 512 * 1024 * 1024
+WEB_PAGES_TTL: typ.Dict[str, int] = dict({
+    'list_page': int(timedelta(days=1).total_seconds()),
+    'title_page': int(timedelta(days=30).total_seconds()),
+})
+WEB_PAGES_DEFAULT_TTL = int(timedelta(days=7).total_seconds())
+TITLES_FRESHNESS_TTL = int(timedelta(days=7).total_seconds())
+PAGE_MANIFEST_VERSION = 1
+WEB_PAGES_TOUCH_INTERVAL = int(timedelta(hours=1).total_seconds())
+WEB_PAGES_ORPHAN_GRACE = int(timedelta(minutes=10).total_seconds())
+WEB_PAGES_COMPACT_INTERVAL = int(timedelta(hours=6).total_seconds())
+WEB_PAGES_COMPRESSION_LEVEL = 6
+WEB_PAGES_ENCODING = 'utf-8'
+WEB_PAGES_BATCH_SIZE = 100
+WEB_PAGES_BATCH_INTERVAL = 2.0
+WEB_PAGES_QUEUE_SIZE = 1000
+WEB_PAGES_FLUSH_TIMEOUT = 10.0
+RETRYABLE_STATUS_CODES = frozenset({
+    408, 425, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524
+})
+PROXY_FAILURE_STATUS_CODES = frozenset({403, 407})
 #---
 
 # Web Protocols
@@ -88,6 +208,11 @@ REQUEST_PROXIES_FORMAT: typ.Dict[Protocol, AnyHttpUrl] = {
 #---
 CELERY_BROKER_URL: AnyHttpUrl = 'redis://localhost:6379'
 CELERY_RESULT_BACKEND: AnyHttpUrl = 'redis://localhost:6379'
+RATE_LIMITER_REDIS_URL: AnyHttpUrl = CELERY_BROKER_URL
+CF_CLEARANCE_REDIS_URL: AnyHttpUrl = CELERY_BROKER_URL
+FETCH_METRICS_REDIS_URL: AnyHttpUrl = CELERY_BROKER_URL
+PROXY_POOL_REDIS_URL: AnyHttpUrl = CELERY_BROKER_URL
+FETCH_STUB_URL: typ.Union[AnyHttpUrl, None] = os.environ.get('fetch_stub_url')
 #---
 
 # Files and Directories
@@ -103,12 +228,15 @@ WEB_PAGES_DIR: Path = os.path.join(VARIABLE_DIR, "web_pages/")
 JSON_DUMPS_DIR: Path = os.path.join(VARIABLE_DIR, "json_dumps/")
 FLASK_SESSION_FILE_DIR: Path = os.path.join(VARIABLE_DIR, "flask_session/")
 FLASK_CACHE_DIR: Path = os.path.join(VARIABLE_DIR, "flask_cache/")
+FETCH_FIXTURES_DIR: Path = os.path.join(VARIABLE_DIR, "fixtures/")
 SH_DIR: Path = os.path.join(ROOT_DIRECTORY, "sh_scripts/")
 
 REDIS_SETUP_SH_FILE: Path = os.path.join(SH_DIR, "redis_up.sh")
 CELERY_SETUP_SH_FILE: Path = os.path.join(SH_DIR, "celery_worker_up.sh")
 CORRECT_PROXIES_FILE: Path = os.path.join(PROXY_LISTS_DIR, "correct_proxies")
+CF_CLEARANCE_FILE: Path = os.path.join(VARIABLE_DIR, "cf_clearance.json")
 GLOBAL_LOG_FILE: Path = os.path.join(GLOBAL_LOG_DIR, 'general_log.log')
+FETCH_METRICS_FILE: Path = os.path.join(GLOBAL_LOG_DIR, 'fetch_metrics.jsonl')
 COMMON_BASH_LOG_FILE: Path = os.path.join(GLOBAL_LOG_DIR, "bash.log")
 LOCAL_PROXY_FILES: typ.Dict[Protocol, str] = dict({
     PROXY_PROTOCOLS["socks4"]: "proxy_socks4",
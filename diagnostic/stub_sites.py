@@ -0,0 +1,310 @@
+'''
+Local stub sites for offline load tests.
+
+Replays the responses recorded to the fixtures archive
+(set the RECORD_FETCH_FIXTURES flag and run the parse and export actions
+once with network) and starts SOCKS stand-ins that tunnel
+the requests of the application to the stub sites.
+
+Run from the root directory:
+    python -m diagnostic.stub_sites --port 8080 --socks 4 \
+        --latency 0.3 --error-rate 0.05 --proxy-list animego_org
+Then start the application with the environment variable
+    fetch_stub_url=http://127.0.0.1:8080
+'''
+#--Start imports block
+#System import
+import os
+import time
+import random
+import select
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import typing as typ
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#Custom import
+from configs.settings import PROXY_LISTS_DIR
+from lib.fetch_fixtures import FixtureArchive
+#--Finish imports block
+
+#--Start global constant block
+SOCKS_RELAY_BUFFER = 64 * 1024
+SOCKS_CONNECT_TIMEOUT = 5
+#--Finish global constant block
+
+#--Start functional block
+class Faults:
+    '''
+    Injected latency and failures.
+    The latency is uniformly distributed within the jitter.
+    '''
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def delay(self) -> typ.NoReturn:
+        '''Sleeps for the injected latency.'''
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def is_failed(self) -> bool:
+        '''Decides if the request should fail.'''
+        return random.random() < self.error_rate
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    '''
+    Replays the recorded responses of the sites.
+    The domain of the site is the first part of the path.
+    '''
+    protocol_version = "HTTP/1.1"
+    faults: Faults = Faults()
+    verbose: bool = False
+
+    def do_GET(self):
+        self._replay("GET")
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        _ = self.rfile.read(length)
+        self._replay("POST")
+
+    def _send(self, status: int, headers: typ.Dict[str, str] = None,
+              body: bytes = b"") -> typ.NoReturn:
+        '''Sends the response.'''
+        self.send_response(status)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _replay(self, method: str) -> typ.NoReturn:
+        '''Sends the recorded response with the injected faults.'''
+        self.faults.delay()
+        if self.faults.is_failed():
+            return self._send(503, body=b"Injected failure")
+
+        url = FixtureArchive.get_site_url(self.path)
+        fixture = FixtureArchive.load(method, url)
+        if fixture is None:
+            return self._send(404, body=b"No fixture")
+
+        headers = fixture['headers']
+        etag = headers.get('ETag') or headers.get('etag')
+        if etag and self.headers.get('If-None-Match') == etag:
+            return self._send(304, {'ETag': etag})
+
+        headers = dict(headers)
+        headers.setdefault('Content-Type', "text/html; charset=utf-8")
+        self._send(fixture['status'], headers, fixture['body'].encode())
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class SocksStandInHandler(socketserver.BaseRequestHandler):
+    '''
+    Minimal SOCKS4/4a/5 server without authentication.
+    Supports only the CONNECT command.
+    '''
+    faults: Faults = Faults()
+
+    def _recv(self, size: int) -> bytes:
+        '''Receives exactly the size of bytes.'''
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed")
+            data += chunk
+        return data
+
+    def _recv_until_null(self) -> bytes:
+        '''Receives a null-terminated string.'''
+        data = b""
+        while True:
+            char = self._recv(1)
+            if char == b"\x00":
+                return data
+            data += char
+
+    def _handshake_socks4(self) -> typ.Tuple[str, int]:
+        '''Reads the SOCKS4 request. Returns the target address.'''
+        command, port = struct.unpack("!BH", self._recv(3))
+        address = self._recv(4)
+        _ = self._recv_until_null()
+        if address.startswith(b"\x00\x00\x00") and address != b"\x00" * 4:
+            host = self._recv_until_null().decode()
+        else:
+            host = socket.inet_ntoa(address)
+        if command != 1:
+            raise ConnectionError("Unsupported command")
+        return host, port
+
+    def _handshake_socks5(self) -> typ.Tuple[str, int]:
+        '''Reads the SOCKS5 request. Returns the target address.'''
+        methods_count = self._recv(1)[0]
+        _ = self._recv(methods_count)
+        self.request.sendall(b"\x05\x00")
+
+        _, command, _, address_type = self._recv(4)
+        if address_type == 1:
+            host = socket.inet_ntoa(self._recv(4))
+        elif address_type == 3:
+            host = self._recv(self._recv(1)[0]).decode()
+        elif address_type == 4:
+            host = socket.inet_ntop(socket.AF_INET6, self._recv(16))
+        else:
+            raise ConnectionError("Unsupported address type")
+        port = struct.unpack("!H", self._recv(2))[0]
+        if command != 1:
+            raise ConnectionError("Unsupported command")
+        return host, port
+
+    def _reply(self, version: int, success: bool) -> typ.NoReturn:
+        '''Sends the reply to the CONNECT command.'''
+        if version == 4:
+            status = b"\x5a" if success else b"\x5b"
+            self.request.sendall(b"\x00" + status + b"\x00" * 6)
+        else:
+            status = b"\x00" if success else b"\x01"
+            self.request.sendall(b"\x05" + status + b"\x00\x01" + b"\x00" * 6)
+
+    def _relay(self, upstream: socket.socket) -> typ.NoReturn:
+        '''Relays the data between the client and the target.'''
+        sockets = [self.request, upstream]
+        while True:
+            readable, _, _ = select.select(sockets, [], [])
+            for sock in readable:
+                data = sock.recv(SOCKS_RELAY_BUFFER)
+                if not data:
+                    return
+                other = upstream if sock is self.request else self.request
+                other.sendall(data)
+
+    def handle(self):
+        try:
+            version = self._recv(1)[0]
+            if version == 4:
+                host, port = self._handshake_socks4()
+            elif version == 5:
+                host, port = self._handshake_socks5()
+            else:
+                return
+        except (ConnectionError, OSError, IndexError):
+            return
+
+        self.faults.delay()
+        if self.faults.is_failed():
+            return self._reply(version, False)
+
+        try:
+            upstream = socket.create_connection((host, port),
+                                                timeout=SOCKS_CONNECT_TIMEOUT)
+            upstream.settimeout(None)
+        except OSError:
+            return self._reply(version, False)
+
+        with upstream:
+            self._reply(version, True)
+            try:
+                self._relay(upstream)
+            except OSError:
+                pass
+
+
+class ThreadingSocksServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_in_thread(server: socketserver.BaseServer) -> threading.Thread:
+    '''Starts the server in a daemon thread.'''
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+def write_proxy_list(module_name: str,
+                     proxies: typ.List[str]) -> typ.NoReturn:
+    '''
+    Writes the stand-ins as the correct proxies of the module.
+    Replaces the checked proxy list of the module.
+    '''
+    file_name = os.path.join(PROXY_LISTS_DIR,
+                             f"{module_name}_correct_proxies")
+    with open(file_name, 'w') as file:
+        file.write('\n'.join(proxies))
+
+def get_arguments() -> argparse.Namespace:
+    '''Parses the command line arguments.'''
+    parser = argparse.ArgumentParser(description="Local stub sites.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Latency of the stub sites, in seconds.")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Share of the 503 responses.")
+    parser.add_argument('--socks', type=int, default=0,
+                        help="Count of the SOCKS stand-ins.")
+    parser.add_argument('--socks-port', type=int, default=1080,
+                        help="Port of the first SOCKS stand-in.")
+    parser.add_argument('--socks-latency', type=float, default=0.0)
+    parser.add_argument('--socks-error-rate', type=float, default=0.0,
+                        help="Share of the refused connections.")
+    parser.add_argument('--proxy-list', action='append', default=list(),
+                        help="Module to write the stand-ins as its proxies.")
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args()
+
+#--Finish functional block
+
+#--Start main block
+def main() -> typ.NoReturn:
+    args = get_arguments()
+
+    StubSiteHandler.faults = Faults(args.latency, args.jitter,
+                                    args.error_rate)
+    StubSiteHandler.verbose = args.verbose
+    SocksStandInHandler.faults = Faults(args.socks_latency, 0.0,
+                                        args.socks_error_rate)
+
+    site_server = ThreadingHTTPServer((args.host, args.port), StubSiteHandler)
+    site_server.daemon_threads = True
+    _ = start_in_thread(site_server)
+    print(f"* Stub sites: http://{args.host}:{args.port}")
+
+    proxies = list()
+    for index in range(args.socks):
+        port = args.socks_port + index
+        server = ThreadingSocksServer((args.host, port), SocksStandInHandler)
+        _ = start_in_thread(server)
+        protocol = "socks5" if index % 2 == 0 else "socks4"
+        proxies.append(f"{protocol}://{args.host}:{port}")
+    if proxies:
+        print("* SOCKS stand-ins:\n  " + "\n  ".join(proxies))
+
+    for module_name in args.proxy_list:
+        _ = write_proxy_list(module_name, proxies)
+        print(f"* Proxy list of {module_name} is replaced.")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n* Stopped.")
+
+if __name__ == '__main__':
+    _ = main()
+#--Finish main block
@@ -0,0 +1,164 @@
+#--Start imports block
+#System imports
+import os
+import json
+import time
+import redis
+import threading
+import typing as typ
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import (
+    CF_CLEARANCE_FILE, CF_CLEARANCE_COOKIES, CF_CLEARANCE_TTL,
+    CF_CLEARANCE_REDIS_URL, CF_CLEARANCE_KEY_PREFIX, USE_REDIS_CF_CLEARANCE
+)
+from .types import Session, Cookies
+from .tools import get_redis_client
+#--Finish imports block
+
+
+#--Start global constants block
+Clearance = typ.Dict[str, typ.Union[typ.Dict[str, Cookies], str, float]]
+#--Finish global constants block
+
+
+#--Start functional block
+class ClearanceCache:
+    '''
+    Caches solved Cloudflare clearance cookies
+    and the user-agent they were issued for,
+    per domain and proxy, until they expire.
+    Stored in Redis, or in a file if Redis is not available,
+    so all sessions, threads and Celery workers reuse them.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _known: typ.Dict[str, Clearance] = dict()
+    #----------------------------
+
+    @classmethod
+    def _make_key(cls, domain: str, proxy: AnyUrl=None) -> str:
+        '''Builds the key of the clearance.'''
+        return f"{CF_CLEARANCE_KEY_PREFIX}:{domain}:{proxy or 'direct'}"
+
+    @classmethod
+    def _get_client(cls) -> typ.Union[redis.Redis, None]:
+        '''Returns the Redis client if it is enabled and available.'''
+        if not USE_REDIS_CF_CLEARANCE: return None
+        return get_redis_client(CF_CLEARANCE_REDIS_URL)
+
+    @classmethod
+    def _read_file(cls) -> typ.Dict[str, Clearance]:
+        '''Reads all clearances from the file.'''
+        try:
+            with open(CF_CLEARANCE_FILE) as file:
+                return json.load(file)
+        except:
+            return dict()
+
+    @classmethod
+    def _write_file(cls, key: str, clearance: Clearance) -> typ.NoReturn:
+        '''Writes the clearance to the file, dropping expired ones.'''
+        now = time.time()
+        with cls._lock:
+            data = {
+                k: v for k, v in cls._read_file().items()
+                if v.get('expires', 0) > now
+            }
+            data[key] = clearance
+
+            tmp_path = f"{CF_CLEARANCE_FILE}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w') as file:
+                    json.dump(data, file)
+                os.replace(tmp_path, CF_CLEARANCE_FILE)
+            except:
+                pass
+
+    @classmethod
+    def get(cls, domain: str, proxy: AnyUrl=None
+           ) -> typ.Union[Clearance, None]:
+        '''Returns the unexpired clearance for the domain and proxy.'''
+        key = cls._make_key(domain, proxy)
+        clearance = None
+
+        client = cls._get_client()
+        try:
+            if client is not None:
+                value = client.get(key)
+                clearance = json.loads(value) if value else None
+            else:
+                clearance = cls._read_file().get(key)
+        except redis.RedisError:
+            clearance = cls._read_file().get(key)
+
+        if not clearance or clearance.get('expires', 0) <= time.time():
+            return None
+        cls._known[key] = clearance
+        return clearance
+
+    @classmethod
+    def put(cls, domain: str, proxy: AnyUrl, cookies: typ.Dict[str, Cookies],
+            user_agent: str, expires: float) -> typ.NoReturn:
+        '''Stores the clearance for the domain and proxy.'''
+        key = cls._make_key(domain, proxy)
+        clearance = dict({
+            'cookies': cookies,
+            'user_agent': user_agent,
+            'expires': expires
+        })
+        cls._known[key] = clearance
+        ttl = int(expires - time.time())
+        if ttl <= 0: return
+
+        client = cls._get_client()
+        try:
+            if client is not None:
+                _ = client.set(key, json.dumps(clearance), ex=ttl)
+                return
+        except redis.RedisError:
+            pass
+        _ = cls._write_file(key, clearance)
+
+    @classmethod
+    def apply(cls, session: Session, domain: str,
+              proxy: AnyUrl=None) -> bool:
+        '''
+        Sets the cached clearance cookies and user-agent
+        to the session. Returns False if nothing is cached.
+        '''
+        clearance = cls.get(domain, proxy)
+        if not clearance: return False
+
+        for name, value in clearance['cookies'].items():
+            session.cookies.set(name, value, domain=f".{domain}")
+        session.headers['User-Agent'] = clearance['user_agent']
+        return True
+
+    @classmethod
+    def store(cls, session: Session, domain: str,
+              proxy: AnyUrl=None) -> bool:
+        '''
+        Caches the clearance cookies of the session
+        if they were renewed by a solved challenge.
+        '''
+        cookies = dict()
+        expires = time.time() + CF_CLEARANCE_TTL
+        for cookie in session.cookies:
+            if cookie.name not in CF_CLEARANCE_COOKIES: continue
+            cookies[cookie.name] = cookie.value
+            if cookie.expires:
+                expires = min(expires, cookie.expires)
+
+        if not cookies: return False
+
+        known = cls._known.get(cls._make_key(domain, proxy))
+        if known and known['cookies'] == cookies: return False
+
+        user_agent = session.headers.get('User-Agent', '')
+        _ = cls.put(domain, proxy, cookies, user_agent, expires)
+        return True
+
+#--Finish functional block
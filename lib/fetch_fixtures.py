@@ -0,0 +1,105 @@
+#--Start imports block
+#System imports
+import os
+import json
+import hashlib
+import typing as typ
+import urllib.parse
+from pathlib import Path
+from pydantic import AnyHttpUrl
+
+#Custom imports
+from configs.settings import FETCH_FIXTURES_DIR, FETCH_STUB_URL
+from .types import Response, RequestMethod
+from .single_flight import SingleFlight
+#--Finish imports block
+
+
+#--Start global constants block
+Fixture = typ.Dict[str, typ.Any]
+#--Finish global constants block
+
+
+#--Start functional block
+class FixtureArchive:
+    '''
+    Archive of recorded responses of the sites.
+    Used by the local stub sites to replay the responses offline.
+    The fixtures are stored by domain in the fixtures directory.
+    '''
+    #Constant block
+    #----------------------------
+    _replayed_headers: typ.FrozenSet[str] = frozenset({
+        'content-type', 'etag', 'last-modified', 'location', 'cache-control'
+    })
+    #----------------------------
+
+    @classmethod
+    def make_key(cls, method: str, url: AnyHttpUrl) -> str:
+        '''
+        Builds the key of the fixture
+        by the method and the normalized url without the scheme.
+        '''
+        parts = urllib.parse.urlsplit(SingleFlight.normalize_url(url))
+        target = parts.netloc + parts.path
+        if parts.query: target += "?" + parts.query
+        return hashlib.sha1(f"{method} {target}".encode()).hexdigest()
+
+    @classmethod
+    def get_fixture_path(cls, method: str, url: AnyHttpUrl) -> Path:
+        '''Gets the path of the fixture file.'''
+        domain = urllib.parse.urlsplit(url).netloc.lower()
+        return os.path.join(FETCH_FIXTURES_DIR, domain,
+                            cls.make_key(method, url) + ".json")
+
+    @classmethod
+    def record(cls, method: RequestMethod, url: AnyHttpUrl,
+               response: Response) -> bool:
+        '''Stores the response to the archive.'''
+        fixture = dict({
+            'method': method.value,
+            'url': url,
+            'status': response.status_code,
+            'headers': {
+                key: value for key, value in response.headers.items()
+                if key.lower() in cls._replayed_headers
+            },
+            'body': response.text
+        })
+        file_path = cls.get_fixture_path(method.value, url)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'w') as file:
+                json.dump(fixture, file)
+        except:
+            return False
+        return True
+
+    @classmethod
+    def load(cls, method: str, url: AnyHttpUrl) -> typ.Union[Fixture, None]:
+        '''Loads the recorded response if it exists.'''
+        try:
+            with open(cls.get_fixture_path(method, url)) as file:
+                return json.load(file)
+        except:
+            return None
+
+    @classmethod
+    def get_stub_url(cls, url: AnyHttpUrl) -> AnyHttpUrl:
+        '''
+        Redirects the url to the local stub sites if they are set.
+        The domain of the site becomes the first part of the path.
+        '''
+        if not FETCH_STUB_URL: return url
+        parts = urllib.parse.urlsplit(url)
+        stub_url = FETCH_STUB_URL.rstrip('/') + "/" + parts.netloc + parts.path
+        if parts.query: stub_url += "?" + parts.query
+        return stub_url
+
+    @classmethod
+    def get_site_url(cls, stub_path: str) -> AnyHttpUrl:
+        '''Restores the url of the site from the path of the stub url.'''
+        domain, _, path = stub_path.lstrip('/').partition('/')
+        return f"https://{domain}/{path}"
+
+#--Finish functional block
@@ -0,0 +1,213 @@
+#--Start imports block
+#System imports
+import json
+import redis
+import threading
+import typing as typ
+from collections import deque, defaultdict
+from logging import Logger
+
+#Custom imports
+from configs.settings import (
+    USE_FETCH_METRICS, FETCH_METRICS_KEY, FETCH_METRICS_BUFFER_SIZE,
+    FETCH_METRICS_PERCENTILES, FETCH_METRICS_FILE, FETCH_METRICS_REDIS_URL
+)
+from .types import FetchTiming, EnabledMetricsSink, DEFAULT_METRICS_SINK
+from .interfaces import IMetricsSink
+from .tools import get_redis_client
+#--Finish imports block
+
+
+#--Start global constants block
+MetricsSummary = typ.Dict[typ.Tuple[str, str], typ.Dict[str, typ.Any]]
+#--Finish global constants block
+
+
+#--Start functional block
+class RingBufferSink(IMetricsSink):
+    '''
+    Keeps the last timings in memory of the process.
+    '''
+
+    def __init__(self, size: int = FETCH_METRICS_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._timings: typ.Deque[FetchTiming] = deque(maxlen=size)
+
+    def add_timing(self, timing: FetchTiming) -> typ.NoReturn:
+        '''Stores the timing of a request.'''
+        with self._lock:
+            self._timings.append(timing)
+
+    def get_timings(self, since: float = 0) -> typ.List[FetchTiming]:
+        '''Returns the stored timings started since the time.'''
+        with self._lock:
+            return [t for t in self._timings if t.started_at >= since]
+
+
+class JSONLinesSink(IMetricsSink):
+    '''
+    Appends the timings to a JSON lines file.
+    '''
+
+    def __init__(self, file_path: str = FETCH_METRICS_FILE):
+        self._lock = threading.Lock()
+        self._file_path = file_path
+
+    def add_timing(self, timing: FetchTiming) -> typ.NoReturn:
+        '''Stores the timing of a request.'''
+        line = json.dumps(timing.asdict()) + "\n"
+        with self._lock:
+            try:
+                with open(self._file_path, 'a') as file:
+                    file.write(line)
+            except:
+                pass
+
+    def get_timings(self, since: float = 0) -> typ.List[FetchTiming]:
+        '''Returns the stored timings started since the time.'''
+        timings = list()
+        try:
+            with open(self._file_path) as file:
+                for line in file:
+                    timing = FetchTiming(**json.loads(line))
+                    if timing.started_at >= since:
+                        timings.append(timing)
+        except:
+            pass
+        return timings
+
+
+class RedisSink(RingBufferSink):
+    '''
+    Stores the last timings in a capped Redis list,
+    so the timings of all Celery workers are collected.
+    Falls back to the in-memory buffer if Redis is unavailable.
+    '''
+
+    def __init__(self, size: int = FETCH_METRICS_BUFFER_SIZE,
+                 url: str = FETCH_METRICS_REDIS_URL):
+        _ = super().__init__(size)
+        self._size = size
+        self._url = url
+
+    def add_timing(self, timing: FetchTiming) -> typ.NoReturn:
+        '''Stores the timing of a request.'''
+        client = get_redis_client(self._url)
+        try:
+            if client is not None:
+                pipe = client.pipeline()
+                pipe.rpush(FETCH_METRICS_KEY, json.dumps(timing.asdict()))
+                pipe.ltrim(FETCH_METRICS_KEY, -self._size, -1)
+                _ = pipe.execute()
+                return
+        except redis.RedisError:
+            pass
+        _ = super().add_timing(timing)
+
+    def get_timings(self, since: float = 0) -> typ.List[FetchTiming]:
+        '''Returns the stored timings started since the time.'''
+        client = get_redis_client(self._url)
+        try:
+            if client is not None:
+                timings = [
+                    FetchTiming(**json.loads(value))
+                    for value in client.lrange(FETCH_METRICS_KEY, 0, -1)
+                ]
+                return [t for t in timings if t.started_at >= since]
+        except redis.RedisError:
+            pass
+        return super().get_timings(since)
+
+
+MetricsSinksCompatibility: typ.Dict[EnabledMetricsSink, IMetricsSink] = {
+    EnabledMetricsSink.RING: RingBufferSink,
+    EnabledMetricsSink.JSONL: JSONLinesSink,
+    EnabledMetricsSink.REDIS: RedisSink
+}
+
+
+class FetchMetrics:
+    '''
+    Collects the timings of the requests to the selected sink
+    and summarizes them by module and request class.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _sink: typ.Union[IMetricsSink, None] = None
+    _measures: typ.Tuple[str, ...] = ('ttfb', 'transfer', 'total')
+    #----------------------------
+
+    @classmethod
+    def get_sink(cls) -> IMetricsSink:
+        '''Returns the sink of the timings. Created once.'''
+        with cls._lock:
+            if cls._sink is None:
+                cls._sink = MetricsSinksCompatibility[DEFAULT_METRICS_SINK]()
+            return cls._sink
+
+    @classmethod
+    def set_sink(cls, sink_type: EnabledMetricsSink) -> IMetricsSink:
+        '''Replaces the sink of the timings.'''
+        with cls._lock:
+            cls._sink = MetricsSinksCompatibility[sink_type]()
+            return cls._sink
+
+    @classmethod
+    def record(cls, timing: FetchTiming) -> typ.NoReturn:
+        '''Stores the timing of a request if metrics are enabled.'''
+        if not USE_FETCH_METRICS: return
+        _ = cls.get_sink().add_timing(timing)
+
+    @classmethod
+    def _get_percentile(cls, values: typ.List[float],
+                        percentile: float) -> typ.Union[float, None]:
+        '''Returns the percentile of the sorted values.'''
+        if not values: return None
+        index = min(len(values) - 1, int(len(values) * percentile))
+        return values[index]
+
+    @classmethod
+    def get_summary(cls, since: float = 0) -> MetricsSummary:
+        '''
+        Returns the counts and the timing percentiles
+        by module and request class.
+        '''
+        groups = defaultdict(list)
+        for timing in cls.get_sink().get_timings(since):
+            groups[(timing.module, timing.request_class)].append(timing)
+
+        summary = dict()
+        for key, timings in groups.items():
+            stats = dict({
+                'requests': len(timings),
+                'errors': sum(1 for t in timings if t.error),
+                'retries': sum(1 for t in timings if t.retries),
+                'cache_hits': sum(1 for t in timings if t.cache == 'hit'),
+                'bytes': sum(t.bytes for t in timings),
+            })
+            for measure in cls._measures:
+                values = sorted(getattr(t, measure) for t in timings
+                                if getattr(t, measure) is not None)
+                for percentile in FETCH_METRICS_PERCENTILES:
+                    name = f"{measure}_p{int(percentile * 100)}"
+                    stats[name] = cls._get_percentile(values, percentile)
+            summary[key] = stats
+        return summary
+
+    @classmethod
+    def log_summary(cls, logger: Logger, since: float = 0) -> typ.NoReturn:
+        '''Logs the summary of the timings.'''
+        if not USE_FETCH_METRICS: return
+        summary = cls.get_summary(since)
+        if not summary: return
+
+        logger.info("Fetch timings summary:")
+        for (module, request_class), stats in sorted(summary.items()):
+            values = ", ".join(
+                f"{name}={value:.3f}" if isinstance(value, float)
+                else f"{name}={value}"
+                for name, value in stats.items())
+            logger.info(f"  {module} [{request_class}]: {values}")
+
+#--Finish functional block
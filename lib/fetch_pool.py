@@ -0,0 +1,64 @@
+#--Start imports block
+#System imports
+import typing as typ
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from billiard import Queue
+
+#Custom imports
+from configs.settings import FETCH_POOL_SIZE
+from .tools import OutputLogger
+#--Finish imports block
+
+
+#--Start global constants block
+JobItem = typ.Any
+JobResult = typ.Any
+#--Finish global constants block
+
+
+#--Start functional block
+class FetchPool:
+    '''
+    Runs I/O-bound fetch jobs in a pool of threads.
+    The number of requests in flight is set by the config,
+    not by the CPU count.
+    The sessions (cfscrape, PySocks) are blocking,
+    so each job in flight holds a thread.
+    '''
+
+    def __init__(self, size: int=FETCH_POOL_SIZE, queue: Queue=None):
+        self._size = max(1, size)
+        self._queue = queue
+        self._logger = OutputLogger(duplicate=True, queue=self._queue,
+                                    name="fetch_pool").logger
+
+    def map(self, job: typ.Callable[[JobItem], JobResult],
+            items: typ.Iterable[JobItem],
+            on_error: typ.Callable[[JobItem, Exception], JobResult]
+           ) -> typ.List[JobResult]:
+        '''
+        Runs the job for every item and returns results
+        in the order of completion.
+        A failed job gives the result of the error callback,
+        so the item is not lost.
+        '''
+        items = list(items)
+        results = list()
+        self._logger.info(f"Running {len(items)} jobs " +
+                          f"(in flight: {self._size})...")
+
+        with ThreadPoolExecutor(max_workers=self._size,
+                                thread_name_prefix="fetch_pool") as executor:
+            futures = {executor.submit(job, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as exc:
+                    item = futures[future]
+                    self._logger.error(f"Fetch job failed. ({exc!r})")
+                    results.append(on_error(item, exc))
+
+        self._logger.info("...jobs are done.")
+        return results
+
+#--Finish functional block
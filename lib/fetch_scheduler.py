@@ -0,0 +1,111 @@
+#--Start imports block
+#System imports
+import os
+import heapq
+import itertools
+import threading
+import typing as typ
+from contextlib import contextmanager
+
+#Custom imports
+from configs.settings import USE_FETCH_SCHEDULER, FETCH_SCHEDULER_SLOTS
+from .types import RequestClass
+#--Finish imports block
+
+
+#--Start functional block
+class PrioritySemaphore:
+    '''
+    Semaphore that hands the released slots
+    to the waiters with the highest priority first.
+    A lower value is a higher priority.
+    Waiters with the same priority are served in order.
+    '''
+
+    def __init__(self, slots: int):
+        self._lock = threading.Lock()
+        self._slots = slots
+        self._waiters: typ.List[typ.Tuple[int, int, threading.Event]] = list()
+        self._counter = itertools.count()
+
+    def acquire(self, priority: int) -> typ.NoReturn:
+        '''Blocks until a slot is given.'''
+        with self._lock:
+            if self._slots > 0 and not self._waiters:
+                self._slots -= 1
+                return
+            event = threading.Event()
+            heapq.heappush(self._waiters,
+                           (priority, next(self._counter), event))
+        event.wait()
+
+    def release(self) -> typ.NoReturn:
+        '''Hands the slot to the first waiter or frees it.'''
+        with self._lock:
+            if self._waiters:
+                _, _, event = heapq.heappop(self._waiters)
+                event.set()
+            else:
+                self._slots += 1
+
+
+class FetchScheduler:
+    '''
+    Limits the requests in flight to a domain
+    and admits them by the priority of the request class,
+    so short user-visible steps do not queue
+    behind hundreds of title fetches.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _semaphores: typ.Dict[str, PrioritySemaphore] = dict()
+    _pid: int = os.getpid()
+    _priorities: typ.Dict[RequestClass, int] = dict({
+        RequestClass.AUTH: 0,
+        RequestClass.LIST_PAGE: 1,
+        RequestClass.ACTION: 2,
+        RequestClass.SEARCH: 2,
+        RequestClass.TITLE_PAGE: 3,
+        RequestClass.BACKGROUND: 4,
+    })
+    #----------------------------
+
+    @classmethod
+    def get_priority(cls, request_class: typ.Union[RequestClass, None]) -> int:
+        '''Returns the priority of the request class.'''
+        return cls._priorities.get(request_class,
+                                   cls._priorities[RequestClass.TITLE_PAGE])
+
+    @classmethod
+    def get_semaphore(cls, domain: str) -> PrioritySemaphore:
+        '''
+        Returns the semaphore of the domain.
+        Semaphores inherited from a parent process are dropped.
+        '''
+        with cls._lock:
+            pid = os.getpid()
+            if cls._pid != pid:
+                cls._semaphores = dict()
+                cls._pid = pid
+            if domain not in cls._semaphores:
+                cls._semaphores[domain] = PrioritySemaphore(FETCH_SCHEDULER_SLOTS)
+            return cls._semaphores[domain]
+
+    @classmethod
+    @contextmanager
+    def slot(cls, domain: str,
+             request_class: typ.Union[RequestClass, None]) -> typ.Iterator[None]:
+        '''Holds a slot of the domain while the request is in flight.'''
+        if not USE_FETCH_SCHEDULER:
+            yield
+            return
+
+        semaphore = cls.get_semaphore(domain)
+        semaphore.acquire(cls.get_priority(request_class))
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+#--Finish functional block
@@ -14,7 +14,8 @@ from logging import Logger
 #Custom imports
 from .types import (
     WebPage, LinkedAnimeInfoType, WatchListType, 
-    JSON, Cookies, ServerAction, TitlesProgressStatus
+    JSON, Cookies, ServerAction, TitlesProgressStatus,
+    RequestClass, RetryPolicy, FetchTiming, WebPageBytes
 )
 #--Finish imports block
 
@@ -31,6 +32,20 @@ class ISiteSettings:
     
     use_proxy: bool = False
     proxies: typ.Dict[Protocol, AnyHttpUrl] = dict()
+
+    rate_limit: typ.Union[float, None] = None  # requests per second
+    rate_burst: int = 1
+
+    retry_policies: typ.Dict[RequestClass, RetryPolicy] = dict({
+        RequestClass.AUTH: RetryPolicy(read_timeout=10.0, max_retries=3),
+        RequestClass.LIST_PAGE: RetryPolicy(read_timeout=10.0, max_retries=3,
+                                            budget=120.0),
+        RequestClass.TITLE_PAGE: RetryPolicy(),
+        RequestClass.SEARCH: RetryPolicy(),
+        RequestClass.ACTION: RetryPolicy(read_timeout=10.0, max_retries=0,
+                                         is_idempotent=False),
+        RequestClass.BACKGROUND: RetryPolicy(max_retries=1),
+    })
     
     url_domain: AnyHttpUrl = ""
     url_general: AnyHttpUrl = ""
@@ -135,6 +150,10 @@ class ISiteSettings:
             return True
         return False
                       
+    def get_retry_policy(self, request_class: RequestClass) -> RetryPolicy:
+        '''Returns the retry policy for the class of requests.'''
+        return self.retry_policies.get(request_class, RetryPolicy())
+                      
     def make_preparing(self, web_page: WebPage, **kwargs):
         '''Performs the initial preparation of the configuration module.'''
         pass
@@ -197,6 +216,67 @@ class IConnectedModule:
         return json_dump_name
 
 
+class IMetricsSink:
+    '''
+    Contains methods for storing the fetch timings.
+    The storage is specified in the implementation.
+    '''
+
+    def add_timing(self, timing: FetchTiming) -> typ.NoReturn:
+        '''Stores the timing of a request.'''
+        pass
+
+    def get_timings(self, since: float = 0) -> typ.List[FetchTiming]:
+        '''Returns the stored timings started since the time.'''
+        pass
+
+
+class IPageStore:
+    '''
+    Contains methods for storing the web-pages of a site.
+    The pages are stored by the file name of the page.
+    The storage is specified in the implementation.
+    '''
+
+    def exists(self, name: str) -> bool:
+        '''Checks if the web-page is stored.'''
+        pass
+
+    def load(self, name: str) -> typ.Union[WebPage, None]:
+        '''Returns the stored web-page or None.'''
+        pass
+
+    def load_bytes(self, name: str) -> typ.Union[WebPageBytes, None]:
+        '''Returns the stored web-page as undecoded bytes or None.'''
+        pass
+
+    def load_validators(self, name: str) -> typ.Dict[str, str]:
+        '''Returns the validator headers of the stored web-page.'''
+        pass
+
+    def save(self, name: str, web_page: WebPage,
+             page_class: typ.Union[RequestClass, None] = None,
+             url: typ.Union[AnyHttpUrl, None] = None,
+             validators: typ.Dict[str, str] = None) -> bool:
+        '''Stores the web-page with its validator headers.'''
+        pass
+
+    def touch(self, name: str) -> bool:
+        '''
+        Renews the fetch time of the stored web-page without rewriting it.
+        Returns False if the page is not stored.
+        '''
+        pass
+
+    def flush(self, timeout: float = None) -> typ.NoReturn:
+        '''Writes the buffered web-pages.'''
+        pass
+
+    def compact(self) -> typ.NoReturn:
+        '''Evicts the expired and the excess web-pages.'''
+        pass
+
+
 class IDataHandler(dict):
     '''
     Contains methods for working with the data store.
@@ -270,7 +350,7 @@ class IProgressHandler:
         '''
         pass
 
-    def increase_progress_all(self) -> typ.NoReturn:
+    def increase_progress_all(self, count: int = 1) -> typ.NoReturn:
         '''
         Increases the total number of processed titles.
         '''
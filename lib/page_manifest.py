@@ -0,0 +1,170 @@
+#--Start imports block
+#System imports
+import os
+import json
+import time
+import inspect
+import hashlib
+import threading
+import typing as typ
+from pathlib import Path
+from pydantic import AnyHttpUrl
+
+#Custom imports
+from configs.settings import (
+    WEB_PAGES_ENCODING, TITLES_FRESHNESS_TTL, PAGE_MANIFEST_VERSION
+)
+from .types import WatchListType, WebPage, WebPageBytes, ManifestEntry
+from .single_flight import SingleFlight
+#--Finish imports block
+
+
+#--Start functional block
+class PageManifest:
+    '''
+    Manifest of the parsed web-pages of a watchlist.
+    Maps the URL of a page to the hash of its content
+    and the hash of the record parsed from it,
+    so an unchanged page is not parsed again.
+    Keeps the fingerprint of the titles of the watchlist,
+    so an unchanged watchlist with fresh titles is not visited again.
+    The manifest of another parser version is dropped on load.
+    '''
+
+    def __init__(self, dir_path: Path, type: WatchListType, version: str = ""):
+        self._file_path = os.path.join(dir_path, f"{type.value}_manifest.json")
+        self._version = version
+        self._lock = threading.Lock()
+        self._fingerprint: typ.Union[str, None] = None
+        self._entries: typ.Dict[AnyHttpUrl, ManifestEntry] = dict()
+
+    @staticmethod
+    def hash_page(web_page: typ.Union[WebPage, WebPageBytes]) -> str:
+        '''Returns the hash of the content of the web-page.'''
+        if isinstance(web_page, str):
+            web_page = web_page.encode(WEB_PAGES_ENCODING)
+        return hashlib.sha256(web_page).hexdigest()
+
+    @staticmethod
+    def hash_record(record: typ.Dict[str, typ.Any]) -> str:
+        '''Returns the hash of the parsed record.'''
+        data = json.dumps(record, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    @staticmethod
+    def make_version(parser: typ.Type[typ.Any]) -> str:
+        '''
+        Returns the hash of the record schema version 
+        and of the source of the parser class,
+        so any change of the parser invalidates the records.
+        '''
+        try:
+            source = inspect.getsource(parser)
+        except (OSError, TypeError):
+            source = f"{parser.__module__}.{parser.__qualname__}"
+        data = f"{PAGE_MANIFEST_VERSION}:{source}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    @staticmethod
+    def make_fingerprint(titles: typ.Dict[str, AnyHttpUrl]) -> str:
+        '''Returns the hash of the sorted keys and normalized URLs of the titles.'''
+        items = sorted((key, SingleFlight.normalize_url(url))
+                       for key, url in titles.items())
+        data = json.dumps(items, ensure_ascii=False)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def load(self) -> typ.NoReturn:
+        '''
+        Loads the manifest. A missing or broken file 
+        or the file of another version gives an empty one.
+        '''
+        fingerprint, entries = None, dict()
+        try:
+            with open(self._file_path) as file:
+                data = json.load(file)
+            if data.get('version') != self._version: 
+                data = dict()
+            fingerprint = data.get('fingerprint')
+            entries = {url: ManifestEntry(**entry)
+                       for url, entry in data.get('pages', dict()).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            fingerprint, entries = None, dict()
+        with self._lock:
+            self._fingerprint = fingerprint
+            self._entries = entries
+
+    def save(self) -> bool:
+        '''Writes the manifest to a temporary file and replaces the old one.'''
+        with self._lock:
+            data = dict({
+                'version': self._version,
+                'fingerprint': self._fingerprint,
+                'pages': {url: entry.asdict() 
+                          for url, entry in self._entries.items()},
+            })
+        tmp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
+            with open(tmp_path, 'w') as file:
+                json.dump(data, file, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self._file_path)
+        except OSError:
+            return False
+        return True
+
+    def get_record(self, url: AnyHttpUrl, page_hash: str,
+                   record: typ.Union[typ.Dict[str, typ.Any], None]
+                  ) -> typ.Union[typ.Dict[str, typ.Any], None]:
+        '''
+        Returns the stored record if the page is not changed
+        and the record is the one parsed from it.
+        '''
+        if record is None: return None
+        with self._lock:
+            entry = self._entries.get(SingleFlight.normalize_url(url))
+        if entry is None or entry.page_hash != page_hash: return None
+        if entry.record_hash != self.hash_record(record): return None
+        return record
+
+    def update(self, url: AnyHttpUrl, page_hash: str,
+               record: typ.Dict[str, typ.Any],
+               key: str = None) -> typ.NoReturn:
+        '''Remembers the hashes of the page and of the checked record.'''
+        entry = ManifestEntry(page_hash, self.hash_record(record), key,
+                              time.time())
+        with self._lock:
+            self._entries[SingleFlight.normalize_url(url)] = entry
+
+    def retain(self, urls: typ.Iterable[AnyHttpUrl]) -> typ.NoReturn:
+        '''Removes the pages which are not in the watchlist anymore.'''
+        urls = set(map(SingleFlight.normalize_url, urls))
+        with self._lock:
+            self._entries = {url: entry for url, entry in self._entries.items()
+                             if url in urls}
+
+    def set_fingerprint(self, titles: typ.Dict[str, AnyHttpUrl]) -> typ.NoReturn:
+        '''Remembers the fingerprint of the titles of the watchlist.'''
+        fingerprint = self.make_fingerprint(titles)
+        with self._lock:
+            self._fingerprint = fingerprint
+
+    def is_unchanged(self, titles: typ.Dict[str, AnyHttpUrl],
+                     records: typ.Dict[str, typ.Any],
+                     ttl: int = TITLES_FRESHNESS_TTL) -> bool:
+        '''
+        Checks if the titles are the same as in the last run
+        and all of them have records checked within the TTL.
+        '''
+        fingerprint = self.make_fingerprint(titles)
+        now = time.time()
+        with self._lock:
+            if fingerprint != self._fingerprint: return False
+            for key, url in titles.items():
+                entry = self._entries.get(SingleFlight.normalize_url(url))
+                if entry is None or entry.checked_at + ttl <= now: return False
+                record = records.get(key)
+                if record is None: return False
+                if entry.record_hash != self.hash_record(record): return False
+        return True
+
+#--Finish functional block
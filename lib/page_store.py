@@ -0,0 +1,902 @@
+#--Start imports block
+#System imports
+import os
+import gzip
+import json
+import time
+import queue
+import fcntl
+import atexit
+import sqlite3
+import hashlib
+import threading
+import typing as typ
+from pathlib import Path
+from contextlib import contextmanager
+from pydantic import AnyHttpUrl
+
+#Custom imports
+from configs.settings import (
+    WEB_PAGES_DIR, WEB_PAGES_MAX_SIZE, WEB_PAGES_TTL, WEB_PAGES_DEFAULT_TTL,
+    WEB_PAGES_TOUCH_INTERVAL, WEB_PAGES_ORPHAN_GRACE,
+    WEB_PAGES_COMPRESSION_LEVEL, WEB_PAGES_BATCH_SIZE, WEB_PAGES_BATCH_INTERVAL,
+    WEB_PAGES_ENCODING, USE_WRITE_BEHIND_PAGES, WEB_PAGES_QUEUE_SIZE
+)
+from .types import (
+    WebPage, WebPageBytes, RequestClass, PageEntry, 
+    EnabledPageStore, DEFAULT_PAGE_STORE
+)
+from .interfaces import IPageStore
+from .tools import OutputLogger
+#--Finish imports block
+
+
+#--Start global constants block
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+#--Finish global constants block
+
+
+#--Start functional block
+class FilePageStore(IPageStore):
+    '''
+    Keeps each web-page as a raw html file in the dir of the site.
+    The validators of the page are kept in the json file next to it.
+    '''
+    #Constant block
+    #----------------------------
+    _validators_suffix: str = ".meta"
+    #----------------------------
+
+    def __init__(self, dir_path: Path):
+        self._dir_path = dir_path
+
+    def _get_filepath(self, name: str) -> Path:
+        '''Gets the path of the web-page file.'''
+        return os.path.join(self._dir_path, name)
+
+    def _get_validators_filepath(self, name: str) -> Path:
+        '''Gets the path of the file with the validators of the web-page.'''
+        return self._get_filepath(name) + self._validators_suffix
+
+    def _save_validators(self, name: str, 
+                         validators: typ.Dict[str, str]) -> typ.NoReturn:
+        '''
+        Keeps the validators next to the web-page file.
+        The old validators are removed if the new page has none.
+        '''
+        file_path = self._get_validators_filepath(name)
+        if validators:
+            with open(file_path, 'w') as file:
+                _ = json.dump(validators, file)
+        elif os.path.exists(file_path):
+            _ = os.remove(file_path)
+
+    def exists(self, name: str) -> bool:
+        '''Checks if the web-page is stored.'''
+        return os.path.exists(self._get_filepath(name))
+
+    def load(self, name: str) -> typ.Union[WebPage, None]:
+        '''Returns the stored web-page or None.'''
+        try:
+            with open(self._get_filepath(name), 'r', 
+                      encoding=WEB_PAGES_ENCODING) as file:
+                return file.read()
+        except:
+            return None
+
+    def load_bytes(self, name: str) -> typ.Union[WebPageBytes, None]:
+        '''Returns the stored web-page as undecoded bytes or None.'''
+        try:
+            with open(self._get_filepath(name), 'rb') as file:
+                return file.read()
+        except:
+            return None
+
+    def load_validators(self, name: str) -> typ.Dict[str, str]:
+        '''Returns the validator headers of the web-page.'''
+        try:
+            with open(self._get_validators_filepath(name), 'r') as file:
+                validators = json.load(file)
+        except:
+            return dict()
+        if not isinstance(validators, dict): return dict()
+        return validators
+
+    def save(self, name: str, web_page: WebPage,
+             page_class: typ.Union[RequestClass, None] = None,
+             url: typ.Union[AnyHttpUrl, None] = None,
+             validators: typ.Dict[str, str] = None) -> bool:
+        '''Stores the web-page with its validators.'''
+        try:
+            os.makedirs(self._dir_path, exist_ok=True)
+            with open(self._get_filepath(name), 'w', 
+                      encoding=WEB_PAGES_ENCODING) as file:
+                file.write(str(web_page))
+            _ = self._save_validators(name, validators)
+        except:
+            return False
+        return True
+
+    def touch(self, name: str) -> bool:
+        '''Renews the modification time of the web-page file.'''
+        try:
+            os.utime(self._get_filepath(name))
+        except OSError:
+            return False
+        return True
+
+    def flush(self, timeout: float = None) -> typ.NoReturn:
+        '''The files are written at once.'''
+        pass
+
+    def compact(self) -> typ.NoReturn:
+        '''The files are never evicted.'''
+        pass
+
+
+class CompressedPageStore(FilePageStore):
+    '''
+    Keeps the compressed bodies of the web-pages by their content hash,
+    so identical pages are stored once. The index of the pages
+    is an append-only journal shared by all processes.
+    Entries expire by the TTL of the page class, and the least
+    recently used pages are evicted above the size budget.
+    The raw html files of the old store are moved in on first read.
+    '''
+    #Constant block
+    #----------------------------
+    _index_filename: str = "index.jsonl"
+    _lock_filename: str = "index.lock"
+    _objects_dirname: str = "objects"
+    #----------------------------
+
+    def __init__(self, dir_path: Path, max_size: int = WEB_PAGES_MAX_SIZE):
+        _ = super().__init__(dir_path)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._index: typ.Dict[str, PageEntry] = dict()
+        self._index_path = os.path.join(dir_path, self._index_filename)
+        self._lock_path = os.path.join(dir_path, self._lock_filename)
+        self._objects_path = os.path.join(dir_path, self._objects_dirname)
+        self._index_offset = 0
+        self._index_inode = None
+        self._codec = "zst" if zstandard else "gz"
+
+    @contextmanager
+    def _file_lock(self, is_exclusive: bool) -> typ.Iterator[None]:
+        '''
+        Locks the index for all processes.
+        Appends share the lock, the compaction takes it exclusively.
+        '''
+        os.makedirs(self._dir_path, exist_ok=True)
+        with open(self._lock_path, 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX if is_exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _apply_record(self, record: typ.Dict[str, typ.Any]) -> typ.NoReturn:
+        '''Applies an entry, an access or a refresh record of the journal.'''
+        name = record.pop('name')
+        if 'hash' in record:
+            self._index[name] = PageEntry(**record)
+        elif name in self._index:
+            entry = self._index[name]
+            entry.accessed_at = record['accessed_at']
+            entry.stored_at = record.get('stored_at', entry.stored_at)
+
+    def _refresh(self) -> typ.NoReturn:
+        '''
+        Reads the records appended to the journal since the last read.
+        The journal rewritten by the compaction is read again.
+        '''
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._index_inode:
+            self._index, self._index_offset = dict(), 0
+            self._index_inode = stat.st_ino
+        if stat.st_size == self._index_offset: return
+
+        with open(self._index_path, 'rb') as file:
+            _ = file.seek(self._index_offset)
+            for line in file:
+                if not line.endswith(b"\n"): break
+                self._index_offset += len(line)
+                try:
+                    _ = self._apply_record(json.loads(line))
+                except:
+                    pass
+
+    def _append_records(self, records: typ.List[typ.Dict[str, typ.Any]]
+                       ) -> typ.NoReturn:
+        '''Appends the records to the journal.'''
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self._file_lock(False):
+            with open(self._index_path, 'a') as file:
+                file.write(data)
+
+    def _get_object_path(self, hash: str, codec: str) -> Path:
+        '''Gets the path of the body by its hash.'''
+        return os.path.join(self._objects_path, hash[:2], f"{hash}.{codec}")
+
+    def _compress(self, data: bytes) -> bytes:
+        '''Compresses the body with the codec of the store.'''
+        if self._codec == "zst":
+            compressor = zstandard.ZstdCompressor(
+                level=WEB_PAGES_COMPRESSION_LEVEL)
+            return compressor.compress(data)
+        return gzip.compress(data, compresslevel=WEB_PAGES_COMPRESSION_LEVEL)
+
+    def _decompress(self, data: bytes, codec: str) -> bytes:
+        '''Decompresses the body with its codec.'''
+        if codec == "zst":
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _is_expired(self, entry: PageEntry, now: float) -> bool:
+        '''Checks if the TTL of the page class is passed.'''
+        ttl = WEB_PAGES_TTL.get(entry.page_class, WEB_PAGES_DEFAULT_TTL)
+        return entry.stored_at + ttl < now
+
+    def _get_entry(self, name: str) -> typ.Union[PageEntry, None]:
+        '''Returns the fresh entry of the web-page.'''
+        with self._lock:
+            _ = self._refresh()
+            entry = self._index.get(name)
+        if entry is None or self._is_expired(entry, time.time()):
+            return None
+        return entry
+
+    def _touch(self, name: str, entry: PageEntry) -> typ.NoReturn:
+        '''Records the access to the web-page, not more often than needed.'''
+        now = time.time()
+        if entry.accessed_at + WEB_PAGES_TOUCH_INTERVAL > now: return
+        entry.accessed_at = now
+        try:
+            _ = self._append_records([{'name': name, 'accessed_at': now}])
+        except:
+            pass
+
+    def _load_legacy(self, name: str) -> typ.Union[WebPage, None]:
+        '''
+        Moves the raw html file of the web-page 
+        with its validators into the store.
+        '''
+        web_page = super().load(name)
+        if web_page is None: return None
+        validators = super().load_validators(name)
+        if self.save(name, web_page, validators=validators):
+            os.remove(self._get_filepath(name))
+            _ = super()._save_validators(name, None)
+        return web_page
+
+    def exists(self, name: str) -> bool:
+        '''Checks if the web-page is stored and is not expired.'''
+        return self._get_entry(name) is not None or super().exists(name)
+
+    def load(self, name: str) -> typ.Union[WebPage, None]:
+        '''Returns the stored web-page or None.'''
+        data = self.load_bytes(name)
+        if data is None: return None
+        return data.decode(WEB_PAGES_ENCODING)
+
+    def load_validators(self, name: str) -> typ.Dict[str, str]:
+        '''
+        Returns the validator headers of the web-page.
+        The page is not checked to be fresh, so the expired page
+        is requested with them and renewed if it is not modified.
+        '''
+        with self._lock:
+            _ = self._refresh()
+            entry = self._index.get(name)
+        if entry is None or not entry.validators: return dict()
+        return dict(entry.validators)
+
+    def load_bytes(self, name: str) -> typ.Union[WebPageBytes, None]:
+        '''Returns the decompressed web-page or None.'''
+        entry = self._get_entry(name)
+        if entry is None:
+            web_page = self._load_legacy(name)
+            if web_page is None: return None
+            return web_page.encode(WEB_PAGES_ENCODING)
+        try:
+            with open(self._get_object_path(entry.hash, entry.codec), 'rb') as file:
+                data = self._decompress(file.read(), entry.codec)
+        except:
+            return None
+        _ = self._touch(name, entry)
+        return data
+
+    def save(self, name: str, web_page: WebPage,
+             page_class: typ.Union[RequestClass, None] = None,
+             url: typ.Union[AnyHttpUrl, None] = None,
+             validators: typ.Dict[str, str] = None) -> bool:
+        '''
+        Stores the body of the web-page by its hash with its validators.
+        The body of the identical page is reused.
+        '''
+        data = str(web_page).encode(WEB_PAGES_ENCODING)
+        hash = hashlib.sha256(data).hexdigest()
+        object_path = self._get_object_path(hash, self._codec)
+        now = time.time()
+        entry = PageEntry(
+            hash=hash, codec=self._codec,
+            page_class=page_class.value if page_class else None,
+            url=url, stored_at=now, accessed_at=now,
+            validators=validators or None)
+        try:
+            if os.path.exists(object_path):
+                os.utime(object_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as file:
+                    file.write(self._compress(data))
+                os.replace(tmp_path, object_path)
+            entry.size = os.path.getsize(object_path)
+            _ = self._append_records([{'name': name, **entry.asdict()}])
+        except:
+            return False
+
+        with self._lock:
+            self._index[name] = entry
+        return True
+
+    def touch(self, name: str) -> bool:
+        '''
+        Renews the fetch time of the web-page, even of the expired one.
+        Returns False if the page or its body is not stored.
+        '''
+        with self._lock:
+            _ = self._refresh()
+            entry = self._index.get(name)
+        if entry is None or \
+           not os.path.exists(self._get_object_path(entry.hash, entry.codec)):
+            return False
+        
+        now = time.time()
+        try:
+            _ = self._append_records([
+                {'name': name, 'stored_at': now, 'accessed_at': now}])
+        except:
+            return False
+        with self._lock:
+            entry.stored_at, entry.accessed_at = now, now
+        return True
+
+    def _get_evicted(self, now: float) -> typ.Set[str]:
+        '''
+        Returns the names of the expired pages
+        and of the least recently used pages above the size budget.
+        The size of a body shared by several pages is counted once.
+        '''
+        evicted = {
+            name for name, entry in self._index.items()
+            if self._is_expired(entry, now)
+        }
+        kept = sorted(
+            ((name, entry) for name, entry in self._index.items()
+             if name not in evicted),
+            key=lambda item: item[1].accessed_at, reverse=True)
+
+        hashes, total_size = set(), 0
+        for name, entry in kept:
+            if entry.hash in hashes: continue
+            if total_size + entry.size > self._max_size:
+                evicted.add(name)
+                continue
+            hashes.add(entry.hash)
+            total_size += entry.size
+        return evicted
+
+    def _remove_orphans(self, now: float) -> int:
+        '''
+        Removes the bodies which are not referenced by the index.
+        Recent bodies are kept, their entries may be not appended yet.
+        '''
+        referenced = {
+            os.path.basename(self._get_object_path(entry.hash, entry.codec))
+            for entry in self._index.values()
+        }
+        removed = 0
+        for root, _, files in os.walk(self._objects_path):
+            for file_name in files:
+                if file_name in referenced: continue
+                file_path = os.path.join(root, file_name)
+                try:
+                    if os.path.getmtime(file_path) + WEB_PAGES_ORPHAN_GRACE > now:
+                        continue
+                    os.remove(file_path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def compact(self) -> typ.Tuple[int, int]:
+        '''
+        Evicts the expired and the excess web-pages,
+        rewrites the journal and removes the unused bodies.
+        Returns the counts of the evicted pages and the removed bodies.
+        '''
+        now = time.time()
+        with self._file_lock(True), self._lock:
+            _ = self._refresh()
+            evicted = self._get_evicted(now)
+            for name in evicted:
+                _ = self._index.pop(name)
+
+            tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as file:
+                for name, entry in self._index.items():
+                    file.write(json.dumps({'name': name, **entry.asdict()}) + "\n")
+            os.replace(tmp_path, self._index_path)
+            self._index_inode = os.stat(self._index_path).st_ino
+            self._index_offset = os.path.getsize(self._index_path)
+            removed = self._remove_orphans(now)
+        return len(evicted), removed
+
+
+class SqlitePageStore(CompressedPageStore):
+    '''
+    Keeps all web-pages of the site in one SQLite database in WAL mode.
+    The compressed bodies are stored as BLOBs with the url, the hash,
+    the fetch time and the validators, and are looked up by the primary key.
+    The saves and the access times are written in batched transactions.
+    The pages are compressed and expire as in the compressed store.
+    '''
+    #Constant block
+    #----------------------------
+    _db_filename: str = "pages.sqlite3"
+    _schema: typ.Tuple[str, ...] = (
+        """CREATE TABLE IF NOT EXISTS pages (
+            name TEXT PRIMARY KEY,
+            url TEXT,
+            hash TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            page_class TEXT,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            body BLOB NOT NULL,
+            etag TEXT,
+            last_modified TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)",
+    )
+    _validator_columns: typ.Dict[str, str] = dict({
+        "ETag": "etag",
+        "Last-Modified": "last_modified",
+    })
+    #----------------------------
+
+    def __init__(self, dir_path: Path, max_size: int = WEB_PAGES_MAX_SIZE,
+                 batch_size: int = WEB_PAGES_BATCH_SIZE,
+                 batch_interval: float = WEB_PAGES_BATCH_INTERVAL):
+        _ = super().__init__(dir_path, max_size)
+        self._db_path = os.path.join(dir_path, self._db_filename)
+        self._batch_size = batch_size
+        self._batch_interval = batch_interval
+        self._state = threading.local()
+        self._pending: typ.Dict[str, typ.Tuple[typ.Any, ...]] = dict()
+        self._touched: typ.Dict[str, float] = dict()
+        self._pending_since = 0.0
+        self._logger = OutputLogger(duplicate=True, name="page_store").logger
+        os.makedirs(dir_path, exist_ok=True)
+        self._legacy_names = set(
+            entry.name for entry in os.scandir(dir_path)
+            if entry.is_file() and entry.name.endswith(".html"))
+        _ = atexit.register(self.flush)
+
+    def _get_connection(self) -> sqlite3.Connection:
+        '''
+        Returns the connection of the thread.
+        Connections inherited from a parent process are not used.
+        '''
+        connection = getattr(self._state, 'connection', None)
+        if connection is not None and self._state.pid == os.getpid():
+            return connection
+
+        os.makedirs(self._dir_path, exist_ok=True)
+        connection = sqlite3.connect(self._db_path, timeout=30)
+        _ = connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        _ = connection.execute("PRAGMA journal_mode=WAL")
+        _ = connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self._schema:
+            _ = connection.execute(statement)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(pages)")}
+        for column in self._validator_columns.values():
+            if column not in columns:
+                _ = connection.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        connection.commit()
+        self._state.connection, self._state.pid = connection, os.getpid()
+        return connection
+
+    def _get_row(self, name: str, 
+                 with_body: bool = True) -> typ.Union[typ.Tuple[typ.Any, ...], None]:
+        '''
+        Returns the row of the fresh web-page: 
+        the page class, the fetch time, the access time, 
+        the codec and the body, if it is needed. 
+        The buffered row goes first.
+        '''
+        with self._lock:
+            row = self._pending.get(name)
+        if row is not None:
+            row = (row[4], row[5], row[6], row[3], row[7])
+        else:
+            columns = "page_class, fetched_at, accessed_at, codec"
+            if with_body:
+                columns += ", body"
+            try:
+                row = self._get_connection().execute(
+                    f"SELECT {columns} FROM pages WHERE name = ?", 
+                    (name,)).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None: return None
+        
+        entry = PageEntry(hash="", codec=row[3], page_class=row[0],
+                          stored_at=row[1], accessed_at=row[2])
+        if self._is_expired(entry, time.time()): return None
+        return row
+
+    def _load_legacy(self, name: str) -> typ.Union[WebPage, None]:
+        '''Moves the raw html file of the web-page into the store.'''
+        if name not in self._legacy_names: return None
+        web_page = super()._load_legacy(name)
+        self._legacy_names.discard(name)
+        return web_page
+
+    def exists(self, name: str) -> bool:
+        '''
+        Checks if the web-page is stored and is not expired.
+        The body is not read.
+        '''
+        return self._get_row(name, with_body=False) is not None or \
+               name in self._legacy_names
+
+    def load_validators(self, name: str) -> typ.Dict[str, str]:
+        '''
+        Returns the validator headers of the web-page.
+        The page is not checked to be fresh, so the expired page
+        is requested with them and renewed if it is not modified.
+        '''
+        with self._lock:
+            row = self._pending.get(name)
+        if row is not None:
+            values = row[8:]
+        else:
+            try:
+                values = self._get_connection().execute(
+                    "SELECT etag, last_modified FROM pages WHERE name = ?",
+                    (name,)).fetchone()
+            except sqlite3.Error:
+                return dict()
+        if values is None: return dict()
+        return {header: value 
+                for header, value in zip(self._validator_columns.keys(), values)
+                if value}
+
+    def load_bytes(self, name: str) -> typ.Union[WebPageBytes, None]:
+        '''Returns the decompressed web-page or None.'''
+        row = self._get_row(name)
+        if row is None:
+            web_page = self._load_legacy(name)
+            if web_page is None: return None
+            return web_page.encode(WEB_PAGES_ENCODING)
+            
+        _, _, accessed_at, codec, body = row
+        now = time.time()
+        if accessed_at + WEB_PAGES_TOUCH_INTERVAL <= now:
+            with self._lock:
+                self._touched[name] = now
+        try:
+            return self._decompress(body, codec)
+        except:
+            return None
+
+    def save(self, name: str, web_page: WebPage,
+             page_class: typ.Union[RequestClass, None] = None,
+             url: typ.Union[AnyHttpUrl, None] = None,
+             validators: typ.Dict[str, str] = None) -> bool:
+        '''
+        Buffers the compressed web-page with its validators.
+        The buffer is written when it is full or old enough.
+        '''
+        data = str(web_page).encode(WEB_PAGES_ENCODING)
+        now = time.time()
+        validators = validators or dict()
+        row = (name, url, hashlib.sha256(data).hexdigest(), self._codec,
+               page_class.value if page_class else None, now, now,
+               sqlite3.Binary(self._compress(data)),
+               *(validators.get(header) for header in self._validator_columns))
+        with self._lock:
+            if not self._pending:
+                self._pending_since = now
+            self._pending[name] = row
+            is_full = len(self._pending) >= self._batch_size or \
+                      now - self._pending_since >= self._batch_interval
+        if is_full:
+            return self.flush()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        '''Writes the buffered web-pages and access times in one transaction.'''
+        with self._lock:
+            pending, self._pending = self._pending, dict()
+            touched, self._touched = self._touched, dict()
+        if not pending and not touched: return True
+        
+        try:
+            connection = self._get_connection()
+            with connection:
+                _ = connection.executemany(
+                    "INSERT OR REPLACE INTO pages (name, url, hash, codec, "
+                    "page_class, fetched_at, accessed_at, body, "
+                    "etag, last_modified) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pending.values())
+                _ = connection.executemany(
+                    "UPDATE pages SET accessed_at = ? WHERE name = ?",
+                    [(accessed_at, name) for name, accessed_at in touched.items()])
+        except sqlite3.Error:
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            return False
+        return True
+
+    def touch(self, name: str) -> bool:
+        '''
+        Renews the fetch time of the web-page, even of the expired one.
+        The buffered page is renewed in the buffer, 
+        the stored one is updated at once without reading the body.
+        Returns False if the page is not stored.
+        '''
+        now = time.time()
+        with self._lock:
+            row = self._pending.get(name)
+            if row is not None:
+                self._pending[name] = (*row[:5], now, now, *row[7:])
+                return True
+        
+        try:
+            connection = self._get_connection()
+            with connection:
+                cursor = connection.execute(
+                    "UPDATE pages SET fetched_at = ?, accessed_at = ? "
+                    "WHERE name = ?", (now, now, name))
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount > 0
+
+    def _get_evicted_names(self, connection: sqlite3.Connection,
+                           now: float) -> typ.List[str]:
+        '''
+        Returns the names of the expired pages
+        and of the least recently used pages above the size budget.
+        '''
+        evicted, total_size = list(), 0
+        rows = connection.execute(
+            "SELECT name, page_class, fetched_at, length(body) FROM pages "
+            "ORDER BY accessed_at DESC")
+        for name, page_class, fetched_at, size in rows:
+            entry = PageEntry(hash="", codec="", page_class=page_class,
+                              stored_at=fetched_at)
+            if self._is_expired(entry, now) or \
+               total_size + size > self._max_size:
+                evicted.append(name)
+                continue
+            total_size += size
+        return evicted
+
+    def compact(self) -> typ.Tuple[int, int]:
+        '''
+        Evicts the expired and the excess web-pages 
+        and returns the free space of the database to the disk.
+        Returns the counts of the evicted pages and the removed bodies.
+        '''
+        _ = self.flush()
+        try:
+            connection = self._get_connection()
+            with connection:
+                evicted = self._get_evicted_names(connection, time.time())
+                cursor = connection.executemany(
+                    "DELETE FROM pages WHERE name = ?",
+                    [(name,) for name in evicted])
+                removed = max(cursor.rowcount, 0)
+        except sqlite3.Error as error:
+            self._logger.error(f"Eviction from {self._db_path} failed: {error}")
+            return 0, 0
+        
+        try:
+            # The pragma frees one page per step, so all rows are fetched.
+            _ = connection.execute("PRAGMA incremental_vacuum").fetchall()
+            _ = connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        except sqlite3.Error as error:
+            self._logger.error(f"Vacuum of {self._db_path} failed: {error}")
+        return len(evicted), removed
+
+
+class WriteBehindPageStore(IPageStore):
+    '''
+    Saves the web-pages to the wrapped store in a background thread.
+    The pages are taken from a bounded queue and written in batches,
+    so the fetching threads never wait for the disk.
+    The queued pages are served to the readers.
+    A page is not saved if the queue is full.
+    '''
+
+    def __init__(self, store: IPageStore, 
+                 queue_size: int = WEB_PAGES_QUEUE_SIZE,
+                 batch_size: int = WEB_PAGES_BATCH_SIZE):
+        self._store = store
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: typ.Dict[str, typ.Tuple[typ.Any, ...]] = dict()
+        self._queue: queue.Queue = None
+        self._pid = None
+        _ = atexit.register(self.flush)
+
+    def _get_queue(self) -> queue.Queue:
+        '''
+        Returns the queue of the writer thread of the process.
+        The writer is started once in each process.
+        '''
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue_size)
+                self._pending = dict()
+                self._pid = os.getpid()
+                writer = threading.Thread(target=self._write_pages, 
+                                          args=(self._queue,), daemon=True)
+                writer.start()
+            return self._queue
+
+    def _write_pages(self, pages: queue.Queue) -> typ.NoReturn:
+        '''Writes the queued web-pages in batches.'''
+        while True:
+            batch = [pages.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(pages.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                for name, page in batch:
+                    _ = self._store.save(name, *page)
+                _ = self._store.flush()
+            except:
+                pass
+            
+            with self._lock:
+                for name, page in batch:
+                    if self._pending.get(name) is page:
+                        _ = self._pending.pop(name)
+            for _ in batch:
+                pages.task_done()
+
+    def _get_pending(self, name: str) -> typ.Union[WebPage, None]:
+        '''Returns the queued web-page.'''
+        with self._lock:
+            page = self._pending.get(name)
+        return None if page is None else str(page[0])
+
+    def exists(self, name: str) -> bool:
+        '''Checks if the web-page is queued or stored.'''
+        return self._get_pending(name) is not None or self._store.exists(name)
+
+    def load(self, name: str) -> typ.Union[WebPage, None]:
+        '''Returns the queued or the stored web-page.'''
+        web_page = self._get_pending(name)
+        if web_page is not None: return web_page
+        return self._store.load(name)
+
+    def load_bytes(self, name: str) -> typ.Union[WebPageBytes, None]:
+        '''Returns the queued or the stored web-page as bytes.'''
+        web_page = self._get_pending(name)
+        if web_page is not None: return web_page.encode(WEB_PAGES_ENCODING)
+        return self._store.load_bytes(name)
+
+    def load_validators(self, name: str) -> typ.Dict[str, str]:
+        '''Returns the validators of the queued or the stored web-page.'''
+        with self._lock:
+            page = self._pending.get(name)
+        if page is not None: return dict(page[3] or dict())
+        return self._store.load_validators(name)
+
+    def save(self, name: str, web_page: WebPage,
+             page_class: typ.Union[RequestClass, None] = None,
+             url: typ.Union[AnyHttpUrl, None] = None,
+             validators: typ.Dict[str, str] = None) -> bool:
+        '''Queues the web-page to be saved.'''
+        pages = self._get_queue()
+        page = (web_page, page_class, url, validators)
+        try:
+            pages.put_nowait((name, page))
+        except queue.Full:
+            return False
+        with self._lock:
+            self._pending[name] = page
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        '''
+        Waits until the queued web-pages are written.
+        Returns False if the timeout is passed first.
+        '''
+        if self._pid != os.getpid(): return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def touch(self, name: str) -> bool:
+        '''The queued web-page is fresh, the stored one is renewed.'''
+        if self._get_pending(name) is not None: return True
+        return self._store.touch(name)
+
+    def compact(self) -> typ.Tuple[int, int]:
+        '''Writes the queued web-pages and compacts the store.'''
+        _ = self.flush()
+        return self._store.compact()
+
+
+PageStoresCompatibility: typ.Dict[EnabledPageStore, IPageStore] = {
+    EnabledPageStore.FILES: FilePageStore,
+    EnabledPageStore.COMPRESSED: CompressedPageStore,
+    EnabledPageStore.SQLITE: SqlitePageStore
+}
+
+
+class PageStore:
+    '''
+    Contains the web-page stores of the sites.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _stores: typ.Dict[Path, IPageStore] = dict()
+    #----------------------------
+
+    @classmethod
+    def get_store(cls, dir_path: Path) -> IPageStore:
+        '''Returns the store of the dir of the site. Created once.'''
+        with cls._lock:
+            if dir_path not in cls._stores:
+                store = PageStoresCompatibility[DEFAULT_PAGE_STORE](dir_path)
+                if USE_WRITE_BEHIND_PAGES:
+                    store = WriteBehindPageStore(store)
+                cls._stores[dir_path] = store
+            return cls._stores[dir_path]
+
+    @classmethod
+    def flush_all(cls, timeout: float = None) -> typ.NoReturn:
+        '''Writes the buffered web-pages of all stores.'''
+        with cls._lock:
+            stores = list(cls._stores.values())
+        for store in stores:
+            _ = store.flush(timeout)
+
+    @classmethod
+    def compact_all(cls) -> typ.Dict[str, typ.Any]:
+        '''
+        Compacts the stores of all sites in the dir of the web-pages.
+        Returns the results by the dir name of the site.
+        '''
+        results = dict()
+        if not os.path.isdir(WEB_PAGES_DIR): return results
+        for entry in os.scandir(WEB_PAGES_DIR):
+            if not entry.is_dir(): continue
+            store = cls.get_store(os.path.join(WEB_PAGES_DIR, entry.name))
+            results[entry.name] = store.compact()
+        return results
+
+#--Finish functional block
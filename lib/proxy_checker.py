@@ -1,11 +1,12 @@
 #--Start imports block
 #System imports
 import os
+import json
+import time
 import requests
 import multiprocessing as mp
 from pathlib import Path
 import typing as typ
-from functools import partial
 from pydantic import IPvAnyAddress, AnyUrl
 
 #Custom imports
@@ -13,9 +14,15 @@ from configs.settings import (
     LOCAL_PROXY_FILES, ONLINE_PROXY_LISTS,
     REQUEST_PROXIES_FORMAT, PROXY_LISTS_DIR,
     CORRECT_PROXIES_FILE, DOWNLOAD_PROXY_LISTS,
-    CHECK_PROXIES
+    CHECK_PROXIES, USE_ASYNC_PROXY_CHECKER, REVALIDATE_PROXIES,
+    USE_PROXY_HANDSHAKE_CHECK,
+    PROXY_CHECK_TTL, PROXY_RECHECK_LIMIT, STREAM_PROXY_LISTS,
+    PROXY_ENOUGH_COUNT, PROXY_DOWNLOAD_TIMEOUT
 )
+from .types import ProxyCheck
 from .tools import OutputLogger
+from .proxy_validator import AsyncProxyValidator
+from .proxy_pool import ProxyPool
 #--Finish imports block
 
 
@@ -32,6 +39,7 @@ class ProxyChecker:
     url_to_check: AnyUrl = None
     _module_name: str = None
     _correct_proxy_filename: Path = None
+    _checks_filename: Path = None
     #----------------------------
     
     def __init__(self, module_name: str, queue: mp.Queue=None):
@@ -40,6 +48,8 @@ class ProxyChecker:
 
         filename = f"{self._module_name}_correct_proxies"
         self._correct_proxy_filename = os.path.join(PROXY_LISTS_DIR, filename)
+        filename = f"{self._module_name}_proxy_checks.json"
+        self._checks_filename = os.path.join(PROXY_LISTS_DIR, filename)
         
         _redir_out = OutputLogger(duplicate=True, queue=self._queue, 
                                  name="proxy_chk")
@@ -61,6 +71,40 @@ class ProxyChecker:
             self._logger.success("...done.")
         self._logger.info("Downloaded.\n")
 
+    def stream_proxy_lists(self) -> typ.Iterator[AnyUrl]:
+        '''
+        Downloads the proxy lists line by line.
+        Yields the proxies as urls with the protocol 
+        and saves the downloaded lines to the local files.
+        A local file is replaced only by a list downloaded to the end.
+        '''
+        for protocol, file_name in self.local_proxy_files.items():
+            link = self.online_proxy_lists.get(file_name)
+            if not link: continue
+            self._logger.info(f"Streaming proxy list ({file_name})...")
+            
+            write_filename = os.path.join(PROXY_LISTS_DIR, file_name)
+            tmp_filename = f"{write_filename}.{os.getpid()}.tmp"
+            is_complete = False
+            try:
+                with requests.get(link, stream=True, 
+                                  timeout=PROXY_DOWNLOAD_TIMEOUT) as response, \
+                     open(tmp_filename, 'w') as file:
+                    _ = response.raise_for_status()
+                    for line in response.iter_lines():
+                        proxy = line.decode(errors='ignore').strip()
+                        if not proxy: continue
+                        file.write(proxy + "\n")
+                        yield f"{protocol}://{proxy}"
+                is_complete = True
+            except requests.RequestException:
+                self._logger.error(f"...error. ({file_name})")
+            finally:
+                if is_complete:
+                    os.replace(tmp_filename, write_filename)
+                elif os.path.exists(tmp_filename):
+                    os.remove(tmp_filename)
+
     def handler(self, proxy: IPvAnyAddress, 
                 protocol: str)  -> typ.Union[AnyUrl, None]:
         '''
@@ -86,21 +130,59 @@ class ProxyChecker:
             
         return
 
+    def _check_proxy_url(self, proxy_url: AnyUrl) -> typ.Union[AnyUrl, None]:
+        '''Checks the proxy given as an url with the protocol.'''
+        protocol, _, proxy = proxy_url.partition("://")
+        return self.handler(proxy, protocol)
+
+    def check_proxies(self, proxies: typ.List[AnyUrl]) -> typ.List[AnyUrl]:
+        '''
+        Checks the proxies given as urls with the protocol.
+        The proxies are checked concurrently in one process 
+        if the async checker is enabled, otherwise in a multi-flow.
+        Only the survivors of the handshake are fully checked.
+        '''
+        if not proxies: return list()
+        validator = AsyncProxyValidator(self._logger)
+        if USE_ASYNC_PROXY_CHECKER:
+            return validator.validate(proxies, self.url_to_check)
+        
+        if USE_PROXY_HANDSHAKE_CHECK:
+            proxies = validator.filter_alive(proxies, self.url_to_check)
+        with mp.Pool(mp.cpu_count()) as process:
+            data = process.map(self._check_proxy_url, proxies)
+        return [proxy for proxy in data if proxy is not None]
+
+    def read_proxy_list(self, file: Path, protocol: str) -> typ.List[AnyUrl]:
+        '''
+        Reads the file of the proxy list.
+        Returns the proxies as urls with the protocol.
+        '''
+        try:
+            with open(file) as file:
+                proxy_list = ''.join(file.readlines()).strip().split("\n")
+        except:
+            self._logger.error(f"Proxy list is not readable. ({file})")
+            return list()
+        return [
+            f"{protocol}://{proxy.strip()}" for proxy in proxy_list if proxy.strip()
+        ]
+
+    def read_proxy_lists(self) -> typ.List[AnyUrl]:
+        '''Reads all local proxy lists.'''
+        proxies = list()
+        for protocol, file_name in self.local_proxy_files.items():
+            file_path = os.path.join(PROXY_LISTS_DIR, file_name)
+            proxies.extend(self.read_proxy_list(file_path, protocol))
+        return list(dict.fromkeys(proxies))
+
     def check_proxy_list(self, file: Path, protocol: str
                         ) -> typ.List[typ.Union[AnyUrl, None]]:
         '''
         Reads the files of the proxy lists 
-        and checks the proxies in a multi-flow.
+        and checks the proxies.
         '''
-        data = None
-        
-        with open(file) as file:
-            proxy_list = ''.join(file.readlines()).strip().split("\n")
-        
-        with mp.Pool(mp.cpu_count()) as process:
-            data = process.map(partial(self.handler, protocol=protocol), proxy_list)
-    
-        return data
+        return self.check_proxies(self.read_proxy_list(file, protocol))
 
     def write_correct_proxies(self, correct_proxies: typ.List[AnyUrl]) -> typ.NoReturn:
         '''
@@ -108,13 +190,16 @@ class ProxyChecker:
         '''
         self._logger.info("Writing correct proxy list...")
 
+        tmp_filename = f"{self._correct_proxy_filename}.{os.getpid()}.tmp"
         try:
-            with open(self._correct_proxy_filename, 'w') as file:
+            with open(tmp_filename, 'w') as file:
                 file.write('\n'.join(correct_proxies))
+            os.replace(tmp_filename, self._correct_proxy_filename)
             self._logger.success("...writed.\n")
         except:
             self._logger.error("...error.\n")
             
+        _ = ProxyPool.get_pool(self._module_name).set_proxies(correct_proxies)
         return
 
     def load_correct_proxies(self, file_name: Path=CORRECT_PROXIES_FILE) -> typ.List[AnyUrl]:
@@ -133,35 +218,304 @@ class ProxyChecker:
             
         return proxy_list
 
+    def load_proxy_checks(self) -> typ.Dict[AnyUrl, ProxyCheck]:
+        '''
+        Loads the last check verdicts of the proxies.
+        Without saved verdicts, the proxies of the correct list 
+        are considered valid at the time of its last change.
+        '''
+        try:
+            with open(self._checks_filename) as file:
+                return {
+                    proxy: ProxyCheck(**check) 
+                    for proxy, check in json.load(file).items()
+                }
+        except:
+            pass
+
+        if not os.path.exists(self._correct_proxy_filename): return dict()
+        checked_at = os.path.getmtime(self._correct_proxy_filename)
+        return {
+            proxy: ProxyCheck(checked_at, True)
+            for proxy in self.load_correct_proxies() if proxy
+        }
+
+    def save_proxy_checks(self, checks: typ.Dict[AnyUrl, ProxyCheck]
+                         ) -> typ.NoReturn:
+        '''Saves the last check verdicts of the proxies.'''
+        tmp_path = f"{self._checks_filename}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({
+                    proxy: check.asdict() for proxy, check in checks.items()
+                }, file)
+            os.replace(tmp_path, self._checks_filename)
+        except:
+            self._logger.error("Proxy checks are not saved.")
+
+    def update_proxy_checks(self, checks: typ.Dict[AnyUrl, ProxyCheck],
+                            checked: typ.List[AnyUrl],
+                            valid: typ.List[AnyUrl]) -> typ.List[AnyUrl]:
+        '''
+        Stores the verdicts of the checked proxies.
+        Returns the proxies with a valid last verdict.
+        '''
+        now = time.time()
+        valid = set(valid)
+        for proxy in checked:
+            checks[proxy] = ProxyCheck(now, proxy in valid)
+        return [proxy for proxy, check in checks.items() if check.is_valid]
+
+    def get_stale_proxies(self, proxies: typ.List[AnyUrl],
+                          checks: typ.Dict[AnyUrl, ProxyCheck]
+                         ) -> typ.List[AnyUrl]:
+        '''
+        Returns the proxies to revalidate: never checked, 
+        checked longer than the TTL ago or previously failing.
+        Stale valid proxies go first, then the new ones, 
+        then the failing ones, the oldest checks first. 
+        Capped per run.
+        '''
+        expires = time.time() - PROXY_CHECK_TTL
+        stale = [
+            proxy for proxy in proxies
+            if proxy not in checks
+            or checks[proxy].checked_at < expires
+            or not checks[proxy].is_valid
+        ]
+
+        def get_order(proxy: AnyUrl) -> typ.Tuple[int, float]:
+            if proxy not in checks: return (1, 0.0)
+            check = checks[proxy]
+            return (0 if check.is_valid else 2, check.checked_at)
+        
+        stale.sort(key=get_order)
+        return stale[:PROXY_RECHECK_LIMIT]
+
     def get_proxy_list(self) -> typ.List[AnyUrl]:
         '''
         Gets a validated list of proxy.
         '''
-        proxy_files = self.local_proxy_files
-        correct_proxies = list()
-        
         self._logger.info("Checking the proxy list...")
         
-        for protocol, file_name in proxy_files.items():
-            file_path = os.path.join(PROXY_LISTS_DIR, file_name)
-            data = self.check_proxy_list(file_path, protocol)
-            data = list(filter(lambda x: x is not None, data))
-            
-            correct_proxies.extend(data)
+        proxies = self.read_proxy_lists()
+        correct_proxies = self.check_proxies(proxies)
             
         self._logger.success("...checked.\n")
         
+        checks = dict()
+        _ = self.update_proxy_checks(checks, proxies, correct_proxies)
+        _ = self.save_proxy_checks(checks)
         _ = self.write_correct_proxies(correct_proxies)
         return correct_proxies
 
+    def get_known_proxy_checks(self) -> typ.Tuple[typ.Dict[AnyUrl, ProxyCheck],
+                                                  typ.List[AnyUrl]]:
+        '''
+        Returns the verdicts of the known proxies and the known proxies:
+        the proxies of the local lists and the previously valid ones.
+        '''
+        checks = self.load_proxy_checks()
+        valid_proxies = [
+            proxy for proxy, check in checks.items() if check.is_valid
+        ]
+        proxies = list(dict.fromkeys(self.read_proxy_lists() + valid_proxies))
+        known_proxies = set(proxies)
+        checks = {
+            proxy: check for proxy, check in checks.items() 
+            if proxy in known_proxies
+        }
+        return checks, proxies
+
+    def get_proxies_to_check(self) -> typ.List[AnyUrl]:
+        '''
+        Returns all known proxies for a full check, 
+        the stale ones for a revalidation, otherwise nothing.
+        '''
+        if not CHECK_PROXIES and not REVALIDATE_PROXIES: return list()
+        checks, proxies = self.get_known_proxy_checks()
+        if CHECK_PROXIES: return proxies
+        return self.get_stale_proxies(proxies, checks)
+
+    def merge_proxy_checks(self, checked: typ.List[AnyUrl],
+                           valid: typ.List[AnyUrl]) -> typ.List[AnyUrl]:
+        '''
+        Merges the verdicts of the checked proxies 
+        into the saved verdicts and updates the validated list of proxy.
+        '''
+        checks, _ = self.get_known_proxy_checks()
+        correct_proxies = self.update_proxy_checks(checks, checked, valid)
+        _ = self.save_proxy_checks(checks)
+        _ = self.write_correct_proxies(correct_proxies)
+        return correct_proxies
+
+    def revalidate_proxy_list(self) -> typ.List[AnyUrl]:
+        '''
+        Revalidates only the stale and failing proxies 
+        and updates the validated list of proxy.
+        '''
+        checks, proxies = self.get_known_proxy_checks()
+        stale_proxies = self.get_stale_proxies(proxies, checks)
+        
+        self._logger.info(f"Revalidating {len(stale_proxies)} " + 
+                          f"of {len(proxies)} proxies...")
+        if not stale_proxies:
+            self._logger.info("...proxies are fresh.\n")
+            return self.load_correct_proxies()
+            
+        valid_proxies = self.check_proxies(stale_proxies)
+        self._logger.success("...revalidated.\n")
+
+        correct_proxies = self.update_proxy_checks(checks, stale_proxies, 
+                                                   valid_proxies)
+        _ = self.save_proxy_checks(checks)
+        _ = self.write_correct_proxies(correct_proxies)
+        return correct_proxies
+
+    def stream_proxy_list(self) -> typ.List[AnyUrl]:
+        '''
+        Downloads, dedupes and checks the proxies as a stream.
+        The valid proxies are written to a new list, which replaces 
+        the correct proxy list when the first proxy passes,
+        and are appended as soon as they pass. 
+        Stops after enough valid proxies.
+        The verdicts are merged into the saved ones.
+        '''
+        self._logger.info("Streaming and checking the proxy lists...")
+        
+        validator = AsyncProxyValidator(self._logger)
+        proxies = self.stream_proxy_lists()
+        tmp_filename = f"{self._correct_proxy_filename}.{os.getpid()}.tmp"
+        is_replaced = False
+        try:
+            with open(tmp_filename, 'w') as file:
+                def append_proxy(proxy: AnyUrl) -> typ.NoReturn:
+                    nonlocal is_replaced
+                    file.write(proxy + "\n")
+                    file.flush()
+                    if not is_replaced:
+                        os.replace(tmp_filename, self._correct_proxy_filename)
+                        is_replaced = True
+                    
+                checked, correct_proxies = validator.validate_stream(
+                    proxies, self.url_to_check, append_proxy, 
+                    PROXY_ENOUGH_COUNT)
+        finally:
+            proxies.close()
+            if not is_replaced and os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            
+        if not checked:
+            self._logger.error("...no proxies are checked. " + 
+                               "The correct proxy list is kept.\n")
+            return self.load_correct_proxies()
+        self._logger.success("...checked.\n")
+        return self.merge_proxy_checks(checked, correct_proxies)
+
     def prepare_proxy_lists(self, url_general: AnyUrl) -> typ.NoReturn:
         '''
         Prepairs proxy lists for work.
         '''
         self.url_to_check = url_general
+        if DOWNLOAD_PROXY_LISTS and CHECK_PROXIES and \
+           STREAM_PROXY_LISTS and USE_ASYNC_PROXY_CHECKER:
+            _ = self.stream_proxy_list()
+            return
+            
         if DOWNLOAD_PROXY_LISTS:
             _ = self.donload_proxy_lists()
         if CHECK_PROXIES:
             _ = self.get_proxy_list()
+        elif REVALIDATE_PROXIES:
+            _ = self.revalidate_proxy_list()
+
+
+class MultiProxyChecker:
+    '''
+    Checks the proxies against the sites of several modules in one pass.
+    Each proxy is handshaked once and checked against every site.
+    The verdicts and the proxy lists are kept by module.
+    '''
+
+    def __init__(self, urls: typ.Dict[str, AnyUrl], queue: mp.Queue=None):
+        self._urls = urls
+        self._checkers: typ.Dict[str, ProxyChecker] = dict()
+        for module_name, url in urls.items():
+            prx_chk = ProxyChecker(module_name, queue)
+            prx_chk.url_to_check = url
+            self._checkers[module_name] = prx_chk
+
+        _redir_out = OutputLogger(duplicate=True, queue=queue, 
+                                 name="proxy_chk")
+        self._logger = _redir_out.logger
+
+    def donload_proxy_lists(self) -> typ.NoReturn:
+        '''Downloads the proxy lists once for all modules.'''
+        if not self._checkers: return
+        _ = next(iter(self._checkers.values())).donload_proxy_lists()
+
+    def get_proxies_to_check(self) -> typ.List[AnyUrl]:
+        '''Returns the proxies to check of all modules.'''
+        proxies = list()
+        for prx_chk in self._checkers.values():
+            proxies.extend(prx_chk.get_proxies_to_check())
+        return list(dict.fromkeys(proxies))
+
+    def check_proxies(self, proxies: typ.List[AnyUrl]
+                     ) -> typ.Dict[str, typ.List[AnyUrl]]:
+        '''
+        Checks the proxies against the sites of all modules.
+        Returns the valid proxies by module.
+        Without the async checker the modules are checked one by one.
+        '''
+        if not proxies: 
+            return {module_name: list() for module_name in self._urls}
+        if USE_ASYNC_PROXY_CHECKER:
+            validator = AsyncProxyValidator(self._logger)
+            return validator.validate_targets(proxies, self._urls)
+        return {
+            module_name: prx_chk.check_proxies(proxies)
+            for module_name, prx_chk in self._checkers.items()
+        }
+
+    def merge_proxy_checks(self, checked: typ.List[AnyUrl],
+                           valid: typ.Dict[str, typ.List[AnyUrl]]
+                          ) -> typ.Dict[str, typ.List[AnyUrl]]:
+        '''
+        Merges the verdicts of the checked proxies of all modules.
+        Returns the validated lists of proxy by module.
+        '''
+        return {
+            module_name: prx_chk.merge_proxy_checks(
+                checked, valid.get(module_name, list()))
+            for module_name, prx_chk in self._checkers.items()
+        }
+
+    def prepare_proxy_lists(self) -> typ.NoReturn:
+        '''
+        Prepairs proxy lists of all modules for work.
+        The streamed proxy lists are prepaired by module.
+        '''
+        if DOWNLOAD_PROXY_LISTS and CHECK_PROXIES and \
+           STREAM_PROXY_LISTS and USE_ASYNC_PROXY_CHECKER:
+            for module_name, prx_chk in self._checkers.items():
+                _ = prx_chk.prepare_proxy_lists(self._urls[module_name])
+            return
+            
+        if DOWNLOAD_PROXY_LISTS:
+            _ = self.donload_proxy_lists()
+        
+        proxies = self.get_proxies_to_check()
+        if not proxies:
+            self._logger.info("Proxies are fresh.\n")
+            return
+            
+        valid_proxies = self.check_proxies(proxies)
+        correct_proxies = self.merge_proxy_checks(proxies, valid_proxies)
+        for module_name, valid in valid_proxies.items():
+            self._logger.info(f"{module_name}: {len(valid)} of " +
+                              f"{len(proxies)} checked proxies are valid, " +
+                              f"{len(correct_proxies[module_name])} " +
+                              "in the list.")
 
-#--Finish functional block
\ No newline at end of file
+#--Finish functional block
@@ -0,0 +1,264 @@
+#--Start imports block
+#System imports
+import redis
+import itertools
+import threading
+import typing as typ
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import (
+    USE_REDIS_PROXY_POOL, PROXY_POOL_REDIS_URL, PROXY_POOL_KEY_PREFIX,
+    PROXY_LEASE_LIMIT, PROXY_LEASE_TTL, PROXY_QUARANTINE_THRESHOLD,
+    PROXY_QUARANTINE_BASE, PROXY_QUARANTINE_MAX
+)
+from .tools import get_redis_client
+#--Finish imports block
+
+
+#--Start global constants block
+Lease = typ.Tuple[AnyUrl, str]
+
+# Reaps the expired leases and leases the least used candidate
+# which is not quarantined and is used less than the limit.
+# Returns the proxy and the lease id, or nil.
+_REDIS_LEASE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local ttl = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, lease in ipairs(expired) do
+    local proxy = redis.call('HGET', KEYS[3], lease)
+    if proxy then
+        redis.call('ZINCRBY', KEYS[1], -1, proxy)
+    end
+    redis.call('HDEL', KEYS[3], lease)
+    redis.call('ZREM', KEYS[2], lease)
+end
+
+local selected = nil
+local selected_use = limit
+for i = 3, #ARGV do
+    local proxy = ARGV[i]
+    local quarantine = tonumber(redis.call('ZSCORE', KEYS[4], proxy) or 0)
+    local in_use = tonumber(redis.call('ZSCORE', KEYS[1], proxy) or 0)
+    if quarantine <= now and in_use < selected_use then
+        selected = proxy
+        selected_use = in_use
+        if in_use == 0 then break end
+    end
+end
+if not selected then return nil end
+
+local lease = tostring(redis.call('INCR', KEYS[5]))
+redis.call('ZINCRBY', KEYS[1], 1, selected)
+redis.call('ZADD', KEYS[2], now + ttl, lease)
+redis.call('HSET', KEYS[3], lease, selected)
+return {selected, lease}
+"""
+
+# Returns the leased proxy to the pool.
+_REDIS_RELEASE_SCRIPT = """
+local proxy = redis.call('HGET', KEYS[3], ARGV[1])
+if not proxy then return 0 end
+redis.call('ZINCRBY', KEYS[1], -1, proxy)
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Updates the failures of the proxy and quarantines it
+# with an exponential backoff after the threshold.
+_REDIS_REPORT_SCRIPT = """
+local proxy = ARGV[1]
+if ARGV[2] == '1' then
+    redis.call('HDEL', KEYS[1], proxy)
+    redis.call('ZREM', KEYS[2], proxy)
+    return 0
+end
+
+local failures = redis.call('HINCRBY', KEYS[1], proxy, 1)
+local threshold = tonumber(ARGV[3])
+if failures >= threshold then
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1])
+    local duration = math.min(tonumber(ARGV[5]),
+        tonumber(ARGV[4]) * 2 ^ (failures - threshold))
+    redis.call('ZADD', KEYS[2], now + duration, proxy)
+end
+return failures
+"""
+#--Finish global constants block
+
+
+#--Start functional block
+class LocalProxyPool:
+    '''
+    In-process pool of the proxies of a module.
+    Leases the least used proxy, limiting the concurrent use.
+    The health of the proxies is kept by the proxy registry.
+    '''
+
+    def __init__(self, limit: int = PROXY_LEASE_LIMIT):
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._in_use: typ.Dict[AnyUrl, int] = dict()
+        self._leases: typ.Dict[str, AnyUrl] = dict()
+        self._counter = itertools.count()
+
+    def get_proxies(self) -> typ.Union[typ.List[AnyUrl], None]:
+        '''Returns the shared proxies. None if they are not shared.'''
+        return None
+
+    def set_proxies(self, proxies: typ.List[AnyUrl]) -> bool:
+        '''Replaces the shared proxies. False if they are not shared.'''
+        return False
+
+    def lease(self, candidates: typ.List[AnyUrl]) -> typ.Union[Lease, None]:
+        '''
+        Leases the least used of the candidates.
+        Ties go to the first candidate.
+        Returns None if all candidates are used up to the limit.
+        '''
+        with self._lock:
+            selected = None
+            selected_use = self._limit
+            for proxy in candidates:
+                in_use = self._in_use.get(proxy, 0)
+                if in_use < selected_use:
+                    selected, selected_use = proxy, in_use
+                    if not in_use: break
+            if selected is None: return None
+
+            lease_id = f"local:{next(self._counter)}"
+            self._in_use[selected] = selected_use + 1
+            self._leases[lease_id] = selected
+            return selected, lease_id
+
+    def release(self, lease_id: str) -> typ.NoReturn:
+        '''Returns the leased proxy to the pool.'''
+        with self._lock:
+            proxy = self._leases.pop(lease_id, None)
+            if proxy is None: return
+            self._in_use[proxy] = max(0, self._in_use.get(proxy, 1) - 1)
+
+    def report(self, proxy: AnyUrl, is_success: bool) -> typ.NoReturn:
+        '''Updates the shared health of the proxy.'''
+        pass
+
+
+class RedisProxyPool(LocalProxyPool):
+    '''
+    Pool of the proxies of a module stored in Redis.
+    Leases, returns and health updates are atomic scripts,
+    so the load is spread across all healthy proxies
+    in all processes and Celery workers.
+    Leases expire if the holder dies.
+    Falls back to the in-process pool if Redis is unavailable.
+    '''
+
+    def __init__(self, module_name: str, client: redis.Redis,
+                 limit: int = PROXY_LEASE_LIMIT):
+        _ = super().__init__(limit)
+        self._client = client
+        prefix = f"{PROXY_POOL_KEY_PREFIX}:{module_name}"
+        self._proxies_key = f"{prefix}:proxies"
+        self._lease_keys = [
+            f"{prefix}:in_use", f"{prefix}:leases",
+            f"{prefix}:lease_proxies", f"{prefix}:quarantine",
+            f"{prefix}:lease_counter"
+        ]
+        self._health_keys = [f"{prefix}:failures", f"{prefix}:quarantine"]
+        self._lease_script = client.register_script(_REDIS_LEASE_SCRIPT)
+        self._release_script = client.register_script(_REDIS_RELEASE_SCRIPT)
+        self._report_script = client.register_script(_REDIS_REPORT_SCRIPT)
+
+    def get_proxies(self) -> typ.Union[typ.List[AnyUrl], None]:
+        '''Returns the shared proxies. None if they are not shared.'''
+        try:
+            proxies = self._client.smembers(self._proxies_key)
+        except redis.RedisError:
+            return None
+        return sorted(proxy.decode() for proxy in proxies) or None
+
+    def set_proxies(self, proxies: typ.List[AnyUrl]) -> bool:
+        '''Replaces the shared proxies. False if they are not shared.'''
+        try:
+            pipe = self._client.pipeline()
+            pipe.delete(self._proxies_key)
+            if proxies:
+                pipe.sadd(self._proxies_key, *proxies)
+            _ = pipe.execute()
+        except redis.RedisError:
+            return False
+        return True
+
+    def lease(self, candidates: typ.List[AnyUrl]) -> typ.Union[Lease, None]:
+        '''
+        Leases the least used of the candidates in all workers.
+        Ties go to the first candidate.
+        Returns None if all candidates are used up to the limit.
+        '''
+        if not candidates: return None
+        try:
+            result = self._lease_script(
+                keys=self._lease_keys,
+                args=[PROXY_LEASE_TTL, self._limit, *candidates])
+        except redis.RedisError:
+            return super().lease(candidates)
+        if not result: return None
+        return result[0].decode(), result[1].decode()
+
+    def release(self, lease_id: str) -> typ.NoReturn:
+        '''Returns the leased proxy to the pool.'''
+        try:
+            _ = self._release_script(keys=self._lease_keys, args=[lease_id])
+        except redis.RedisError:
+            pass
+        _ = super().release(lease_id)
+
+    def report(self, proxy: AnyUrl, is_success: bool) -> typ.NoReturn:
+        '''Updates the shared health of the proxy.'''
+        try:
+            _ = self._report_script(
+                keys=self._health_keys,
+                args=[proxy, int(is_success), PROXY_QUARANTINE_THRESHOLD,
+                      PROXY_QUARANTINE_BASE, PROXY_QUARANTINE_MAX])
+        except redis.RedisError:
+            pass
+
+
+class ProxyPool:
+    '''
+    Contains the proxy pools of the modules.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _pools: typ.Dict[str, LocalProxyPool] = dict()
+    #----------------------------
+
+    @classmethod
+    def get_pool(cls, module_name: str) -> LocalProxyPool:
+        '''
+        Returns the shared pool of the module.
+        The pool is stored in Redis if it is enabled and available.
+        '''
+        with cls._lock:
+            if module_name in cls._pools:
+                return cls._pools[module_name]
+
+            client = None
+            if USE_REDIS_PROXY_POOL:
+                client = get_redis_client(PROXY_POOL_REDIS_URL)
+            if client is not None:
+                pool = RedisProxyPool(module_name, client)
+            else:
+                pool = LocalProxyPool()
+
+            cls._pools[module_name] = pool
+            return pool
+
+#--Finish functional block
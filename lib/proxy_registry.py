@@ -0,0 +1,192 @@
+#--Start imports block
+#System imports
+import os
+import json
+import time
+import threading
+import typing as typ
+from pathlib import Path
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import (
+    PROXY_LISTS_DIR, PROXY_HEALTH_EWMA_ALPHA, PROXY_HEALTH_DEFAULT_LATENCY,
+    PROXY_QUARANTINE_THRESHOLD, PROXY_QUARANTINE_BASE, PROXY_QUARANTINE_MAX,
+    PROXY_HEALTH_SAVE_INTERVAL
+)
+from .types import ProxyHealth
+#--Finish imports block
+
+
+#--Start global constants block
+DomainHealth = typ.Dict[AnyUrl, ProxyHealth]
+#--Finish global constants block
+
+
+#--Start functional block
+class ProxyRegistry:
+    '''
+    Keeps the health of proxies per target domain:
+    success rate, EWMA latency and last failure.
+    Orders proxies by score and quarantines failing ones
+    with an exponential backoff. Persists between runs.
+    '''
+    #Constant block
+    #----------------------------
+    _registries: typ.Dict[str, 'ProxyRegistry'] = dict()
+    _registries_lock: threading.Lock = threading.Lock()
+    #----------------------------
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._lock = threading.RLock()
+        self._health: typ.Dict[str, DomainHealth] = dict()
+        self._last_save = time.monotonic()
+
+        filename = f"{self._module_name}_proxy_health.json"
+        self._file_path = os.path.join(PROXY_LISTS_DIR, filename)
+        _ = self.load()
+
+    @classmethod
+    def get_registry(cls, module_name: str) -> 'ProxyRegistry':
+        '''Returns the shared registry of the module.'''
+        with cls._registries_lock:
+            if module_name not in cls._registries:
+                cls._registries[module_name] = cls(module_name)
+            return cls._registries[module_name]
+
+    @classmethod
+    def save_all(cls) -> typ.NoReturn:
+        '''Saves all loaded registries.'''
+        with cls._registries_lock:
+            registries = list(cls._registries.values())
+        for registry in registries:
+            _ = registry.save()
+
+    @property
+    def file_path(self) -> typ.Union[str, Path]:
+        '''The path of the health file.'''
+        return self._file_path
+
+    def load(self) -> bool:
+        '''Loads the health data from the file.'''
+        try:
+            with open(self._file_path) as file:
+                data = json.load(file)
+        except:
+            return False
+
+        with self._lock:
+            self._health = {
+                domain: {
+                    proxy: ProxyHealth(**health)
+                    for proxy, health in proxies.items()
+                }
+                for domain, proxies in data.items()
+            }
+        return True
+
+    def save(self) -> bool:
+        '''Writes the health data to the file atomically.'''
+        with self._lock:
+            data = {
+                domain: {
+                    proxy: health.asdict()
+                    for proxy, health in proxies.items()
+                }
+                for domain, proxies in self._health.items()
+            }
+            self._last_save = time.monotonic()
+
+        tmp_path = f"{self._file_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self._file_path)
+        except:
+            return False
+        return True
+
+    def _autosave(self) -> typ.NoReturn:
+        '''Saves the data if the save interval is passed.'''
+        if time.monotonic() - self._last_save >= PROXY_HEALTH_SAVE_INTERVAL:
+            _ = self.save()
+
+    def get_health(self, domain: str, proxy: AnyUrl) -> ProxyHealth:
+        '''Returns the health of the proxy for the domain.'''
+        with self._lock:
+            domain_health = self._health.setdefault(domain, dict())
+            if proxy not in domain_health:
+                domain_health[proxy] = ProxyHealth()
+            return domain_health[proxy]
+
+    def record_success(self, domain: str, proxy: AnyUrl,
+                       latency: float) -> typ.NoReturn:
+        '''Registers a correct response through the proxy.'''
+        with self._lock:
+            health = self.get_health(domain, proxy)
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.quarantine_until = 0.0
+
+            if health.ewma_latency is None:
+                health.ewma_latency = latency
+            else:
+                health.ewma_latency = PROXY_HEALTH_EWMA_ALPHA * latency + \
+                        (1 - PROXY_HEALTH_EWMA_ALPHA) * health.ewma_latency
+        _ = self._autosave()
+
+    def record_failure(self, domain: str, proxy: AnyUrl) -> typ.NoReturn:
+        '''
+        Registers a failed request through the proxy.
+        Quarantines the proxy after several failures in a row.
+        '''
+        now = time.time()
+        with self._lock:
+            health = self.get_health(domain, proxy)
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_failure = now
+
+            excess = health.consecutive_failures - PROXY_QUARANTINE_THRESHOLD
+            if excess >= 0:
+                backoff = min(PROXY_QUARANTINE_BASE * 2 ** excess,
+                              PROXY_QUARANTINE_MAX)
+                health.quarantine_until = now + backoff
+        _ = self._autosave()
+
+    def is_quarantined(self, domain: str, proxy: AnyUrl) -> bool:
+        '''Checks if the proxy is in quarantine for the domain.'''
+        return self.get_health(domain, proxy).quarantine_until > time.time()
+
+    def get_score(self, domain: str, proxy: AnyUrl) -> float:
+        '''
+        Returns the score of the proxy: the smoothed success rate
+        divided by the EWMA latency. The higher the better.
+        '''
+        health = self.get_health(domain, proxy)
+        success_rate = (health.successes + 1) / \
+                       (health.successes + health.failures + 2)
+        latency = health.ewma_latency or PROXY_HEALTH_DEFAULT_LATENCY
+        return success_rate / max(latency, 0.001)
+
+    def order_proxies(self, domain: str,
+                      proxies: typ.List[AnyUrl]) -> typ.List[AnyUrl]:
+        '''
+        Returns the proxies ordered by score without quarantined ones.
+        If all proxies are quarantined, returns them ordered
+        by the end of the quarantine.
+        '''
+        with self._lock:
+            available = [
+                proxy for proxy in proxies
+                if not self.is_quarantined(domain, proxy)
+            ]
+            if available:
+                return sorted(available, reverse=True,
+                              key=lambda proxy: self.get_score(domain, proxy))
+
+            return sorted(proxies, key=lambda proxy:
+                          self.get_health(domain, proxy).quarantine_until)
+
+#--Finish functional block
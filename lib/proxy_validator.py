@@ -0,0 +1,401 @@
+#--Start imports block
+#System imports
+import ssl
+import socket
+import struct
+import asyncio
+import ipaddress
+import typing as typ
+import urllib.parse
+from logging import Logger
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import (
+    PROXY_CHECK_CONCURRENCY, PROXY_CHECK_TIMEOUT, PROXY_PROTOCOLS,
+    USE_PROXY_HANDSHAKE_CHECK, PROXY_HANDSHAKE_CONCURRENCY,
+    PROXY_HANDSHAKE_TIMEOUT
+)
+#--Finish imports block
+
+
+#--Start global constants block
+Address = typ.Tuple[str, int]
+#--Finish global constants block
+
+
+#--Start functional block
+class ProxyHandshakeError(Exception):
+    '''The proxy refused the connection to the target.'''
+
+
+class AsyncProxyValidator:
+    '''
+    Validates thousands of SOCKS proxies at once in one process.
+    Each proxy is connected with a non-blocking socket,
+    the SOCKS handshake is made by hand and the target page
+    is requested through the tunnel. The concurrency is bounded.
+    If the handshake check is enabled, the dead proxies are dropped 
+    by a cheap handshake with a tight timeout first and only 
+    the survivors request the target page.
+    '''
+    #Constant block
+    #----------------------------
+    _default_ports: typ.Dict[str, int] = dict({
+        "http": 80,
+        "https": 443
+    })
+    #----------------------------
+
+    def __init__(self, logger: Logger,
+                 concurrency: int = PROXY_CHECK_CONCURRENCY,
+                 timeout: float = PROXY_CHECK_TIMEOUT,
+                 handshake_concurrency: int = PROXY_HANDSHAKE_CONCURRENCY,
+                 handshake_timeout: float = PROXY_HANDSHAKE_TIMEOUT):
+        self._logger = logger
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._handshake_concurrency = handshake_concurrency
+        self._handshake_timeout = handshake_timeout
+        self._resolved: typ.Dict[Address, str] = dict()
+        self._ssl_context = ssl.create_default_context()
+
+    async def _resolve(self, host: str, port: int) -> str:
+        '''Resolves the IPv4 address of the host once.'''
+        if (host, port) not in self._resolved:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(host, port, family=socket.AF_INET,
+                                           type=socket.SOCK_STREAM)
+            self._resolved[(host, port)] = infos[0][4][0]
+        return self._resolved[(host, port)]
+
+    async def _recv_exactly(self, sock: socket.socket, size: int) -> bytes:
+        '''Receives exactly the size of bytes from the socket.'''
+        loop = asyncio.get_running_loop()
+        data = b""
+        while len(data) < size:
+            chunk = await loop.sock_recv(sock, size - len(data))
+            if not chunk:
+                raise ProxyHandshakeError("Connection closed")
+            data += chunk
+        return data
+
+    async def _socks4_handshake(self, sock: socket.socket,
+                                target: Address) -> typ.NoReturn:
+        '''Makes the SOCKS4 CONNECT to the resolved target.'''
+        loop = asyncio.get_running_loop()
+        target_ip = await self._resolve(*target)
+        request = struct.pack("!BBH", 4, 1, target[1]) + \
+                  socket.inet_aton(target_ip) + b"\x00"
+        await loop.sock_sendall(sock, request)
+
+        reply = await self._recv_exactly(sock, 8)
+        if reply[1] != 0x5a:
+            raise ProxyHandshakeError(f"SOCKS4 reply {reply[1]:#x}")
+
+    async def _socks5_handshake(self, sock: socket.socket,
+                                target: Address) -> typ.NoReturn:
+        '''Makes the SOCKS5 CONNECT without authentication.'''
+        loop = asyncio.get_running_loop()
+        await loop.sock_sendall(sock, b"\x05\x01\x00")
+        reply = await self._recv_exactly(sock, 2)
+        if reply != b"\x05\x00":
+            raise ProxyHandshakeError("SOCKS5 authentication required")
+
+        host = target[0].encode()
+        request = b"\x05\x01\x00\x03" + bytes([len(host)]) + host + \
+                  struct.pack("!H", target[1])
+        await loop.sock_sendall(sock, request)
+
+        reply = await self._recv_exactly(sock, 4)
+        if reply[1] != 0:
+            raise ProxyHandshakeError(f"SOCKS5 reply {reply[1]:#x}")
+        address_sizes = {1: 4, 4: 16}
+        if reply[3] == 3:
+            size = (await self._recv_exactly(sock, 1))[0]
+        else:
+            size = address_sizes.get(reply[3], 4)
+        _ = await self._recv_exactly(sock, size + 2)
+
+    async def _open_tunnel(self, proxy: AnyUrl,
+                           target: Address) -> socket.socket:
+        '''
+        Connects to the proxy and makes the SOCKS handshake.
+        Returns the socket tunneled to the target.
+        '''
+        loop = asyncio.get_running_loop()
+        parts = urllib.parse.urlsplit(proxy)
+        proxy_ip = str(ipaddress.ip_address(parts.hostname))
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, (proxy_ip, parts.port))
+            if parts.scheme == PROXY_PROTOCOLS["socks4"]:
+                await self._socks4_handshake(sock, target)
+            else:
+                await self._socks5_handshake(sock, target)
+        except:
+            sock.close()
+            raise
+        return sock
+
+    async def _get_status(self, sock: socket.socket,
+                          url: AnyUrl) -> int:
+        '''
+        Requests the url through the tunnel.
+        Returns the status code of the response.
+        '''
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query: path += "?" + parts.query
+
+        ssl_context = self._ssl_context if parts.scheme == "https" else None
+        reader, writer = await asyncio.open_connection(
+            sock=sock, ssl=ssl_context,
+            server_hostname=parts.hostname if ssl_context else None)
+        try:
+            writer.write((f"GET {path} HTTP/1.1\r\n"
+                          f"Host: {parts.hostname}\r\n"
+                          "User-Agent: Mozilla/5.0\r\n"
+                          "Accept: */*\r\n"
+                          "Connection: close\r\n\r\n").encode())
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        return int(status_line.split()[1])
+
+    def _get_target(self, url: AnyUrl) -> Address:
+        '''Returns the host and the port of the url.'''
+        parts = urllib.parse.urlsplit(url)
+        return (parts.hostname,
+                parts.port or self._default_ports.get(parts.scheme, 80))
+
+    async def _check_proxy(self, proxy: AnyUrl, url: AnyUrl) -> bool:
+        '''Checks if the proxy returns a correct response of the url.'''
+        sock = await self._open_tunnel(proxy, self._get_target(url))
+        try:
+            status_code = await self._get_status(sock, url)
+        except:
+            sock.close()
+            raise
+        return status_code == 200
+
+    async def _check_with_timeout(self, proxy: AnyUrl, url: AnyUrl) -> bool:
+        '''Checks the proxy within the timeout.'''
+        try:
+            is_valid = await asyncio.wait_for(
+                self._check_proxy(proxy, url), self._timeout)
+        except Exception:
+            return False
+
+        if is_valid:
+            self._logger.info(f"Valid proxy: {proxy}")
+        return is_valid
+
+    async def _check_bounded(self, semaphore: asyncio.Semaphore,
+                             proxy: AnyUrl, url: AnyUrl
+                            ) -> typ.Union[AnyUrl, None]:
+        '''Checks the proxy within the concurrency and the timeout.'''
+        async with semaphore:
+            is_valid = await self._check_with_timeout(proxy, url)
+        return proxy if is_valid else None
+
+    async def _check_handshake(self, proxy: AnyUrl, 
+                               target: Address) -> bool:
+        '''
+        Checks if the proxy accepts the connection to the target
+        within the handshake timeout. The tunnel is closed at once.
+        '''
+        try:
+            sock = await asyncio.wait_for(
+                self._open_tunnel(proxy, target), self._handshake_timeout)
+        except Exception:
+            return False
+        sock.close()
+        return True
+
+    async def _handshake_bounded(self, semaphore: asyncio.Semaphore,
+                                 proxy: AnyUrl, target: Address
+                                ) -> typ.Union[AnyUrl, None]:
+        '''Checks the handshake of the proxy within the concurrency.'''
+        async with semaphore:
+            is_alive = await self._check_handshake(proxy, target)
+        return proxy if is_alive else None
+
+    async def _filter_alive(self, proxies: typ.List[AnyUrl],
+                            url: AnyUrl) -> typ.List[AnyUrl]:
+        '''Returns the proxies which pass the handshake.'''
+        target = self._get_target(url)
+        semaphore = asyncio.Semaphore(self._handshake_concurrency)
+        results = await asyncio.gather(*[
+            self._handshake_bounded(semaphore, proxy, target) 
+            for proxy in proxies
+        ])
+        return [proxy for proxy in results if proxy]
+
+    def filter_alive(self, proxies: typ.List[AnyUrl],
+                     url: AnyUrl) -> typ.List[AnyUrl]:
+        '''
+        Returns the proxies which make the SOCKS handshake 
+        to the host of the url within the handshake timeout.
+        '''
+        proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        self._logger.info(f"Handshaking {len(proxies)} proxies " +
+                          f"(concurrency {self._handshake_concurrency})...")
+        alive_proxies = asyncio.run(self._filter_alive(proxies, url))
+        self._logger.success(f"...alive proxies: {len(alive_proxies)}.")
+        return alive_proxies
+
+    async def _validate(self, proxies: typ.List[AnyUrl],
+                        url: AnyUrl) -> typ.List[AnyUrl]:
+        '''
+        Checks all proxies concurrently.
+        Only the survivors of the handshake are fully checked.
+        '''
+        if USE_PROXY_HANDSHAKE_CHECK:
+            proxies = await self._filter_alive(proxies, url)
+            self._logger.info(f"...{len(proxies)} proxies passed " +
+                              "the handshake.")
+            
+        semaphore = asyncio.Semaphore(self._concurrency)
+        results = await asyncio.gather(*[
+            self._check_bounded(semaphore, proxy, url) for proxy in proxies
+        ])
+        return [proxy for proxy in results if proxy]
+
+    def validate(self, proxies: typ.List[AnyUrl],
+                 url: AnyUrl) -> typ.List[AnyUrl]:
+        '''
+        Returns the proxies which return a correct response of the url.
+        The proxies are urls like "socks5://1.2.3.4:1080".
+        '''
+        proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        self._logger.info(f"Checking {len(proxies)} proxies " +
+                          f"(concurrency {self._concurrency})...")
+        valid_proxies = asyncio.run(self._validate(proxies, url))
+        self._logger.success(f"...valid proxies: {len(valid_proxies)}.")
+        return valid_proxies
+
+    async def _check_targets(self, semaphore: asyncio.Semaphore,
+                             proxy: AnyUrl, urls: typ.Dict[str, AnyUrl]
+                            ) -> typ.Dict[str, bool]:
+        '''Checks the proxy against all sites within the concurrency.'''
+        async with semaphore:
+            results = await asyncio.gather(*[
+                self._check_with_timeout(proxy, url) for url in urls.values()
+            ])
+        return dict(zip(urls.keys(), results))
+
+    async def _validate_targets(self, proxies: typ.List[AnyUrl],
+                                urls: typ.Dict[str, AnyUrl]
+                               ) -> typ.Dict[str, typ.List[AnyUrl]]:
+        '''
+        Checks all proxies against all sites concurrently.
+        The handshake is made once, to the first site.
+        '''
+        if USE_PROXY_HANDSHAKE_CHECK:
+            proxies = await self._filter_alive(proxies, 
+                                               next(iter(urls.values())))
+            self._logger.info(f"...{len(proxies)} proxies passed " +
+                              "the handshake.")
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+        results = await asyncio.gather(*[
+            self._check_targets(semaphore, proxy, urls) for proxy in proxies
+        ])
+        valid_proxies = {name: list() for name in urls}
+        for proxy, checks in zip(proxies, results):
+            for name, is_valid in checks.items():
+                if is_valid: valid_proxies[name].append(proxy)
+        return valid_proxies
+
+    def validate_targets(self, proxies: typ.List[AnyUrl],
+                         urls: typ.Dict[str, AnyUrl]
+                        ) -> typ.Dict[str, typ.List[AnyUrl]]:
+        '''
+        Checks the proxies against several sites in one pass.
+        The urls and the results are keyed by the name of the site.
+        '''
+        proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        self._logger.info(f"Checking {len(proxies)} proxies against " +
+                          f"{len(urls)} sites " +
+                          f"(concurrency {self._concurrency})...")
+        valid_proxies = asyncio.run(self._validate_targets(proxies, urls))
+        for name, valid in valid_proxies.items():
+            self._logger.success(f"...valid proxies of {name}: {len(valid)}.")
+        return valid_proxies
+
+    async def _validate_stream(self, proxies: typ.Iterator[AnyUrl],
+                               url: AnyUrl, 
+                               on_valid: typ.Callable[[AnyUrl], typ.Any],
+                               enough: typ.Union[int, None]
+                              ) -> typ.Tuple[typ.List[AnyUrl], 
+                                             typ.List[AnyUrl]]:
+        '''
+        Checks the proxies while they are read from the iterator.
+        The blocking iterator is read in the executor.
+        Each proxy is fully checked only after its handshake.
+        Stops when enough proxies are valid. The proxies
+        which pass after that are still counted as valid.
+        '''
+        loop = asyncio.get_running_loop()
+        target = self._get_target(url)
+        queue = asyncio.Queue(maxsize=self._concurrency * 2)
+        is_enough = asyncio.Event()
+        checked, valid = list(), list()
+
+        async def produce() -> typ.NoReturn:
+            seen = set()
+            while not is_enough.is_set():
+                proxy = await loop.run_in_executor(None, next, proxies, None)
+                if proxy is None: break
+                if proxy in seen: continue
+                seen.add(proxy)
+                await queue.put(proxy)
+            for _ in range(self._concurrency):
+                await queue.put(None)
+
+        async def consume() -> typ.NoReturn:
+            while True:
+                proxy = await queue.get()
+                if proxy is None: return
+                if is_enough.is_set(): continue
+                    
+                is_valid = False
+                if not USE_PROXY_HANDSHAKE_CHECK or \
+                   await self._check_handshake(proxy, target):
+                    is_valid = await self._check_with_timeout(proxy, url)
+                checked.append(proxy)
+                if not is_valid: continue
+                    
+                valid.append(proxy)
+                _ = on_valid(proxy)
+                if enough and len(valid) >= enough:
+                    is_enough.set()
+
+        await asyncio.gather(produce(), *[
+            consume() for _ in range(self._concurrency)
+        ])
+        return checked, valid
+
+    def validate_stream(self, proxies: typ.Iterable[AnyUrl], url: AnyUrl,
+                        on_valid: typ.Callable[[AnyUrl], typ.Any],
+                        enough: int = None
+                       ) -> typ.Tuple[typ.List[AnyUrl], typ.List[AnyUrl]]:
+        '''
+        Checks the streamed proxies and passes each valid one 
+        to the callback as soon as it passes. 
+        Stops after enough valid proxies if the threshold is set.
+        Returns the checked and the valid proxies.
+        '''
+        self._logger.info("Checking the streamed proxies " +
+                          f"(concurrency {self._concurrency})...")
+        checked, valid = asyncio.run(self._validate_stream(
+            iter(proxies), url, on_valid, enough))
+        self._logger.success(f"...checked {len(checked)}, " +
+                             f"valid proxies: {len(valid)}.")
+        return checked, valid
+
+#--Finish functional block
@@ -0,0 +1,145 @@
+#--Start imports block
+#System imports
+import time
+import redis
+import threading
+import typing as typ
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import (
+    RATE_LIMITER_REDIS_URL, RATE_LIMITER_KEY_PREFIX, USE_REDIS_RATE_LIMITER
+)
+from .tools import get_redis_client
+#--Finish imports block
+
+
+#--Start global constants block
+# Takes a token from the bucket stored in a Redis hash.
+# Returns 0 if the token is taken, otherwise the wait time in ms.
+_REDIS_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait
+"""
+#--Finish global constants block
+
+
+#--Start functional block
+class TokenBucket:
+    '''
+    In-process token bucket.
+    Shared by all threads of the process.
+    '''
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        '''
+        Tries to take a token.
+        Returns 0 if taken, otherwise the time to wait in seconds.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self._rate
+
+    def acquire(self) -> typ.NoReturn:
+        '''Blocks until a token is taken.'''
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+
+class RedisTokenBucket(TokenBucket):
+    '''
+    Token bucket stored in Redis.
+    Shared by all processes and Celery workers.
+    Falls back to the in-process bucket if Redis is unavailable.
+    '''
+
+    def __init__(self, rate: float, burst: int, key: str,
+                 client: redis.Redis):
+        _ = super().__init__(rate, burst)
+        self._key = key
+        self._client = client
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET_SCRIPT)
+
+    def _take(self) -> float:
+        '''
+        Tries to take a token from the shared bucket.
+        Returns 0 if taken, otherwise the time to wait in seconds.
+        '''
+        try:
+            wait_ms = self._script(keys=[self._key],
+                                   args=[self._rate, self._burst])
+        except redis.RedisError:
+            return super()._take()
+        return int(wait_ms) / 1000
+
+
+class RateLimiter:
+    '''
+    Contains the token buckets of the target domains.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _buckets: typ.Dict[str, TokenBucket] = dict()
+    #----------------------------
+
+    @classmethod
+    def get_bucket(cls, domain: AnyUrl, rate: typ.Union[float, None],
+                   burst: int) -> typ.Union[TokenBucket, None]:
+        '''
+        Returns the shared bucket of the domain.
+        Returns None if the rate is not limited.
+        '''
+        if not rate: return None
+
+        with cls._lock:
+            if domain in cls._buckets:
+                return cls._buckets[domain]
+
+            client = None
+            if USE_REDIS_RATE_LIMITER:
+                client = get_redis_client(RATE_LIMITER_REDIS_URL)
+            if client is not None:
+                key = f"{RATE_LIMITER_KEY_PREFIX}:{domain}"
+                bucket = RedisTokenBucket(rate, burst, key, client)
+            else:
+                bucket = TokenBucket(rate, burst)
+
+            cls._buckets[domain] = bucket
+            return bucket
+
+#--Finish functional block
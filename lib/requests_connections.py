@@ -1,23 +1,135 @@
 #--Start imports block
 #System imports
+import os
+import time
+import random
+import urllib3
 import cfscrape
 import requests
+import threading
 import typing as typ
+from collections import deque
+from concurrent.futures import (
+    ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+)
 from pydantic import AnyUrl, AnyHttpUrl, IPvAnyAddress
+from functools import partial
 from multiprocessing import Queue
+from requests.adapters import HTTPAdapter
 from requests.cookies import RequestsCookieJar
 
 #Custom imports
-from .types import WebPage, Session, WatchListType, RequestMethod
+from configs.settings import (
+    SESSION_POOL_CONNECTIONS, SESSION_POOL_MAXSIZE, USE_PROXY_RACE,
+    PROXY_RACE_WIDTH, PROXY_RACE_POOL_SIZE, PROXY_HEDGE_LIMIT, PROXY_HEDGE_DEFAULT_DELAY,
+    PROXY_HEDGE_MIN_SAMPLES, PROXY_LATENCY_WINDOW, RETRYABLE_STATUS_CODES,
+    PROXY_FAILURE_STATUS_CODES,
+    RECORD_FETCH_FIXTURES, FETCH_STUB_URL, PROXY_LEASE_WAIT
+)
+from .types import (
+    WebPage, Session, WatchListType, RequestMethod, Response,
+    RequestClass, RetryPolicy, FetchError, FetchTiming
+)
 from .interfaces import ISiteSettings
 from .proxy_checker import ProxyChecker
+from .cf_clearance import ClearanceCache
+from .fetch_metrics import FetchMetrics
+from .fetch_fixtures import FixtureArchive
+from .fetch_scheduler import FetchScheduler
+from .proxy_registry import ProxyRegistry
+from .proxy_pool import ProxyPool, Lease
+from .rate_limiter import RateLimiter
+from .session_pool import SessionPool
 from .tools import OutputLogger
 #--Finish imports block
 
 
+#--Start global constants block
+FetchResult = typ.Tuple[typ.Union[Response, None], typ.Union[FetchError, None]]
+#--Finish global constants block
+
+
 #--Start functional block
+class LatencyTracker:
+    '''
+    Collects the latencies of the successful responses by domain.
+    Used to decide when a request should be hedged.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _latencies: typ.Dict[str, typ.Deque[float]] = dict()
+    #----------------------------
+
+    @classmethod
+    def add_latency(cls, domain: str, latency: float) -> typ.NoReturn:
+        '''Stores the latency of a successful response.'''
+        with cls._lock:
+            if domain not in cls._latencies:
+                cls._latencies[domain] = deque(maxlen=PROXY_LATENCY_WINDOW)
+            cls._latencies[domain].append(latency)
+
+    @classmethod
+    def get_percentile(cls, domain: str, percentile: float=0.95, 
+                       default: float=PROXY_HEDGE_DEFAULT_DELAY) -> float:
+        '''
+        Returns the observed latency percentile for the domain.
+        Returns the default until enough samples are collected.
+        '''
+        with cls._lock:
+            latencies = sorted(cls._latencies.get(domain, list()))
+
+        if len(latencies) < PROXY_HEDGE_MIN_SAMPLES:
+            return default
+        index = min(len(latencies) - 1, int(len(latencies) * percentile))
+        return latencies[index]
+
+
+class RaceExecutor:
+    '''
+    Contains the executor of the racing proxy requests.
+    The executor is shared by all requests of the process.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _executor: typ.Union[ThreadPoolExecutor, None] = None
+    _pid: typ.Union[int, None] = None
+    #----------------------------
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        '''Returns the executor of the process. Created once in each process.'''
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=PROXY_RACE_POOL_SIZE, 
+                    thread_name_prefix="proxy_race")
+                cls._pid = os.getpid()
+            return cls._executor
+
+
 class RequestsConnections(ISiteSettings):
     '''A class for working with requests connections.'''
+    #Constant block
+    #----------------------------
+    # cfscrape raises ValueError if the challenge is not solved.
+    _fetch_exceptions: typ.Tuple[typ.Type[Exception], ...] = (
+        requests.RequestException,
+        ValueError,
+    )
+    _permanent_exceptions: typ.Tuple[typ.Type[Exception], ...] = (
+        requests.exceptions.URLRequired,
+        requests.exceptions.MissingSchema,
+        requests.exceptions.InvalidSchema,
+        requests.exceptions.InvalidURL,
+        requests.exceptions.InvalidHeader,
+    )
+    _unsent_exceptions: typ.Tuple[typ.Type[Exception], ...] = (
+        requests.exceptions.ConnectTimeout,
+        requests.exceptions.ProxyError,
+    )
+    #----------------------------
 
     def __init__(self, module_name: str, config_obj: ISiteSettings, queue: Queue=None):
         self._module_name = module_name
@@ -25,7 +137,9 @@ class RequestsConnections(ISiteSettings):
         _redir_out = OutputLogger(duplicate=True, queue=self._queue,
                                  name="req_con")
         self._logger = _redir_out.logger
+        self._state = threading.local()
         
+        self._config_obj = config_obj
         self._url_domain = config_obj.url_domain
         self._url_wath_lists = config_obj.url_wath_lists
         self._url_type_option = config_obj.url_type_option
@@ -34,15 +148,23 @@ class RequestsConnections(ISiteSettings):
         self._cookies = config_obj.cookies
         self._use_proxy = config_obj.use_proxy
         self._proxies = config_obj.proxies
+        self._rate_bucket = RateLimiter.get_bucket(self._url_domain,
+                                                   config_obj.rate_limit,
+                                                   config_obj.rate_burst)
 
         self._correct_proxies = None
+        self._proxy_registry = ProxyRegistry.get_registry(self._module_name)
+        self._proxy_pool = ProxyPool.get_pool(self._module_name)
     
-    def get_new_session(self) -> Session:
+    def get_new_session(self, proxy: AnyUrl=None) -> Session:
         '''Configurings the request session object.'''
         session = requests.Session()
-        session.headers = self._headers
+        session.headers = requests.structures.CaseInsensitiveDict(self._headers)
         if self._use_proxy:
-            session.proxies = self._proxies
+            session.proxies = dict(self._proxies)
+        if proxy:
+            session.proxies["http"] = proxy
+            session.proxies["https"] = proxy
 
         cookies_jar = RequestsCookieJar()
         for key, value in self._cookies.items():
@@ -50,18 +172,73 @@ class RequestsConnections(ISiteSettings):
             cookies_jar.set_cookie(cookie)
 
         session.cookies = cookies_jar
-        return cfscrape.create_scraper(sess=session)
+        scraper = cfscrape.create_scraper(sess=session)
+        
+        adapter = HTTPAdapter(pool_connections=SESSION_POOL_CONNECTIONS,
+                              pool_maxsize=SESSION_POOL_MAXSIZE)
+        scraper.mount("http://", adapter)
+        scraper.mount("https://", adapter)
+        
+        if ClearanceCache.apply(scraper, self._url_domain, proxy):
+            self._logger.info(self._add_arg_to_msg(
+                "Cached Cloudflare clearance is used.", proxy))
+        return scraper
+
+    def get_session(self, proxy: AnyUrl=None) -> Session:
+        '''
+        Returns a long-lived session from the pool 
+        for the module, cookies and proxy.
+        '''
+        key = SessionPool.make_key(self._module_name, self._cookies, proxy)
+        return SessionPool.get_session(
+            key, partial(self.get_new_session, proxy))
+
+    def drop_session(self, proxy: AnyUrl=None) -> typ.NoReturn:
+        '''Closes the pooled session of the proxy.'''
+        key = SessionPool.make_key(self._module_name, self._cookies, proxy)
+        _ = SessionPool.drop_session(key)
 
     def get_correct_proxies(self) -> typ.List[AnyUrl]:
         '''
         Gets the correct proxy list if it is not loaded.
+        The list is shared by the proxy pool with all workers.
         '''
+        if not self._correct_proxies:
+            self._correct_proxies = self._proxy_pool.get_proxies()
+            
         if not self._correct_proxies:
             pw = ProxyChecker(self._module_name, self._queue)
-            self._correct_proxies = pw.load_correct_proxies()
+            self._correct_proxies = [
+                proxy for proxy in pw.load_correct_proxies() if proxy
+            ]
+            _ = self._proxy_pool.set_proxies(self._correct_proxies)
 
         return self._correct_proxies
 
+    def get_ordered_proxies(self) -> typ.List[AnyUrl]:
+        '''
+        Returns the correct proxies ordered by their health score 
+        for the domain. Quarantined proxies are skipped.
+        '''
+        return self._proxy_registry.order_proxies(self._url_domain,
+                                                  self.get_correct_proxies())
+
+    def _register_proxy_result(self, proxy: AnyUrl, 
+                               latency: typ.Union[float, None]) -> typ.NoReturn:
+        '''
+        Stores the result of a request in the proxy registry 
+        and the shared proxy pool.
+        The latency is None for a failed request.
+        The connections of the failed proxy are not reused.
+        '''
+        if not proxy: return
+        if latency is None:
+            self._proxy_registry.record_failure(self._url_domain, proxy)
+            _ = self.drop_session(proxy)
+        else:
+            self._proxy_registry.record_success(self._url_domain, proxy, latency)
+        _ = self._proxy_pool.report(proxy, latency is not None)
+
     def _get_typed_url(self, type: str) -> AnyHttpUrl:
         '''Concatenates urls.'''
         if type not in self._url_types: return None
@@ -96,87 +273,431 @@ class RequestsConnections(ISiteSettings):
             
         return request_method
         
+    def _is_correct_status(self, status_code: int, 
+                           headers: typ.Dict[str, str]=None) -> bool:
+        '''
+        Checks the status code of the response.
+        The Not Modified status is correct for a conditional request.
+        '''
+        if status_code == 200:
+            return True
+        return status_code == 304 and bool(headers)
+
+    def _is_final_attempt(self, policy: RetryPolicy) -> bool:
+        '''Checks if the current attempt of the thread is the last one.'''
+        _, attempt = self._get_fetch_context()
+        return attempt >= policy.max_retries
+
+    def _classify_status(self, status_code: int, policy: RetryPolicy,
+                         proxy: AnyUrl=None) -> FetchError:
+        '''
+        Classifies an incorrect status code of the response.
+        A non-idempotent request may be applied whatever the status,
+        so it is never retried.
+        Through a proxy, the statuses caused by the proxy are retried
+        with the next proxy, and other statuses are permanent
+        only on the final attempt.
+        '''
+        if not policy.is_idempotent: return FetchError.PERMANENT
+        if status_code in RETRYABLE_STATUS_CODES: return FetchError.RETRYABLE
+        if proxy and (status_code in PROXY_FAILURE_STATUS_CODES or 
+                      not self._is_final_attempt(policy)):
+            return FetchError.RETRYABLE
+        return FetchError.PERMANENT
+
+    def _is_unsent(self, exc: Exception) -> bool:
+        '''Checks if the request failed before it was sent.'''
+        if isinstance(exc, self._unsent_exceptions): return True
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+    def _classify_exception(self, exc: Exception, 
+                            policy: RetryPolicy) -> FetchError:
+        '''
+        Classifies an exception raised by the request.
+        Malformed requests are permanent failures. 
+        A non-idempotent request is retryable 
+        only if the connection was not made.
+        '''
+        if isinstance(exc, self._permanent_exceptions):
+            return FetchError.PERMANENT
+        if not policy.is_idempotent and not self._is_unsent(exc):
+            return FetchError.PERMANENT
+        return FetchError.RETRYABLE
+
+    def _record_timing(self, url: AnyHttpUrl, method: RequestMethod,
+                       proxy: IPvAnyAddress, started_at: float, 
+                       response: typ.Union[Response, None], 
+                       error: typ.Union[FetchError, None],
+                       headers: typ.Dict[str, str]=None) -> typ.NoReturn:
+        '''
+        Records the timing of the request.
+        The time to first byte is the time until the headers are parsed,
+        the rest of the request time is the body transfer.
+        '''
+        request_class, attempt = self._get_fetch_context()
+        timing = FetchTiming(
+            module=self._module_name,
+            request_class=request_class.value if request_class else "",
+            method=method.value,
+            url=url,
+            proxy=proxy,
+            retries=attempt,
+            error=error.value if error else None,
+            total=time.monotonic() - started_at
+        )
+        timing.started_at = time.time() - timing.total
+        if response is not None:
+            timing.status = response.status_code
+            timing.ttfb = response.elapsed.total_seconds()
+            timing.transfer = max(0.0, timing.total - timing.ttfb)
+            timing.bytes = len(response.content)
+            if response.status_code == 304:
+                timing.cache = 'hit'
+            elif headers:
+                timing.cache = 'miss'
+        _ = FetchMetrics.record(timing)
+
     def _get_response(self, url: AnyHttpUrl, session: Session, 
-                      method: RequestMethod,
-                      proxy: IPvAnyAddress=None) -> typ.Union[WebPage, None]:
+                      method: RequestMethod, proxy: IPvAnyAddress=None, 
+                      policy: RetryPolicy=None, 
+                      headers: typ.Dict[str, str]=None) -> FetchResult:
         '''
         Tries to get an answer. Sends an empty request. 
-        Returns None if the status code is not 200. 
+        Returns None with the class of the failure 
+        if the status code is not 200 (or 304 for a conditional request). 
         '''
         response = None
+        error = None
+        policy = policy if policy else RetryPolicy()
+        started_at = time.monotonic()
+        request_class, _ = self._get_fetch_context()
         try:
             request_method = self._get_request_method(session, method)
-            response = request_method(url, timeout=2)
+            # The token is taken first, so the slot is not held 
+            # by a request waiting for the rate of its domain.
+            _ = self._acquire_rate_token()
+            with FetchScheduler.slot(self._url_domain, request_class):
+                started_at = time.monotonic()
+                response = request_method(FixtureArchive.get_stub_url(url), 
+                                          timeout=policy.timeout, 
+                                          headers=headers)
+            if RECORD_FETCH_FIXTURES and not FETCH_STUB_URL:
+                _ = FixtureArchive.record(method, url, response)
             
-            if response.status_code == 200:
+            if self._is_correct_status(response.status_code, headers):
+                latency = time.monotonic() - started_at
+                LatencyTracker.add_latency(self._url_domain, latency)
+                self._register_proxy_result(proxy, latency)
+                _ = ClearanceCache.store(session, self._url_domain, proxy)
                 self._logger.success(self._add_arg_to_msg("Correct response!", proxy))
                 self._logger.info(f"Response: {response}\n")
             else:
+                error = self._classify_status(response.status_code, policy, 
+                                              proxy)
+                self._register_proxy_result(proxy, None)
                 self._logger.error(self._add_arg_to_msg("Incorrect response!", proxy))
-                self._logger.info(f"Response: {response}\n")
-                response = None
+                self._logger.info(f"Response: {response} ({error.value})\n")
                 
-        except:
-            self._logger.warning(self._add_arg_to_msg("Invalid!", proxy))
-            
-        return response
+        except self._fetch_exceptions as exc:
+            error = self._classify_exception(exc, policy)
+            self._register_proxy_result(proxy, None)
+            self._logger.warning(self._add_arg_to_msg("Invalid!", proxy) + 
+                                 f" {type(exc).__name__} ({error.value})")
+
+        self._record_timing(url, method, proxy, started_at, 
+                            response, error, headers)
+        if error: response = None
+        return response, error
+
+    def _acquire_rate_token(self) -> typ.NoReturn:
+        '''
+        Takes a rate token of the domain for the request.
+        The requests of a race are paid for by the race.
+        '''
+        if not self._rate_bucket: return
+        if getattr(self._state, 'is_rate_charged', False): return
+        self._rate_bucket.acquire()
 
-    def _get_web_page_with_proxy(self, url: AnyHttpUrl, 
-                                 method: RequestMethod) -> typ.Union[WebPage, None]:
+    def _is_deadline_passed(self, deadline: float) -> bool:
+        '''Checks if the timeout budget of the request is spent.'''
+        return time.monotonic() >= deadline
+
+    def _get_response_with_proxy(self, url: AnyHttpUrl, method: RequestMethod,
+                                 policy: RetryPolicy, deadline: float,
+                                 headers: typ.Dict[str, str]=None
+                                ) -> FetchResult:
         '''
-        Gets a web-page through one of the proxies 
+        Gets a response through one of the proxies 
         from the corrected proxy list.
         '''
         response = None
-        session = self.get_new_session()
-        correct_proxies = self.get_correct_proxies()
+        error = FetchError.RETRYABLE
+        correct_proxies = self.get_ordered_proxies()
+        tried = set()
 
         self._logger.info(f"Correct proxies: {len(correct_proxies)}\n")
         
-        for proxy in correct_proxies:
-            session.proxies["http"] = proxy
-            session.proxies["https"] = proxy
-            
-            response = self._get_response(url, session, method, proxy)
-            if response: break
+        while not self._is_deadline_passed(deadline):
+            lease = self._lease_proxy(correct_proxies, tried, deadline)
+            if lease is None: break
+                
+            proxy, lease_id = lease
+            session = self.get_session(proxy)
+            try:
+                response, error = self._get_response(url, session, method, 
+                                                     proxy, policy, headers)
+            finally:
+                self._proxy_pool.release(lease_id)
+            if response or error is FetchError.PERMANENT: break
+                
+        return response, error
 
-        if not response: 
-            self._print_error_msg()
-            return None
+    def _lease_proxy(self, proxies: typ.List[AnyUrl], tried: typ.Set[AnyUrl],
+                     deadline: float, 
+                     is_blocking: bool=True) -> typ.Union[Lease, None]:
+        '''
+        Leases the next untried proxy from the shared pool.
+        If blocking, waits while all untried proxies 
+        are used up to the limit.
+        Returns None if the proxies are over or the deadline is passed.
+        '''
+        while True:
+            candidates = [proxy for proxy in proxies if proxy not in tried]
+            if not candidates: return None
                 
-        return response.text
+            lease = self._proxy_pool.lease(candidates)
+            if lease is not None:
+                tried.add(lease[0])
+                return lease
+            if not is_blocking: return None
+            if self._is_deadline_passed(deadline): return None
+            time.sleep(PROXY_LEASE_WAIT)
 
-    def _get_web_page_without_proxy(self, url: AnyHttpUrl, 
-                                    method: RequestMethod) -> typ.Union[WebPage, None]:
+    def _submit_proxy_request(self, executor: ThreadPoolExecutor, 
+                              proxies: typ.List[AnyUrl], 
+                              tried: typ.Set[AnyUrl],
+                              url: AnyHttpUrl, method: RequestMethod,
+                              policy: RetryPolicy, deadline: float,
+                              headers: typ.Dict[str, str]=None,
+                              is_blocking: bool=True,
+                              is_charged: bool=False
+                             ) -> typ.Union[Future, None]:
         '''
-        Gets a web-page without using a requests proxy.
+        Starts a request through the next leased proxy of the list.
+        A rate token is taken for it, unless it is already charged.
+        Returns None if the proxies are over or none can be leased.
         '''
-        session = self.get_new_session()
-        
-        response = self._get_response(url, session, method)
-        if not response: 
-            self._print_error_msg()
-            return None
+        lease = self._lease_proxy(proxies, tried, deadline, is_blocking)
+        if lease is None: return None
+            
+        proxy, lease_id = lease
+        if not is_charged:
+            _ = self._acquire_rate_token()
+        session = self.get_session(proxy)
+        context = self._get_fetch_context()
+        future = executor.submit(self._get_response_in_context, context, 
+                                 lease_id, url, session, method, proxy, 
+                                 policy, headers)
+        future.add_done_callback(partial(self._release_cancelled, lease_id))
+        return future
+
+    def _release_cancelled(self, lease_id: str, future: Future) -> typ.NoReturn:
+        '''Returns the proxy of a request cancelled before the start.'''
+        if future.cancelled():
+            self._proxy_pool.release(lease_id)
+
+    def _get_fetch_context(self) -> typ.Tuple[RequestClass, int]:
+        '''Returns the request class and the attempt of the thread.'''
+        return (getattr(self._state, 'request_class', None),
+                getattr(self._state, 'attempt', 0))
+
+    def _get_response_in_context(self, context: typ.Tuple[RequestClass, int],
+                                 lease_id: str, *args) -> FetchResult:
+        '''
+        Gets a response in a worker thread 
+        with the fetch context of the calling thread.
+        The rate token is taken by the race, not by the request.
+        The leased proxy is returned to the pool after the request.
+        '''
+        self._state.request_class, self._state.attempt = context
+        self._state.is_rate_charged = True
+        try:
+            return self._get_response(*args)
+        finally:
+            self._state.is_rate_charged = False
+            self._proxy_pool.release(lease_id)
+
+    def _close_loser(self, future: Future) -> typ.NoReturn:
+        '''Releases the connection of a losing response.'''
+        if future.cancelled(): return
+        response, _ = future.result()
+        if response is not None:
+            response.close()
+
+    def _get_response_with_proxy_race(self, url: AnyHttpUrl, 
+                                      method: RequestMethod,
+                                      policy: RetryPolicy, deadline: float,
+                                      headers: typ.Dict[str, str]=None
+                                     ) -> FetchResult:
+        '''
+        Gets a response by racing several proxies at once.
+        The first correct response wins. If no response comes 
+        within the observed p95 latency, a hedged duplicate 
+        is sent through the next proxy. The losers are cancelled
+        or their responses are closed.
+        The race takes one rate token of the domain, 
+        each hedge or replacement of a failed racer takes one more.
+        '''
+        response = None
+        error = FetchError.RETRYABLE
+        correct_proxies = self.get_ordered_proxies()
+        hedges = 0
+        submit = partial(self._submit_proxy_request, proxies=correct_proxies,
+                         tried=set(), url=url, method=method, policy=policy, 
+                         deadline=deadline, headers=headers)
+
+        self._logger.info(f"Correct proxies: {len(correct_proxies)}\n")
+        self._logger.info(f"Racing {PROXY_RACE_WIDTH} proxies...")
+
+        executor = RaceExecutor.get_executor()
+        pending = set()
+        for _ in range(PROXY_RACE_WIDTH):
+            future = submit(executor, is_blocking=not pending, 
+                            is_charged=bool(pending))
+            if future: pending.add(future)
+
+        while pending and not response:
+            if self._is_deadline_passed(deadline): break
                 
-        return response.text
+            delay = LatencyTracker.get_percentile(self._url_domain)
+            done, pending = wait(pending, timeout=delay, 
+                                 return_when=FIRST_COMPLETED)
+            
+            if not done and hedges < PROXY_HEDGE_LIMIT:
+                future = submit(executor, is_blocking=False)
+                if future: 
+                    self._logger.info(f"Hedging the request after {delay:.2f}s.")
+                    pending.add(future)
+                    hedges += 1
+                continue
 
-    def get_web_page(self, type: WatchListType, url: AnyHttpUrl, 
-                     method: RequestMethod) -> typ.Union[WebPage, None]: 
+            for future in done:
+                if response or error is FetchError.PERMANENT:
+                    self._close_loser(future)
+                    continue
+                    
+                response, error = future.result()
+                if response or error is FetchError.PERMANENT: continue
+                    
+                next_future = submit(executor, is_blocking=not pending)
+                if next_future: pending.add(next_future)
+                    
+            if error is FetchError.PERMANENT: break
+
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(self._close_loser)
+                
+        return response, error
+
+    def _get_response_without_proxy(self, url: AnyHttpUrl, 
+                                    method: RequestMethod,
+                                    policy: RetryPolicy, deadline: float,
+                                    headers: typ.Dict[str, str]=None
+                                   ) -> FetchResult:
         '''
-        Gets a web-page by parameters.
+        Gets a response without using a requests proxy.
+        '''
+        session = self.get_session()
+        return self._get_response(url, session, method, 
+                                  policy=policy, headers=headers)
+
+    def _get_request_class(self, type: WatchListType, url: AnyHttpUrl,
+                           method: RequestMethod) -> RequestClass:
+        '''Guesses the class of the request if it is not passed.'''
+        if method is not RequestMethod.GET:
+            return RequestClass.ACTION
+        if type and not url:
+            return RequestClass.LIST_PAGE
+        return RequestClass.TITLE_PAGE
+
+    def _get_backoff(self, policy: RetryPolicy, attempt: int) -> float:
+        '''Returns the jittered exponential backoff for the attempt.'''
+        backoff = min(policy.backoff_max, policy.backoff_base * 2 ** attempt)
+        return random.uniform(0, backoff)
+
+    def get_last_error(self) -> typ.Union[FetchError, None]:
+        '''
+        Returns the class of the last failure 
+        of the current thread.
+        '''
+        return getattr(self._state, 'last_error', None)
+
+    def get_response(self, type: WatchListType, url: AnyHttpUrl, 
+                     method: RequestMethod, 
+                     request_class: RequestClass=None,
+                     headers: typ.Dict[str, str]=None
+                    ) -> typ.Union[Response, None]:
+        '''
+        Gets a response by parameters. 
+        Retryable failures are retried with a jittered backoff 
+        within the policy of the request class.
+        The passed headers are added to the session headers.
         '''
         if not url: url = self._get_typed_url(type)
         if not url: return None
             
-        web_page = None
+        if not request_class: 
+            request_class = self._get_request_class(type, url, method)
+        policy = self._config_obj.get_retry_policy(request_class)
+        deadline = time.monotonic() + policy.budget
+        
+        response = None
+        error = None
+        self._state.last_error = None
+        self._state.request_class = request_class
         
         self._logger.info("Trying to get correct response...")
         self._logger.info(f"Using proxy: {self._use_proxy}")
         
-        if self._use_proxy:
-            web_page = self._get_web_page_with_proxy(url, method)
+        if self._use_proxy and USE_PROXY_RACE and method is RequestMethod.GET:
+            get_response = self._get_response_with_proxy_race
+        elif self._use_proxy:
+            get_response = self._get_response_with_proxy
         else:
-            web_page = self._get_web_page_without_proxy(url, method)
-        return web_page
+            get_response = self._get_response_without_proxy
+
+        for attempt in range(policy.max_retries + 1):
+            if attempt:
+                backoff = self._get_backoff(policy, attempt - 1)
+                if time.monotonic() + backoff >= deadline: break
+                    
+                self._logger.info(f"Retrying ({attempt}/{policy.max_retries}) " + 
+                                  f"after {backoff:.2f}s...")
+                time.sleep(backoff)
+                
+            self._state.attempt = attempt
+            response, error = get_response(url, method, policy, deadline, 
+                                           headers)
+            if response or error is FetchError.PERMANENT: break
+            if self._is_deadline_passed(deadline): break
+
+        if not response: 
+            self._state.last_error = error
+            self._print_error_msg()
+            return None
+        return response
+
+    def get_web_page(self, type: WatchListType, url: AnyHttpUrl, 
+                     method: RequestMethod, 
+                     request_class: RequestClass=None
+                    ) -> typ.Union[WebPage, None]: 
+        '''
+        Gets a web-page by parameters.
+        '''
+        response = self.get_response(type, url, method, request_class)
+        if response is None: return None
+        return response.text
 
 #--Finish functional block
\ No newline at end of file
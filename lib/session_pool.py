@@ -0,0 +1,109 @@
+#--Start imports block
+#System imports
+import os
+import threading
+import typing as typ
+from collections import OrderedDict
+from pydantic import AnyUrl
+
+#Custom imports
+from configs.settings import SESSION_POOL_MAX_SESSIONS
+from .types import Session, Cookies
+#--Finish imports block
+
+
+#--Start global constants block
+SessionKey = typ.Tuple[str, typ.Tuple[typ.Tuple[str, Cookies], ...],
+                       typ.Union[AnyUrl, None]]
+#--Finish global constants block
+
+
+#--Start functional block
+class SessionPool:
+    '''
+    A process-wide pool of long-lived request sessions.
+    Sessions are keyed by module, cookies and proxy,
+    so TCP/TLS and SOCKS connections stay alive
+    and are reused by all title fetches in a run.
+    The least recently used sessions are closed above the limit.
+    '''
+    #Constant block
+    #----------------------------
+    _lock: threading.Lock = threading.Lock()
+    _sessions: typ.Dict[SessionKey, Session] = OrderedDict()
+    _pid: int = os.getpid()
+    #----------------------------
+
+    @classmethod
+    def make_key(cls, module_name: str, cookies: typ.Dict[str, Cookies],
+                 proxy: AnyUrl=None) -> SessionKey:
+        '''Builds a hashable key of the session.'''
+        cookies_key = tuple(sorted(cookies.items())) if cookies else tuple()
+        return (module_name, cookies_key, proxy)
+
+    @classmethod
+    def _check_process(cls) -> typ.List[Session]:
+        '''
+        Drops sessions inherited from a parent process.
+        Sockets of a forked process must not be shared.
+        Returns the dropped sessions to be closed.
+        '''
+        pid = os.getpid()
+        if cls._pid == pid: return list()
+            
+        sessions = list(cls._sessions.values())
+        cls._sessions = OrderedDict()
+        cls._pid = pid
+        return sessions
+
+    @classmethod
+    def _close_sessions(cls, sessions: typ.List[Session]) -> typ.NoReturn:
+        '''Closes the sessions removed from the pool.'''
+        for session in sessions:
+            session.close()
+
+    @classmethod
+    def get_session(cls, key: SessionKey,
+                    factory: typ.Callable[[], Session]) -> Session:
+        '''
+        Returns the pooled session by the key.
+        Creates a new one by the factory if it is not pooled yet.
+        '''
+        with cls._lock:
+            closed = cls._check_process()
+            session = cls._sessions.get(key)
+
+            if session is None:
+                session = factory()
+                cls._sessions[key] = session
+            else:
+                _ = cls._sessions.move_to_end(key)
+                
+            while len(cls._sessions) > SESSION_POOL_MAX_SESSIONS:
+                _, evicted = cls._sessions.popitem(last=False)
+                closed.append(evicted)
+
+        _ = cls._close_sessions(closed)
+        return session
+
+    @classmethod
+    def drop_session(cls, key: SessionKey) -> typ.NoReturn:
+        '''Closes and removes the session from the pool.'''
+        with cls._lock:
+            closed = cls._check_process()
+            session = cls._sessions.pop(key, None)
+        if session is not None:
+            closed.append(session)
+        _ = cls._close_sessions(closed)
+
+    @classmethod
+    def close_all(cls) -> typ.NoReturn:
+        '''Closes all pooled sessions.'''
+        with cls._lock:
+            closed = cls._check_process()
+            closed.extend(cls._sessions.values())
+            cls._sessions = OrderedDict()
+
+        _ = cls._close_sessions(closed)
+
+#--Finish functional block
@@ -0,0 +1,78 @@
+#--Start imports block
+#System imports
+import threading
+import typing as typ
+import urllib.parse
+from pydantic import AnyHttpUrl
+
+#Custom imports
+#--Finish imports block
+
+
+#--Start functional block
+class _FlightCall:
+    '''An in-flight call shared by its callers.'''
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: typ.Any = None
+        self.exception: typ.Union[BaseException, None] = None
+
+
+class SingleFlight:
+    '''
+    Deduplicates concurrent identical calls.
+    Callers with the same key wait for one in-flight call
+    and share its result.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: typ.Dict[typ.Hashable, _FlightCall] = dict()
+
+    @staticmethod
+    def normalize_url(url: AnyHttpUrl) -> AnyHttpUrl:
+        '''
+        Normalizes the url for the key: lowercases the scheme
+        and the host, sorts the query and drops the fragment.
+        '''
+        parts = urllib.parse.urlsplit(url)
+        query = urllib.parse.urlencode(
+            sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+        return urllib.parse.urlunsplit((parts.scheme.lower(),
+                                        parts.netloc.lower(),
+                                        parts.path or '/', query, ''))
+
+    def do(self, key: typ.Hashable,
+           func: typ.Callable[[], typ.Any]) -> typ.Tuple[typ.Any, bool]:
+        '''
+        Runs the function once for all concurrent callers of the key.
+        Returns the result and whether it was shared
+        with a leading caller.
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _FlightCall()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.exception = exc
+            raise
+        finally:
+            with self._lock:
+                _ = self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+#--Finish functional block
@@ -1,6 +1,8 @@
 #--Start imports block
 #System imports
 import sys
+import time
+import redis
 import logging
 import traceback
 import functools
@@ -9,16 +11,24 @@ import billiard as mp
 from types import TracebackType
 from contextlib import redirect_stdout
 from logging.handlers import QueueHandler
+from bs4 import BeautifulSoup
 
 #Custom imports
 from configs.settings import (
     WRITE_LOG_TO_FILE, GLOBAL_LOG_FILE,
-    ENABLE_PARSING_MODULES, ENABLE_EXPORTER_MODULES
+    ENABLE_PARSING_MODULES, ENABLE_EXPORTER_MODULES, WEB_PAGES_ENCODING,
+    REDIS_RETRY_AFTER
 )
-from .types import ServerAction
+from .types import ServerAction, WebPage, WebPageBytes
 #--Finish imports block
 
 
+#--Start global constants block
+_redis_clients: typ.Dict[str, redis.Redis] = dict()
+_redis_retry_at: typ.Dict[str, float] = dict()
+#--Finish global constants block
+
+
 #--Start decorators block
 class OutputLogger:
     '''
@@ -273,4 +283,34 @@ def is_allowed_action(action: ServerAction) -> bool:
     })
     return allow_values[action]
 
+def get_redis_client(url: str) -> typ.Union[redis.Redis, None]:
+    '''
+    Returns the shared Redis client for the url.
+    Returns None if the Redis server is not available.
+    The failure is remembered for a short time,
+    so the callers do not wait for the connect timeout on every call.
+    '''
+    if url not in _redis_clients:
+        if _redis_retry_at.get(url, 0.0) > time.monotonic(): return None
+        client = redis.Redis.from_url(url, socket_connect_timeout=1)
+        try:
+            _ = client.ping()
+        except redis.RedisError:
+            _redis_retry_at[url] = time.monotonic() + REDIS_RETRY_AFTER
+            return None
+        _ = _redis_retry_at.pop(url, None)
+        _redis_clients[url] = client
+        
+    return _redis_clients[url]
+
+def make_soup(web_page: typ.Union[WebPage, WebPageBytes]) -> BeautifulSoup:
+    '''
+    Parses the web-page with lxml.
+    The stored pages are passed as bytes in the known encoding,
+    so lxml decodes them itself without a str copy and detection.
+    '''
+    if isinstance(web_page, str):
+        return BeautifulSoup(web_page, 'lxml')
+    return BeautifulSoup(web_page, 'lxml', from_encoding=WEB_PAGES_ENCODING)
+
 #--Finish decorators block
\ No newline at end of file
@@ -20,6 +20,7 @@ tp_fc = DataclassTypeFactory()
 Response = requests.models.Response
 Session = typ.Union[cfscrape.CloudflareScraper, Session]
 WebPage = Response
+WebPageBytes = bytes
 WebPagePart = Response
 HTMLTemplate = typ.Union[WebPage, WebPagePart]
 JSON = typ.Union[typ.Dict[str, typ.Any], typ.List[typ.Dict[str, typ.Any]]]
@@ -38,6 +39,36 @@ class RequestMethod(Enum):
     OPTIONS = "OPTIONS"
 
 
+class RequestClass(Enum):
+    '''Contains classes of site requests.'''
+    AUTH = "auth"
+    LIST_PAGE = "list_page"
+    TITLE_PAGE = "title_page"
+    SEARCH = "search"
+    ACTION = "action"
+    BACKGROUND = "background"
+
+
+class FetchError(Enum):
+    '''Contains classes of request failures.'''
+    RETRYABLE = "retryable"
+    PERMANENT = "permanent"
+
+
+class EnabledMetricsSink(Enum):
+    '''Contains types of fetch metrics sinks.'''
+    RING = "ring"
+    JSONL = "jsonl"
+    REDIS = "redis"
+
+
+class EnabledPageStore(Enum):
+    '''Contains types of web-page stores.'''
+    FILES = "files"
+    COMPRESSED = "compressed"
+    SQLITE = "sqlite"
+
+
 class EnabledDataHandler(Enum):
     '''Contains types of data handlers.'''
     JSON = "json"
@@ -110,6 +141,13 @@ class ResponseStatus(Enum):
     EMPTY = ''
 
 
+class DataclassDictMixin:
+    '''Converts the fields of a dataclass to a dict, recursively.'''
+
+    def asdict(self) -> typ.Dict[str, typ.Any]:
+        return dcls.asdict(self)
+
+
 @dcls.dataclass
 class AjaxServerResponse:
     '''
@@ -159,12 +197,105 @@ class LinkedAnimeInfoType(AnimeInfoType):
     link: AnyHttpUrl
 
 
+@dcls.dataclass
+class RetryPolicy:
+    '''
+    Retry and timeout policy for a class of requests.
+    Timeouts and the budget are in seconds.
+    A non-idempotent request is tried again only 
+    if it was not sent at all.
+    '''
+    connect_timeout: float = 2.0
+    read_timeout: float = 5.0
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    budget: float = 60.0
+    is_idempotent: bool = True
+
+    @property
+    def timeout(self) -> typ.Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+
+@dcls.dataclass
+class ProxyHealth(DataclassDictMixin):
+    '''Health statistics of a proxy for a target domain.'''
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ewma_latency: typ.Union[float, None] = None
+    last_failure: typ.Union[float, None] = None
+    quarantine_until: float = 0.0
+
+
+@dcls.dataclass
+class ProxyCheck(DataclassDictMixin):
+    '''Last check verdict of a proxy.'''
+    checked_at: float = 0.0
+    is_valid: bool = False
+
+
+@dcls.dataclass
+class PageEntry(DataclassDictMixin):
+    '''
+    Entry of the index of the web-page store.
+    The body is stored by the hash of its content.
+    '''
+    hash: str
+    codec: str
+    size: int = 0
+    page_class: typ.Union[str, None] = None
+    url: typ.Union[str, None] = None
+    stored_at: float = 0.0
+    accessed_at: float = 0.0
+    validators: typ.Union[typ.Dict[str, str], None] = None
+
+
+@dcls.dataclass
+class ManifestEntry(DataclassDictMixin):
+    '''
+    Entry of the manifest of the parsed web-pages.
+    Keeps the hashes of the page content and of the record parsed from it,
+    and the time the record was last checked against the page.
+    '''
+    page_hash: str
+    record_hash: str
+    key: typ.Union[str, None] = None
+    checked_at: float = 0.0
+
+
+@dcls.dataclass
+class FetchTiming(DataclassDictMixin):
+    '''
+    Timing of a single request. Times are in seconds.
+    The connect time is not exposed by requests, 
+    so it is included in the time to first byte.
+    '''
+    module: str
+    request_class: str
+    method: str
+    url: str
+    status: typ.Union[int, None] = None
+    proxy: typ.Union[str, None] = None
+    ttfb: typ.Union[float, None] = None
+    transfer: typ.Union[float, None] = None
+    total: float = 0.0
+    bytes: int = 0
+    retries: int = 0
+    cache: typ.Union[str, None] = None
+    error: typ.Union[str, None] = None
+    started_at: float = 0.0
+
+
 TitleDump: typ.Dict = AnimeInfoType
 TitleDumpByKey = typ.Dict[str, LinkedAnimeInfoType]
 AnimeByWatchList = typ.Dict[WatchListType, TitleDumpByKey]
 
 DEFAULT_DATA_HANDLER = EnabledDataHandler.JSON
 DEFAULT_PROGRESS_HANDLER = EnabledProgressHandler.CACHE
+DEFAULT_METRICS_SINK = EnabledMetricsSink.RING
+DEFAULT_PAGE_STORE = EnabledPageStore.FILES
 
 __fields_container = list(WatchListType) + [TITLES_DUMP_KEY_ERRORS]
 ProcessedTitlesDump: typ.Union[str,
@@ -8,7 +8,7 @@ from requests.structures import CaseInsensitiveDict
 #Custom imports
 from configs.settings import REQUEST_PROXIES_FORMAT
 from lib.types import (
-    WatchListType, Cookies, JSON, RequestMethod, WebPage
+    WatchListType, Cookies, JSON, RequestMethod, WebPage, RequestClass
 )
 from lib.interfaces import ISiteSettings
 from lib.requests_connections import RequestsConnections
@@ -20,6 +20,8 @@ class AnimeBuffRuConfig(ISiteSettings):
     '''Configuration for site animebuff.ru.'''
     use_proxy = True
     proxies = REQUEST_PROXIES_FORMAT
+    rate_limit = 4
+    rate_burst = 8
     
     url_domain = "animebuff.ru"
     url_general = f"https://{url_domain}"
@@ -64,7 +66,7 @@ class AnimeBuffRuConfig(ISiteSettings):
         assert 'module_name' in kwargs
         req_conn = RequestsConnections(kwargs['module_name'], self)
         web_page = req_conn.get_web_page(None, self.url_profile, 
-                                         RequestMethod.GET)
+                                         RequestMethod.GET, RequestClass.AUTH)
         
         soup = BeautifulSoup(web_page, 'lxml')
         item_username = soup.find(class_="new-profile__name")
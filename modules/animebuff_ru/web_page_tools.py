@@ -9,7 +9,7 @@ from pydantic import AnyHttpUrl
 #Custom imports
 from lib.types import WebPage, AnimeType, AnimeStatus, LinkedAnimeInfoType
 from lib.interfaces import IWebPageParser
-from lib.tools import OutputLogger
+from lib.tools import OutputLogger, make_soup
 #--Finish imports block
 
 
@@ -81,7 +81,7 @@ class WebPageParser(IWebPageParser):
         '''
         Returns the anime data by the keys.
         '''
-        soup = BeautifulSoup(web_page, 'lxml')
+        soup = make_soup(web_page)
         item_list_info = soup.find(class_="anime__info-list")
 
         item_type = self._get_item_by_tag(self._tag_type, item_list_info)
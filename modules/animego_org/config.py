@@ -7,7 +7,9 @@ from requests.structures import CaseInsensitiveDict
 
 #Custom imports
 from configs.settings import REQUEST_PROXIES_FORMAT
-from lib.types import Cookies, JSON, WebPage, WatchListType
+from lib.types import (
+    Cookies, JSON, WebPage, WatchListType, RequestClass, RetryPolicy
+)
 from lib.interfaces import ISiteSettings
 #--Finish imports block
 
@@ -17,6 +19,12 @@ class AnimeGoOrgConfig(ISiteSettings):
     '''Configuration for site animego.org.'''
     use_proxy = True
     proxies = REQUEST_PROXIES_FORMAT
+    rate_limit = 2
+    rate_burst = 4
+    retry_policies = dict({
+        **ISiteSettings.retry_policies,
+        RequestClass.SEARCH: RetryPolicy(read_timeout=10.0),
+    })
     
     url_domain = "animego.org"
     url_general = f"https://{url_domain}"
@@ -12,7 +12,7 @@ from lib.types import (
     WebPage, AnimeStatus
 )
 from lib.interfaces import IWebPageParser
-from lib.tools import OutputLogger
+from lib.tools import OutputLogger, make_soup
 #--Finish imports block
 
 
@@ -233,7 +233,7 @@ class WebPageParser(IWebPageParser):
         '''
         Returns the anime data by the keys.
         '''
-        soup = BeautifulSoup(web_page, 'lxml')
+        soup = make_soup(web_page)
         item_list_info = soup.find(class_="media")
         item_descr_body = item_list_info.find(class_="media-body")
         item_info = item_descr_body.find(class_="anime-info")
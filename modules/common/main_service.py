@@ -8,11 +8,12 @@ from pathlib import Path
 from configs.settings import (
     COMMON_BASH_LOG_FILE, REDIS_SETUP_SH_FILE, 
     CELERY_SETUP_SH_FILE, CELERY_TASKS_MODULE, 
-    RESTART_CELERY_WORKERS
+    RESTART_CELERY_WORKERS, USE_CELERY_PROXY_CHECK
 )
 from lib.types import ServerAction
-from lib.proxy_checker import ProxyChecker
+from lib.proxy_checker import MultiProxyChecker
 from lib.tools import OutputLogger, is_allowed_action
+from modules.flask.celery_tasks import task_proxy_checking
 from .connected_modules import EnabledModules
 #--Finish imports block
 
@@ -32,28 +33,29 @@ class MainService:
         '''
         Performs an initial proxy check 
         for enabled modules for allowed actions.
+        The check is sent to the Celery workers if it is enabled.
         '''
+        if USE_CELERY_PROXY_CHECK:
+            _ = task_proxy_checking.delay()
+            self.logger.info("Proxy check is sent to the Celery workers.\n")
+            return
+            
+        urls = dict()
         for modules_by_action in EnabledModules:
             action = ServerAction(modules_by_action.name)
-                
-            self.logger.info(f"Started preparing for {action.name} modules.")
             
             if not is_allowed_action(action):
                 self.logger.warning(f"{action.name} action disabled.\n")
                 continue
             
             for module in modules_by_action.value:
-                self.logger.info("...preparing for module - " \
-                                 f"{module.module_name}.")
-                
-                prx_chk = ProxyChecker(module.module_name)
-                _ = prx_chk.prepare_proxy_lists(
-                            module.config_module.url_general)
-                
-                self.logger.info("Preparing for module - " \
-                                 f"{module.module_name} is done.")
+                urls[module.module_name] = module.config_module.url_general
                 
-            self.logger.info(f"Finished preparing for {action.name} modules.\n")
+        self.logger.info("Started preparing for modules - " \
+                         f"{', '.join(urls)}.")
+        prx_chk = MultiProxyChecker(urls)
+        _ = prx_chk.prepare_proxy_lists()
+        self.logger.info("Finished preparing for modules.\n")
 
     def is_setup_done(self, res: str) -> bool:
         '''
@@ -1,7 +1,21 @@
 #--Start imports block
 #System imports
+import signal
+import itertools
+import threading
+import typing as typ
+from celery import chord
+from celery.signals import worker_process_shutdown
+from pydantic import AnyUrl
 
 #Custom imports
+from configs.settings import (
+    USE_CELERY_PROXY_CHECK, PROXY_CHECK_INTERVAL, WEB_PAGES_COMPACT_INTERVAL,
+    WEB_PAGES_FLUSH_TIMEOUT, FETCH_STUB_URL
+)
+from lib.proxy_checker import MultiProxyChecker
+from lib.page_store import PageStore
+from lib.session_pool import SessionPool
 from modules.common.application_objects import celery
 from .services import ActionService
 #--Finish imports block
@@ -12,14 +26,110 @@ from .services import ActionService
 
 
 #--Start functional block
+def _exit_on_terminate(signum: int, frame: typ.Any) -> typ.NoReturn:
+    '''Unwinds the revoked task, so its cleanup is run.'''
+    raise SystemExit(1)
+
+@worker_process_shutdown.connect
+def flush_web_pages(*args, **kwargs) -> typ.NoReturn:
+    '''
+    Writes the queued web-pages before the worker process exits
+    on the shutdown of the worker.
+    '''
+    _ = PageStore.flush_all(timeout=WEB_PAGES_FLUSH_TIMEOUT)
+
 @celery.task()
 def task_action_processing(*args, **kwargs) -> bool:
     '''
     Starts a long-running task to perform 
     the selected action in the background.
+    The pool process resets SIGTERM to the default action,
+    so the task handles it itself: the revoked task is unwound,
+    the queued web-pages are written and the pooled sessions 
+    are closed before the process exits.
     '''
-    dt_srv = ActionService()
-    _ = dt_srv.processing_for_selected_module(*args, **kwargs)
+    handler = None
+    if threading.current_thread() is threading.main_thread():
+        handler = signal.signal(signal.SIGTERM, _exit_on_terminate)
+    try:
+        dt_srv = ActionService()
+        _ = dt_srv.processing_for_selected_module(*args, **kwargs)
+    finally:
+        _ = PageStore.flush_all(timeout=WEB_PAGES_FLUSH_TIMEOUT)
+        _ = SessionPool.close_all()
+        if handler is not None:
+            _ = signal.signal(signal.SIGTERM, handler)
     return "FINISHED"
 
-#--Finish functional block
\ No newline at end of file
+@celery.task()
+def task_proxy_shard_checking(urls: typ.Dict[str, AnyUrl],
+                              proxies: typ.List[AnyUrl]
+                             ) -> typ.Dict[str, typ.List[AnyUrl]]:
+    '''
+    Checks a shard of the proxies against the sites of the modules.
+    Returns the valid proxies of the shard by module.
+    '''
+    prx_chk = MultiProxyChecker(urls)
+    return prx_chk.check_proxies(proxies)
+
+@celery.task()
+def task_proxy_shards_merging(shards: typ.List[typ.Dict[str, typ.List[AnyUrl]]],
+                              urls: typ.Dict[str, AnyUrl],
+                              proxies: typ.List[AnyUrl]
+                             ) -> typ.Dict[str, int]:
+    '''
+    Merges the valid proxies of all shards 
+    into the proxy lists and the pools of the modules.
+    '''
+    valid_proxies = {module_name: list() for module_name in urls}
+    for shard in shards:
+        for module_name, valid in shard.items():
+            valid_proxies[module_name].extend(valid)
+            
+    prx_chk = MultiProxyChecker(urls)
+    correct_proxies = prx_chk.merge_proxy_checks(proxies, valid_proxies)
+    return {
+        module_name: len(correct) 
+        for module_name, correct in correct_proxies.items()
+    }
+
+@celery.task()
+def task_proxy_checking() -> str:
+    '''
+    Shards the proxies of the enabled modules across the workers.
+    Each shard is checked against the sites of all modules.
+    The results are merged when all shards are checked.
+    '''
+    dt_srv = ActionService()
+    urls = dt_srv.get_proxy_urls()
+    shards = dt_srv.get_proxy_shards(urls)
+    if not shards: return "FINISHED"
+    
+    proxies = list(itertools.chain.from_iterable(shards))
+    _ = chord(
+        task_proxy_shard_checking.s(urls, shard) for shard in shards
+    )(task_proxy_shards_merging.s(urls, proxies))
+    return "STARTED"
+
+@celery.task()
+def task_web_pages_compaction() -> typ.Dict[str, typ.Any]:
+    '''
+    Evicts the expired and the excess web-pages of all sites.
+    Returns the counts of the evicted pages and the removed bodies.
+    '''
+    return PageStore.compact_all()
+
+celery.conf.beat_schedule = dict({
+    'web-pages-compaction': {
+        'task': task_web_pages_compaction.name,
+        'schedule': WEB_PAGES_COMPACT_INTERVAL,
+    }
+})
+# The requests go to the stub site, so the proxies are not checked.
+if USE_CELERY_PROXY_CHECK and not FETCH_STUB_URL:
+    celery.conf.beat_schedule['proxy-checking'] = dict({
+        'task': task_proxy_checking.name,
+        'schedule': PROXY_CHECK_INTERVAL,
+    })
+
+#--Finish functional block
@@ -199,7 +199,7 @@ class CommandService:
         
         if task_id is not None:
             task = AsyncResult(id=task_id, app=celery)
-            _ = task.revoke(terminate=True, signal='SIGKILL')
+            _ = task.revoke(terminate=True, signal='SIGTERM')
             _ = self._done_stopped()
 
         else:
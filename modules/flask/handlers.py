@@ -255,14 +255,14 @@ class CacheProgressHandler(IProgressHandler):
         progress.current = current_progress
         self.progress = progress
 
-    def increase_progress_all(self) -> typ.NoReturn:
+    def increase_progress_all(self, count: int = 1) -> typ.NoReturn:
         '''
         Increases the total number of processed titles.
         '''
         progress = self.progress
 
         if progress:
-            progress.all.now += 1
+            progress.all.now += count
             self.progress = progress
 
     def increase_progress_curr(self, inc_prgs_all: bool = True) -> typ.NoReturn:
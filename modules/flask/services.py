@@ -1,14 +1,18 @@
 #--Start imports block
 #System imports
 import json
+import time
 import typing as typ
 from jinja2 import Environment, FileSystemLoader
 from pathlib import Path as PathType
 from flask import request, render_template, session
 from flask_caching import Cache
+from pydantic import AnyUrl
 
 #Custom imports
-from configs.settings import TEMPLATES_DIR
+from configs.settings import (
+    TEMPLATES_DIR, DOWNLOAD_PROXY_LISTS, PROXY_CHECK_SHARD_SIZE
+)
 from lib.types import (
     ServerAction, AjaxServerResponse, ActionModule,
     ActionToModuleCompatibility, AjaxCommand, ResponseStatus,
@@ -18,6 +22,11 @@ from lib.types import (
 )
 from lib.interfaces import IConnectedModule, IProgressHandler
 from lib.tools import OutputLogger, is_allowed_action
+from lib.proxy_registry import ProxyRegistry
+from lib.proxy_checker import MultiProxyChecker
+from lib.fetch_metrics import FetchMetrics
+from lib.page_store import PageStore
+from lib.session_pool import SessionPool
 from modules.common.application_objects import flask_cache
 from modules.common.connected_modules import (
     EnabledParserModules, EnabledExporterModules,
@@ -460,7 +469,12 @@ class ActionService:
         })
                             
         self._logger.info(f"** BEGIN PROCESSING BLOCK ({action.name}) **")
+        started_at = time.time()
         _ = act_for_mod[action](selected_modules)
+        _ = ProxyRegistry.save_all()
+        _ = PageStore.flush_all()
+        _ = SessionPool.close_all()
+        _ = FetchMetrics.log_summary(self._logger, since=started_at)
         self._logger.info(f"** END PROCESSING BLOCK ({action.name}) **\n")
 
     def get_parse_modules(self) -> typ.List[str]:
@@ -481,6 +495,46 @@ class ActionService:
         ]
         return export_modules
 
+    def get_proxy_modules(self) -> typ.List[IConnectedModule]:
+        '''
+        Returns the enabled modules of the allowed actions.
+        '''
+        proxy_modules = dict()
+        for modules_by_action in EnabledModules:
+            if not is_allowed_action(ServerAction(modules_by_action.name)):
+                continue
+            for module in modules_by_action.value:
+                proxy_modules[module.module_name] = module
+        return list(proxy_modules.values())
+
+    def get_proxy_urls(self) -> typ.Dict[str, AnyUrl]:
+        '''
+        Returns the urls to check the proxies by module
+        for the enabled modules of the allowed actions.
+        '''
+        return {
+            module.module_name: module.config_module.url_general
+            for module in self.get_proxy_modules()
+        }
+
+    def get_proxy_shards(self, urls: typ.Dict[str, AnyUrl]
+                        ) -> typ.List[typ.List[AnyUrl]]:
+        '''
+        Splits the proxies of the modules to check into shards.
+        Downloads the proxy lists first if it is enabled.
+        '''
+        prx_chk = MultiProxyChecker(urls)
+        if DOWNLOAD_PROXY_LISTS:
+            _ = prx_chk.donload_proxy_lists()
+            
+        proxies = prx_chk.get_proxies_to_check()
+        self._logger.info(f"Checking {len(proxies)} proxies of " +
+                          f"{', '.join(urls)} in the workers...")
+        return [
+            proxies[index:index + PROXY_CHECK_SHARD_SIZE]
+            for index in range(0, len(proxies), PROXY_CHECK_SHARD_SIZE)
+        ]
+
     def get_modules_settings(self) -> typ.Dict[str, dict]:
         '''
         Returns the settings for the module form.
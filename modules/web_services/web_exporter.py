@@ -1,8 +1,10 @@
 #--Start imports block
 #System imports
 import re
+import threading
 import urllib.parse
 import typing as typ
+from functools import partial
 from billiard import Queue, cpu_count
 from pathlib import Path
 from pydantic import AnyHttpUrl
@@ -10,9 +12,11 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import Logger
 
 #Custom imports
-from configs.settings import USE_MULTITHREADS, TITLES_DUMP_KEY_ERRORS
+from configs.settings import (
+    USE_MULTITHREADS, USE_FETCH_POOL, TITLES_DUMP_KEY_ERRORS
+)
 from lib.types import (
-    RequestMethod, WebPage,
+    RequestMethod, WebPage, RequestClass, FetchError,
     AnimeInfoType, LinkedAnimeInfoType, AnimeByWatchList,
     TitleDump, WatchListType, TitleDumpByKey
 )
@@ -21,6 +25,7 @@ from lib.interfaces import (
     ISiteSettings, IProgressHandler
 )
 from lib.tools import OutputLogger, ListenerLogger
+from lib.fetch_pool import FetchPool
 from modules.flask.handlers import DefaultDataHandler
 from .web_page_tools import WebPageService, WebPageParser
 #--Finish imports block
@@ -37,6 +42,7 @@ class TitleExporter:
     _loader: IDataHandler
     _type: WatchListType
     _parser: WebPageParser
+    _web_serv: WebPageService
     _queue: Queue
     _logger: Logger
     _progress_handler: IProgressHandler
@@ -51,6 +57,9 @@ class TitleExporter:
         self._progress_handler = progress_handler
         self._type = None
         self._queue = queue
+        self._web_serv = None
+        self._web_serv_lock = threading.Lock()
+        self._deferred_titles = dict()
                      
         dump_file_name = self._module.get_json_dump_name()
         _logger_name = 'title_exp'
@@ -74,19 +83,41 @@ class TitleExporter:
         file_name = re.sub("[^a-zA-z0-9]", "_", dec_query)
         return file_name
     
+    def _get_web_serv(self) -> WebPageService:
+        '''
+        Returns the web service bound to the current logging queue.
+        The service is rebuilt only when the queue is changed.
+        It is taken before the jobs are submitted 
+        and is passed into each job.
+        '''
+        with self._web_serv_lock:
+            if self._web_serv is None or self._web_serv._queue is not self._queue:
+                self._web_serv = WebPageService(self._module_name, 
+                                                self._config_mod, 
+                                                self._queue)
+            return self._web_serv
+    
     def send_request(self, url: AnyHttpUrl, 
                      method: RequestMethod=RequestMethod.GET,
-                     save_page: bool=False) -> WebPage:
+                     save_page: bool=False,
+                     request_class: RequestClass=None,
+                     web_serv: WebPageService=None) -> WebPage:
         '''
-        Sends the selected request. 
+        Sends the selected request through the passed web service
+        or the current one. 
         Returns the web page of the answer.
         '''
         file_name = self.get_file_name_from_url(url)
         
-        ws = WebPageService(self._module_name, self._config_mod, self._queue)
+        ws = web_serv if web_serv else self._get_web_serv()
         web_page = ws.get_web_page_file(self._type, file_name, url, 
-                                        method, save_page)
+                                        method, save_page, 
+                                        request_class=request_class)
         return web_page
+
+    def _is_retryable_failure(self, web_serv: WebPageService) -> bool:
+        '''Checks if the last request of the thread can be retried.'''
+        return web_serv.get_last_error() is FetchError.RETRYABLE
     
     def compare_titles(self, query_title: AnimeInfoType, 
                        finded_title: LinkedAnimeInfoType) -> bool:
@@ -118,7 +149,8 @@ class TitleExporter:
         self._logger.error("...not finded.\n")
         return None
     
-    def search_title(self, title_data: AnimeInfoType) -> WebPage:
+    def search_title(self, title_data: AnimeInfoType,
+                     web_serv: WebPageService=None) -> WebPage:
         '''
         Searches for a suitable title and gets his web page.
         '''
@@ -127,7 +159,8 @@ class TitleExporter:
         enc_query = urllib.parse.quote(query)
         
         url = self._config_mod.url_search + enc_query
-        web_page = self.send_request(url)
+        web_page = self.send_request(url, request_class=RequestClass.SEARCH,
+                                     web_serv=web_serv)
         if not web_page:
             self._logger.error("...can't get query webpage.")
             return
@@ -135,7 +168,9 @@ class TitleExporter:
         url = self.find_title_link(web_page, title_data)
         if not url: return
             
-        web_page = self.send_request(url, save_page=True)
+        web_page = self.send_request(url, save_page=True, 
+                                     request_class=RequestClass.TITLE_PAGE,
+                                     web_serv=web_serv)
         if not web_page:
             self._logger.error("...can't get title webpage.")
             return
@@ -143,7 +178,8 @@ class TitleExporter:
         self._logger.success("...searching done.\n")
         return web_page
 
-    def submit_action(self, web_page: WebPage) -> bool:
+    def submit_action(self, web_page: WebPage,
+                      web_serv: WebPageService=None) -> bool:
         '''
         Receives a link to the desired action 
         from the web page and sends a request to it.
@@ -157,7 +193,12 @@ class TitleExporter:
             return False
             
         url = self._config_mod.url_general + action_link
-        _ = self.send_request(url, RequestMethod.POST)
+        web_page = self.send_request(url, RequestMethod.POST, 
+                                     request_class=RequestClass.ACTION,
+                                     web_serv=web_serv)
+        if web_page is None:
+            self._logger.error("...submitting failed.\n")
+            return False
         
         self._logger.success("...submitting completed.\n")
         return True
@@ -222,7 +263,8 @@ class TitleExporter:
         self._progress_handler.increase_progress_curr()
 
     @ListenerLogger.send_stop_msg
-    def export_selected_title(self, title_item: typ.Tuple[str, TitleDump]
+    def export_selected_title(self, title_item: typ.Tuple[str, TitleDump],
+                              web_serv: WebPageService
                              ) -> typ.Dict[str, AnimeInfoType]:
         '''Exports for the selected dump of title.'''
         title_key, title_dump = title_item
@@ -235,16 +277,43 @@ class TitleExporter:
             self._logger.error(f"Bad title data. (Key: {title_key})")
             return  {title_key: title_dump}
         
-        web_page = self.search_title(title_data)
+        web_page = self.search_title(title_data, web_serv)
+        if not web_page and self._is_retryable_failure(web_serv):
+            self._logger.warning("...temporary failure. " + 
+                                 f"The title is deferred ({title_key}).\n")
+            self._deferred_titles[title_key] = title_dump
+            return None
         if not web_page: return {title_key: title_dump}
             
-        res = self.submit_action(web_page)
+        res = self.submit_action(web_page, web_serv)
         if not res: return {title_key: title_dump}
             
         _ = self._update_data(title_key, web_page)
         self._logger.info(f"...title export are completed ({title_key}).\n")
         return None
 
+    @ListenerLogger.listener_preparing
+    def export_watchlist_in_fetch_pool(self, watchlist_dump: TitleDumpByKey
+                                      ) -> typ.Dict[str, AnimeInfoType]:
+        '''
+        Exports for a watchlist dump in the fetch pool.
+        A failed export job makes an error title.
+        '''
+        error_titles = dict()
+        self._parser = WebPageParser(self._module, self._type, 
+                                     self._progress_handler, self._queue)
+        pool = FetchPool(queue=self._queue)
+        job = partial(self.export_selected_title, 
+                      web_serv=self._get_web_serv())
+        
+        results = pool.map(job, watchlist_dump.items(),
+                           on_error=lambda title_item, _: dict([title_item]))
+        for error_title in results:
+            if error_title:
+                error_titles.update(error_title)
+                
+        return error_titles
+
     @ListenerLogger.listener_preparing
     def export_watchlist_in_multithreads(self, watchlist_dump: TitleDumpByKey
                                         ) -> typ.Dict[str, AnimeInfoType]:
@@ -252,6 +321,7 @@ class TitleExporter:
         error_titles = dict()
         self._parser = WebPageParser(self._module, self._type, self._queue, 
                                      self._progress_handler)        
+        web_serv = self._get_web_serv()
                                           
         with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
             futures = []
@@ -259,7 +329,8 @@ class TitleExporter:
             for title_item in watchlist_dump.items():
                 futures.append(
                     executor.submit(self.export_selected_title, 
-                                    title_item=title_item)
+                                    title_item=title_item,
+                                    web_serv=web_serv)
                 )
                 
             for future in as_completed(futures):
@@ -275,14 +346,34 @@ class TitleExporter:
         error_titles = dict()
         self._parser = WebPageParser(self._module, self._type, 
                                      self._progress_handler)
+        web_serv = self._get_web_serv()
         
         for title_item in watchlist_dump.items():
-            error_title = self.export_selected_title(title_item)
+            error_title = self.export_selected_title(title_item, web_serv)
             if error_title:
                 error_titles.update(error_title)
                 
         return error_titles
 
+    def export_deferred_titles(self) -> typ.Tuple[typ.Dict[str, AnimeInfoType],
+                                                  typ.Dict[str, AnimeInfoType]]:
+        '''
+        Retries the titles deferred by temporary failures once more.
+        Returns the error titles and the titles deferred again.
+        '''
+        deferred_titles = self._deferred_titles
+        self._deferred_titles = dict()
+        if not deferred_titles: return dict(), dict()
+
+        self._logger.info(f"Retrying deferred titles ({len(deferred_titles)})...")
+        error_titles = self.export_watchlist_in_order(deferred_titles)
+        
+        deferred_titles, self._deferred_titles = self._deferred_titles, dict()
+        if deferred_titles:
+            self._logger.warning("...titles still deferred: " + 
+                                 f"{len(deferred_titles)}.\n")
+        return error_titles, deferred_titles
+
     def _edit_old_data(self, 
                        titles_data: typ.Dict[str, AnyHttpUrl], 
                        error_titles: typ.Dict[str, AnimeInfoType]
@@ -310,14 +401,21 @@ class TitleExporter:
         self._progress_handler.initialize_progress_curr(watch_list=self._type, 
                                                        n_max=titles_count)
         
-        if USE_MULTITHREADS:
+        if USE_FETCH_POOL:
+            error_titles = self.export_watchlist_in_fetch_pool(watchlist_dump)
+        elif USE_MULTITHREADS:
             error_titles = self.export_watchlist_in_multithreads(watchlist_dump)
         else:
             error_titles = self.export_watchlist_in_order(watchlist_dump)
+        deferred_errors, deferred_titles = self.export_deferred_titles()
+        error_titles.update(deferred_errors)
 
         _ = self._edit_old_data(watchlist_dump, error_titles)
         _ = self._data.save_data()
         
+        # The titles deferred again are not exported, 
+        # but their old records are kept.
+        error_titles.update(deferred_titles)
         return error_titles
     
     def export_titles_dump(self, titles_dump: AnimeByWatchList) -> typ.NoReturn:
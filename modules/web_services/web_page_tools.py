@@ -3,7 +3,9 @@
 import os
 import types
 import inspect
+import threading
 import typing as typ
+from functools import partial
 from billiard import Queue, cpu_count
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
@@ -13,17 +15,23 @@ from logging import Logger
 #Custom imports
 from configs.settings import (
     WEB_PAGES_DIR, RELOAD_WEB_PAGES, USE_MULTITHREADS,
-    UPDATE_JSON_DUMPS, TITLES_DUMP_KEY_ERRORS
+    UPDATE_JSON_DUMPS, TITLES_DUMP_KEY_ERRORS, USE_FETCH_POOL,
+    USE_PAGE_MANIFEST
 )
 from lib.types import (
-    WatchListType, WebPage, RequestMethod, AnimeInfoType
+    WatchListType, WebPage, RequestMethod, AnimeInfoType,
+    RequestClass, FetchError, Response, WebPageBytes
 )
 from lib.interfaces import (
-    ISiteSettings, IWebPageParser, 
+    ISiteSettings, IWebPageParser, IPageStore,
     IConnectedModule, IDataHandler, IProgressHandler
 )
 from lib.tools import OutputLogger, ListenerLogger
 from lib.requests_connections import RequestsConnections
+from lib.fetch_pool import FetchPool
+from lib.single_flight import SingleFlight
+from lib.page_store import PageStore
+from lib.page_manifest import PageManifest
 from modules.flask.handlers import DefaultDataHandler
 #--Finish imports block
 
@@ -36,11 +44,18 @@ class WebPageService:
     _module_name: str
     _queue: Queue
     _logger: Logger
+    _req_conn: RequestsConnections
     config_module: ISiteSettings
     url_domain: HttpUrl
     url_wath_lists: AnyHttpUrl
     dir_name: [str, Path]
     dir_path: Path
+    _page_store: IPageStore
+    _validator_headers: typ.Dict[str, str] = dict({
+        "ETag": "If-None-Match",
+        "Last-Modified": "If-Modified-Since",
+    })
+    _single_flight: SingleFlight = SingleFlight()
 
     def __init__(self,
                  module_name: str,
@@ -54,12 +69,27 @@ class WebPageService:
                                     name="web_serv"
                                    ).logger
         self.config_module = config_module
+        self._req_conn = None
+        self._state = threading.local()
 
         self.url_domain = self.config_module.url_domain
         self.url_wath_lists = self.config_module.url_wath_lists
 
         self.dir_name = self.url_domain.replace('.', '_')
         self.dir_path = os.path.join(WEB_PAGES_DIR, self.dir_name)
+        self._page_store = PageStore.get_store(self.dir_path)
+
+    def _get_req_conn(self) -> RequestsConnections:
+        '''
+        Returns the connections object of the service.
+        Created once, so its pooled sessions 
+        and proxy list are reused for all pages.
+        '''
+        if self._req_conn is None:
+            self._req_conn = RequestsConnections(self._module_name, 
+                                                 self.config_module,
+                                                 self._queue)
+        return self._req_conn
 
     def _get_page_filename(self, type: WatchListType,
                            page_filename: str) -> str:
@@ -85,9 +115,8 @@ class WebPageService:
                                page_filename: str) -> bool:
         '''Checks if the web-page file is exist.'''
         file_name = self._get_page_filename(type, page_filename)
-        file_path = self._get_filepath(file_name)
 
-        is_exist = os.path.exists(file_path)
+        is_exist = self._page_store.exists(file_name)
         if is_exist:
             self._logger.info(f"Web-page file exist. ({file_name})")
         else:
@@ -96,57 +125,93 @@ class WebPageService:
         return is_exist
 
     def load_web_page_file(self, type: WatchListType,
-                           page_filename: str) -> WebPage:
+                           page_filename: str, as_bytes: bool = False
+                          ) -> typ.Union[WebPage, WebPageBytes]:
         '''
         Loads a web page from a file if it exists.
+        The page is returned undecoded as bytes if it is requested,
+        to be passed to the parser without a str copy.
         '''
-        web_page = None
         file_name = self._get_page_filename(type, page_filename)
-        file_path = self._get_filepath(file_name)
         self._logger.info(f'Loading web-page file "{file_name}"...')
 
-        try:
-            with open(file_path, 'r') as file:
-                web_page = file.read()
-
-            self._logger.success("...loaded.\n")
-            if not web_page:
-                self._logger.error("...error. File is empty.\n")
-
-        except:
+        if as_bytes:
+            web_page = self._page_store.load_bytes(file_name)
+        else:
+            web_page = self._page_store.load(file_name)
+        if web_page is None:
             self._logger.error("...error.\n")
+        elif not web_page:
+            self._logger.error("...error. File is empty.\n")
+        else:
+            self._logger.success("...loaded.\n")
 
         return web_page
 
     def save_web_page(self, type: WatchListType, page_filename: str,
-                      web_page: WebPage) -> bool:
+                      web_page: WebPage, 
+                      request_class: RequestClass = None,
+                      url: AnyHttpUrl = None,
+                      response: Response = None) -> bool:
         '''
-        Saves the html-response of web-page to the file.
+        Saves the html-response of web-page to the store
+        with the validator headers of the response.
+        The page is kept by the TTL of its request class.
         '''
         file_name = self._get_page_filename(type, page_filename)
-        file_path = self._get_filepath(file_name)
-
-        if not os.path.exists(self.dir_path):
-            self._logger.info(
-                f'Directory "{self.dir_name}" not exists. Creating...')
-            try:
-                os.mkdir(self.dir_path)
-                self._logger.success("...done.")
-            except:
-                self._logger.error("...error.")
-                return False
+        if request_class is None:
+            request_class = RequestClass.TITLE_PAGE if page_filename \
+                            else RequestClass.LIST_PAGE
+        validators = None
+        if response is not None:
+            validators = {
+                key: response.headers[key]
+                for key in self._validator_headers.keys()
+                if key in response.headers
+            }
 
         self._logger.info(f'Saving the html-response to "{file_name}"...')
-        try:
-            with open(file_path, 'w') as file:
-                file.write(str(web_page))
-            self._logger.success("...saved.")
-        except:
+        if not self._page_store.save(file_name, web_page, request_class, url,
+                                     validators):
             self._logger.error("...error.")
             return False
-
+        
+        self._logger.success("...saved.")
         return True
 
+    def refresh_web_page(self, type: WatchListType, 
+                         page_filename: str) -> bool:
+        '''
+        Renews the fetch time of the not modified web-page in the store.
+        Returns False if the page is not stored anymore.
+        '''
+        file_name = self._get_page_filename(type, page_filename)
+        return self._page_store.touch(file_name)
+
+    def _get_conditional_headers(self, type: WatchListType, 
+                                 page_filename: str) -> typ.Dict[str, str]:
+        '''
+        Returns the headers for a conditional request 
+        if the web-page is stored with validators.
+        The expired page is requested with them too.
+        '''
+        if not page_filename and not type: return None
+            
+        file_name = self._get_page_filename(type, page_filename)
+        validators = self._page_store.load_validators(file_name)
+        headers = {
+            self._validator_headers[key]: value
+            for key, value in validators.items()
+        }
+        return headers if headers else None
+
+    def get_last_error(self) -> typ.Union[FetchError, None]:
+        '''
+        Returns the class of the last fetch failure 
+        of the current thread.
+        '''
+        return getattr(self._state, 'last_error', None)
+
     def get_preparing(self, **kwargs) -> bool:
         '''
         Performs the starting preparation of the configuration module.
@@ -165,7 +230,7 @@ class WebPageService:
 
         if not res:
             web_page = req_conn.get_web_page(type, self.config_module.url_general,
-                                             RequestMethod.GET)
+                                             RequestMethod.GET, RequestClass.AUTH)
             res = self.config_module.make_preparing(web_page, **kwargs)
 
         if not res:
@@ -174,29 +239,90 @@ class WebPageService:
             self._logger.success("...preparing done.\n")
         return res
 
+    def _get_flight_key(self, type: WatchListType, page_filename: str,
+                        url: AnyHttpUrl) -> typ.Tuple[str, ...]:
+        '''
+        Builds the key of the in-flight request by the normalized url.
+        The page file name is included, so the page is saved 
+        by the request that shares it.
+        '''
+        target = SingleFlight.normalize_url(url) if url else type.value
+        return (self._module_name, target, page_filename or '')
+
+    def _fetch_web_page(self, type: WatchListType, page_filename: str,
+                        url: AnyHttpUrl, method: RequestMethod,
+                        save_page: bool, request_class: RequestClass
+                       ) -> typ.Tuple[WebPage, typ.Union[FetchError, None]]:
+        '''
+        Requests the web-page and saves it with its validators.
+        The not modified page is renewed in the store,
+        and requested again without validators if it is gone.
+        Returns the web-page and the class of the fetch failure.
+        '''
+        web_page = None
+        req_conn = self._get_req_conn()
+        
+        headers = None
+        if method is RequestMethod.GET and save_page:
+            headers = self._get_conditional_headers(type, page_filename)
+            
+        response = req_conn.get_response(type, url, method, 
+                                         request_class, headers)
+        error = req_conn.get_last_error()
+
+        if response is not None and response.status_code == 304:
+            self._logger.info("Web-page not modified. Using the cache...")
+            if self.refresh_web_page(type, page_filename):
+                web_page = self.load_web_page_file(type, page_filename)
+            if web_page:
+                return web_page, error
+            
+            self._logger.warning("...cached web-page is gone. Requesting it again...")
+            response = req_conn.get_response(type, url, method, request_class)
+            error = req_conn.get_last_error()
+
+        if response is not None and response.status_code != 304:
+            web_page = response.text
+            
+            if web_page and save_page:
+                _ = self.save_web_page(type, page_filename, web_page,
+                                       request_class, url, response)
+
+        return web_page, error
+
     def get_web_page_file(self,
                           type: WatchListType,
                           page_filename: str = None,
                           url: AnyHttpUrl = None,
                           method: RequestMethod = RequestMethod.GET,
                           save_page: bool = True,
-                          reload_page: bool = False) -> WebPage:
+                          reload_page: bool = False,
+                          request_class: RequestClass = None,
+                          as_bytes: bool = False
+                         ) -> typ.Union[WebPage, WebPageBytes]:
         '''
         Returns the web-page by passing all the checks.
+        The cached page is returned as bytes if it is requested.
         '''
         web_page = None
-        req_conn = RequestsConnections(self._module_name, self.config_module,
-                                       self._queue)
+        self._state.last_error = None
                     
         if not RELOAD_WEB_PAGES and not reload_page and \
                               self.is_exist_web_page_file(type, page_filename):
-            web_page = self.load_web_page_file(type, page_filename)
+            web_page = self.load_web_page_file(type, page_filename, as_bytes)
 
         else:
-            web_page = req_conn.get_web_page(type, url, method)
-
-            if web_page and save_page:
-                _ = self.save_web_page(type, page_filename, web_page)
+            fetch = lambda: self._fetch_web_page(type, page_filename, url,
+                                                 method, save_page,
+                                                 request_class)
+            if method is RequestMethod.GET:
+                key = self._get_flight_key(type, page_filename, url)
+                (web_page, error), is_shared = self._single_flight.do(key, fetch)
+                if is_shared:
+                    self._logger.info("Web-page received by the in-flight request.")
+            else:
+                web_page, error = fetch()
+            self._state.last_error = error
 
         return web_page
 
@@ -213,6 +339,7 @@ class WebPageParser(IWebPageParser):
     _type: WatchListType
     _web_serv: WebPageService
     _data: IDataHandler
+    _manifest: typ.Union[PageManifest, None]
     progress_handler: IProgressHandler
 
     def __init__(self,
@@ -228,6 +355,7 @@ class WebPageParser(IWebPageParser):
         self._type = type
         self._queue = queue
         self.progress_handler = progress_handler
+        self._deferred_items = dict()
                      
         module_name = module.module_name
         url_general = self._config_mod.url_general
@@ -239,6 +367,12 @@ class WebPageParser(IWebPageParser):
         self._web_serv = WebPageService(module_name, 
                                         self._config_mod,
                                         self._queue)
+        self._web_serv_lock = threading.Lock()
+        self._manifest = None
+        if USE_PAGE_MANIFEST and self._type is not None:
+            self._manifest = PageManifest(
+                self._web_serv.dir_path, self._type,
+                PageManifest.make_version(self._parser_mod))
 
         self._parser_mod.__init__(self, url_general, self._queue)
         self._init_methods()
@@ -261,14 +395,24 @@ class WebPageParser(IWebPageParser):
 
     def log_parser_errors(
             self,
-            error_web_pages: typ.Dict[str, AnyHttpUrl]) -> typ.NoReturn:
-        '''Prints error messages for aborted web-pages.'''
+            error_web_pages: typ.Dict[str, AnyHttpUrl],
+            deferred_web_pages: typ.Dict[str, AnyHttpUrl] = dict()
+        ) -> typ.NoReturn:
+        '''
+        Prints error messages for aborted and deferred web-pages.
+        The deferred web-pages are not parsed, their old records are kept.
+        '''
         for key, url in error_web_pages.items():
             self._logger.critical(
                 f"Aborted:\n* Page key: {key};\n* Page URL: {url}\n")
+        for key, url in deferred_web_pages.items():
+            self._logger.error(
+                f"Not parsed, deferred twice:\n* Page key: {key};\n" + 
+                f"* Page URL: {url}\n")
 
         self._data.prepare_data(TITLES_DUMP_KEY_ERRORS)
         self._data[TITLES_DUMP_KEY_ERRORS].update(error_web_pages)
+        self._data[TITLES_DUMP_KEY_ERRORS].update(deferred_web_pages)
 
     def _is_update_needed(self, anime_key: str) -> bool:
         '''Check the need to update the json dump.'''
@@ -279,19 +423,37 @@ class WebPageParser(IWebPageParser):
                 return False
         return True
 
+    def _get_web_serv(self) -> WebPageService:
+        '''
+        Returns the web service bound to the current logging queue.
+        The service is rebuilt only when the queue is changed.
+        It is taken before the jobs are submitted 
+        and is passed into each job.
+        '''
+        with self._web_serv_lock:
+            if self._web_serv._queue is not self._queue:
+                self._web_serv = WebPageService(self._module_name, 
+                                                self._config_mod,
+                                                self._queue)
+            return self._web_serv
+
     def _get_web_page(self, anime_key: str,
-                      anime_url: AnyHttpUrl) -> WebPage:
+                      anime_url: AnyHttpUrl,
+                      web_serv: WebPageService
+                     ) -> typ.Union[WebPage, WebPageBytes]:
         '''Uses the queue for logging, if necessary, and returns web_page.'''
-        web_serv = self._web_serv
-        if self._queue:
-            web_serv = WebPageService(self._module_name, self._config_mod,
-                                      self._queue)
-
-        web_page = web_serv.get_web_page_file(self._type,
-                                              page_filename=anime_key,
-                                              url=anime_url)
+        web_page = web_serv.get_web_page_file(
+                                    self._type,
+                                    page_filename=anime_key,
+                                    url=anime_url,
+                                    request_class=RequestClass.TITLE_PAGE,
+                                    as_bytes=True)
         return web_page
 
+    def _is_retryable_failure(self, web_serv: WebPageService) -> bool:
+        '''Checks if the last fetch of the thread can be retried.'''
+        return web_serv.get_last_error() is FetchError.RETRYABLE
+
     def _make_error_title(self, anime_key: str) -> AnimeInfoType:
         '''Makes a data structure for the error title.'''
         args = [None] * AnimeInfoType.fields_count()
@@ -299,9 +461,31 @@ class WebPageParser(IWebPageParser):
         _data.name = anime_key
         return _data
 
+    def _get_anime_record(self, anime_key: str, anime_url: AnyHttpUrl,
+                          web_page: typ.Union[WebPage, WebPageBytes]
+                         ) -> typ.Dict[str, typ.Any]:
+        '''
+        Returns the stored record if the web-page is not changed
+        since it was parsed. Otherwise, parses the web-page.
+        '''
+        if self._manifest is None:
+            return self.get_anime_info(web_page).asdict()
+
+        page_hash = PageManifest.hash_page(web_page)
+        record = self._manifest.get_record(
+                    anime_url, page_hash,
+                    self._data[self._type.value].get(anime_key))
+        if record is None:
+            record = self.get_anime_info(web_page).asdict()
+        else:
+            self._logger.info("...web-page is not changed, record reused...")
+        _ = self._manifest.update(anime_url, page_hash, record, anime_key)
+        return record
+
     @ListenerLogger.send_stop_msg
     def get_anime_info_json(
-        self, anime_item: typ.Tuple[str, AnyHttpUrl]
+        self, anime_item: typ.Tuple[str, AnyHttpUrl], 
+        web_serv: WebPageService
     ) -> typ.Union[typ.Dict[str, AnyHttpUrl], None]:
         '''Updates JSON DUMP if there is no anime info.'''
         anime_key, anime_url = anime_item
@@ -310,24 +494,50 @@ class WebPageParser(IWebPageParser):
         if not self._is_update_needed(anime_key):
             return None
 
-        web_page = self._get_web_page(*anime_item)
+        web_page = self._get_web_page(*anime_item, web_serv)
+        if not web_page and self._is_retryable_failure(web_serv):
+            self._logger.warning("...temporary failure. The title is deferred.\n")
+            self._deferred_items[anime_key] = anime_url
+            return None
+            
         if not web_page:
             _data = self._make_error_title(anime_key)
             return dict({anime_key: _data.asdict()})
 
-        anime_info = self.get_anime_info(web_page)
-        self._data[self._type.value].update({anime_key: anime_info.asdict()})
+        anime_info = self._get_anime_record(anime_key, anime_url, web_page)
+        self._data[self._type.value].update({anime_key: anime_info})
         self.progress_handler.increase_progress_curr()
 
         self._logger.info("...JSON dump updated.\n")
         return None
 
+    @ListenerLogger.listener_preparing
+    def get_anime_data_in_fetch_pool(
+        self, all_anime_urls: typ.Dict[str, AnyHttpUrl]
+    ) -> typ.Dict[str, AnyHttpUrl]:
+        '''
+        Gets anime data in the fetch pool.
+        A failed job makes an error web-page.
+        '''
+        error_web_pages = dict()
+        pool = FetchPool(queue=self._queue)
+        job = partial(self.get_anime_info_json, web_serv=self._get_web_serv())
+        
+        items = pool.map(job, all_anime_urls.items(),
+                         on_error=lambda anime_item, _: dict([anime_item]))
+        for item in items:
+            if item: 
+                error_web_pages.update(item)
+
+        return error_web_pages
+
     @ListenerLogger.listener_preparing
     def get_anime_data_in_multithreads(
         self, all_anime_urls: typ.Dict[str, AnyHttpUrl]
     ) -> typ.Dict[str, AnyHttpUrl]:
         '''Gets anime data in multi-threads.'''
         error_web_pages = dict()
+        web_serv = self._get_web_serv()
 
         with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
             futures = []
@@ -335,7 +545,8 @@ class WebPageParser(IWebPageParser):
             for anime_item in all_anime_urls.items():
                 futures.append(
                     executor.submit(self.get_anime_info_json,
-                                    anime_item=anime_item))
+                                    anime_item=anime_item,
+                                    web_serv=web_serv))
 
             for future in as_completed(futures):
                 item = future.result()
@@ -349,15 +560,36 @@ class WebPageParser(IWebPageParser):
     ) -> typ.Dict[str, AnyHttpUrl]:
         '''Gets anime data in one stream.'''
         error_web_pages = dict()
+        web_serv = self._get_web_serv()
         
         for anime_item in all_anime_urls.items():
-            item = self.get_anime_info_json(anime_item)
+            item = self.get_anime_info_json(anime_item, web_serv)
             
             if item: 
                 error_web_pages.update(item)
 
         return error_web_pages
 
+    def get_deferred_anime_data(self) -> typ.Tuple[typ.Dict[str, AnyHttpUrl],
+                                                   typ.Dict[str, AnyHttpUrl]]:
+        '''
+        Retries the titles deferred by temporary failures once more.
+        Returns the error titles and the titles deferred again.
+        The old records of the titles deferred again stay untouched.
+        '''
+        deferred_items = self._deferred_items
+        self._deferred_items = dict()
+        if not deferred_items: return dict(), dict()
+
+        self._logger.info(f"Retrying deferred titles ({len(deferred_items)})...")
+        error_web_pages = self.get_anime_data_in_order(deferred_items)
+        
+        deferred_items, self._deferred_items = self._deferred_items, dict()
+        if deferred_items:
+            self._logger.warning("...titles still deferred: " + 
+                                 f"{len(deferred_items)}.\n")
+        return error_web_pages, deferred_items
+
     def _edit_old_data(self, 
                        titles_data: typ.Dict[str, AnyHttpUrl], 
                        error_web_pages: typ.Dict[str, AnyHttpUrl]
@@ -377,30 +609,57 @@ class WebPageParser(IWebPageParser):
             filter(self._data[self._type.value].__contains__, old_keys))
         )
 
+    def _is_watchlist_unchanged(
+            self, all_anime_urls: typ.Dict[str, AnyHttpUrl]) -> bool:
+        '''
+        Checks if the titles of the watchlist are the same as in the last run
+        and all of their records are fresh.
+        '''
+        if self._manifest is None: return False
+        return self._manifest.is_unchanged(all_anime_urls,
+                                           self._data[self._type.value])
+
     def get_anime_data(self, web_page: WebPage) -> typ.NoReturn:
         '''Gets anime data for all links.'''
         error_web_pages = dict()
         all_anime_urls = self.get_typed_anime_list(web_page)
         titles_count = len(all_anime_urls.keys())
         
+        if self._is_watchlist_unchanged(all_anime_urls):
+            self._logger.info("Watchlist is not changed and its titles are fresh. "
+                              "Titles are skipped.\n")
+            self.progress_handler.initialize_progress_curr(watch_list=self._type,
+                                                           n_now=titles_count,
+                                                           n_max=titles_count)
+            self.progress_handler.increase_progress_all(titles_count)
+            return
+        
         self.progress_handler.initialize_progress_curr(watch_list=self._type, 
                                                        n_max=titles_count)
 
-        if USE_MULTITHREADS:
+        if USE_FETCH_POOL:
+            error_web_pages = self.get_anime_data_in_fetch_pool(all_anime_urls)
+        elif USE_MULTITHREADS:
             error_web_pages = self.get_anime_data_in_multithreads(
                                                         all_anime_urls)
         else:
             error_web_pages = self.get_anime_data_in_order(all_anime_urls)
+        deferred_errors, deferred_web_pages = self.get_deferred_anime_data()
+        error_web_pages.update(deferred_errors)
 
         _ = self._edit_old_data(all_anime_urls, error_web_pages)
-        _ = self.log_parser_errors(error_web_pages)
+        _ = self.log_parser_errors(error_web_pages, deferred_web_pages)
+        if self._manifest is not None:
+            _ = self._manifest.retain(all_anime_urls.values())
+            _ = self._manifest.set_fingerprint(all_anime_urls)
 
     def parse_typed_watchlist(self) -> typ.NoReturn:
         '''Parses the data of all anime titles in a typed watchlist.'''
         self._logger.info('Getting the typed list webpage...')
-        web_page = self._web_serv.get_web_page_file(type=self._type, 
-                                                    reload_page=True, 
-                                                    save_page=False)
+        web_page = self._web_serv.get_web_page_file(
+                                    type=self._type, 
+                                    reload_page=True, 
+                                    request_class=RequestClass.LIST_PAGE)
         if web_page is None: 
             self._logger.error('...webpage not received.')
             return
@@ -408,10 +667,14 @@ class WebPageParser(IWebPageParser):
 
         _ = self._data.load_data()
         _ = self._data.prepare_data(self._type)
+        if self._manifest is not None:
+            _ = self._manifest.load()
         
         _ = self.get_anime_data(web_page)
 
         _ = self._data.save_data()
+        if self._manifest is not None:
+            _ = self._manifest.save()
 
     def get_all_titles_count(self) -> int:
         '''
@@ -420,10 +683,12 @@ class WebPageParser(IWebPageParser):
         '''
         self._logger.info('Getting a web page with a total list of titles...')
         url = self._config_mod.url_wath_lists
-        web_page = self._web_serv.get_web_page_file(type=None, 
-                                                    url=url,
-                                                    reload_page=True, 
-                                                    save_page=False)
+        web_page = self._web_serv.get_web_page_file(
+                                    type=None, 
+                                    url=url,
+                                    reload_page=True, 
+                                    save_page=False,
+                                    request_class=RequestClass.LIST_PAGE)
         if web_page is None: 
             self._logger.error('...webpage not received.')
             return 0
@@ -20,6 +20,8 @@ then
         echo "...STOPPING..." | tee -a $celery_log_file
         ps auxww | grep 'celery worker' | awk '{print $2}' | xargs kill -9 2>/dev/null
         wait $!
+        ps auxww | grep "[c]elery -A $celery_tasks beat" | awk '{print $2}' | xargs kill 2>/dev/null
+        wait $!
     fi
 fi
 if [[ "$is_running" != *"OK"* ]] || $restart_celery
@@ -28,6 +30,13 @@ then
     echo "...STARTING CELERY..." | tee -a $celery_log_file
     (celery -A $celery_tasks worker -P processes --loglevel=info >> $celery_log_file 2>>$celery_log_file &)
     
+    # Starting the single Celery beat
+    if [[ -z "$(ps auxww | grep "[c]elery -A $celery_tasks beat")" ]]
+    then
+        echo "...STARTING CELERY BEAT..." | tee -a $celery_log_file
+        (celery -A $celery_tasks beat -s var/celerybeat-schedule --loglevel=info >> $celery_log_file 2>>$celery_log_file &)
+    fi
+    
     # Waiting for service start
     for (( i=0; i<5; ++i )); do
         if [[ "$(celery -A $celery_tasks status 2>/dev/null)" = *"OK"* ]]; then break; fi
@@ -0,0 +1,86 @@
+#--Start imports block
+#System imports
+import os
+import sys
+import hashlib
+import typing as typ
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#Custom imports
+import lib.tools
+from lib.tools import OutputLogger
+from diagnostic.stub_sites import (
+    ThreadingSocksServer, SocksStandInHandler, start_in_thread
+)
+#--Finish imports block
+
+lib.tools.WRITE_LOG_TO_FILE = False
+OutputLogger.base_configure_logging()
+
+
+#--Start functional block
+class StaticHandler(BaseHTTPRequestHandler):
+    '''
+    Serves the bodies by the path with their ETag. 
+    Unknown paths are not found, not modified bodies are not sent.
+    '''
+    protocol_version = "HTTP/1.1"
+    bodies: typ.Dict[str, bytes] = dict()
+
+    def do_GET(self):
+        body = self.bodies.get(self.path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"' if body else None
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            body = None
+        else:
+            self.send_response(200 if body is not None else 404)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body or b"")))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_site() -> typ.Iterator[typ.Tuple[str, typ.Dict[str, bytes]]]:
+    '''Starts a local site. Yields its url and the bodies by the path.'''
+    bodies = dict({"/": b"ok"})
+    handler = type("Handler", (StaticHandler,), dict(bodies=bodies))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    _ = start_in_thread(server)
+    yield f"http://127.0.0.1:{server.server_address[1]}", bodies
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def socks_proxies() -> typ.Iterator[typ.List[str]]:
+    '''Starts SOCKS5 and SOCKS4 stand-ins. Yields them as proxy urls.'''
+    servers, proxies = list(), list()
+    for protocol in ("socks5", "socks4"):
+        server = ThreadingSocksServer(("127.0.0.1", 0), SocksStandInHandler)
+        _ = start_in_thread(server)
+        servers.append(server)
+        proxies.append(f"{protocol}://127.0.0.1:{server.server_address[1]}")
+    yield proxies
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def dead_proxy() -> str:
+    '''Returns a proxy url with a closed port.'''
+    server = ThreadingSocksServer(("127.0.0.1", 0), SocksStandInHandler)
+    port = server.server_address[1]
+    server.server_close()
+    return f"socks5://127.0.0.1:{port}"
+
+#--Finish functional block
@@ -0,0 +1,42 @@
+#--Start imports block
+#System imports
+import time
+import threading
+
+#Custom imports
+from lib.fetch_pool import FetchPool
+#--Finish imports block
+
+
+#--Start functional block
+def test_failed_job_gives_error_entry():
+    def job(item):
+        key, url = item
+        if key == "bad": raise ValueError(url)
+        return None
+
+    items = dict({"good": "https://a.b/good", "bad": "https://a.b/bad"})
+    results = FetchPool(size=2).map(job, items.items(),
+                                    on_error=lambda item, _: dict([item]))
+    assert len(results) == 2
+    assert dict({"bad": "https://a.b/bad"}) in results
+
+def test_jobs_in_flight_are_bounded_by_size():
+    lock = threading.Lock()
+    in_flight, peak = 0, 0
+
+    def job(item):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return item
+
+    results = FetchPool(size=4).map(job, range(20), on_error=None)
+    assert sorted(results) == list(range(20))
+    assert peak == 4
+
+#--Finish functional block
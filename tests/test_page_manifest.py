@@ -0,0 +1,44 @@
+#--Start imports block
+#Custom imports
+from lib.page_manifest import PageManifest
+from lib.types import WatchListType
+#--Finish imports block
+
+
+#--Start functional block
+TYPE = WatchListType.WATCH
+URL = "https://example.test/anime/1"
+RECORD = {"name": "title"}
+
+class OldParser:
+    def parse(self):
+        return 1
+
+class NewParser:
+    def parse(self):
+        return 2
+
+
+def save_manifest(tmp_path, version: str) -> str:
+    manifest = PageManifest(tmp_path, TYPE, version)
+    page_hash = PageManifest.hash_page("<p>1</p>")
+    _ = manifest.update(URL, page_hash, RECORD, "1")
+    assert manifest.save()
+    return page_hash
+
+def test_record_is_reused_by_same_parser(tmp_path):
+    version = PageManifest.make_version(OldParser)
+    page_hash = save_manifest(tmp_path, version)
+    manifest = PageManifest(tmp_path, TYPE, version)
+    _ = manifest.load()
+    assert manifest.get_record(URL, page_hash, RECORD) == RECORD
+
+def test_record_is_dropped_for_changed_parser(tmp_path):
+    assert PageManifest.make_version(OldParser) != \
+           PageManifest.make_version(NewParser)
+    page_hash = save_manifest(tmp_path, PageManifest.make_version(OldParser))
+    manifest = PageManifest(tmp_path, TYPE, PageManifest.make_version(NewParser))
+    _ = manifest.load()
+    assert manifest.get_record(URL, page_hash, RECORD) is None
+
+#--Finish functional block
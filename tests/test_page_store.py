@@ -0,0 +1,159 @@
+#--Start imports block
+#System imports
+import os
+import time
+import sqlite3
+
+#Custom imports
+import lib.page_store as page_store
+from lib.page_store import (
+    PageStore, FilePageStore, CompressedPageStore, SqlitePageStore
+)
+from lib.types import RequestClass
+#--Finish imports block
+
+
+#--Start functional block
+def make_page(index: int) -> str:
+    '''Returns a page which is not compressed well.'''
+    return os.urandom(512).hex() + f"<p>{index}</p>"
+
+def get_freelist_count(dir_path) -> int:
+    connection = sqlite3.connect(os.path.join(dir_path, "pages.sqlite3"))
+    try:
+        return connection.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_default_store_keeps_validators(tmp_path):
+    store = PageStore.get_store(str(tmp_path))
+    assert isinstance(store, FilePageStore)
+    validators = {"ETag": '"abc"'}
+    _ = store.save("a.html", "<p>a</p>", RequestClass.LIST_PAGE, None, validators)
+    assert store.load_validators("a.html") == validators
+    _ = store.save("a.html", "<p>b</p>", RequestClass.LIST_PAGE)
+    assert store.load_validators("a.html") == dict()
+
+def test_file_store_keeps_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_store, "WEB_PAGES_ENCODING", "cp1251")
+    store = FilePageStore(str(tmp_path))
+    assert store.save("a.html", "<p>тест</p>")
+    assert store.load("a.html") == "<p>тест</p>"
+    assert store.load_bytes("a.html") == "<p>тест</p>".encode("cp1251")
+    assert store.load_bytes("b.html") is None
+
+def test_sqlite_save_and_load(tmp_path):
+    store = SqlitePageStore(str(tmp_path), batch_size=2)
+    assert store.save("a.html", "<p>тест</p>", RequestClass.TITLE_PAGE)
+    assert store.exists("a.html")
+    assert store.load("a.html") == "<p>тест</p>"
+    assert store.flush()
+    assert SqlitePageStore(str(tmp_path)).load("a.html") == "<p>тест</p>"
+    assert not store.exists("b.html")
+
+def test_sqlite_exists_does_not_read_body(tmp_path):
+    store = SqlitePageStore(str(tmp_path))
+    _ = store.save("a.html", "<p>a</p>", RequestClass.TITLE_PAGE)
+    _ = store.flush()
+    queries = list()
+    store._get_connection().set_trace_callback(queries.append)
+    assert store.exists("a.html")
+    assert queries and all("body" not in query for query in queries)
+
+def test_sqlite_legacy_page_is_moved_in(tmp_path):
+    validators = {"ETag": '"old"'}
+    _ = FilePageStore(str(tmp_path)).save("old.html", "<p>old</p>", 
+                                          validators=validators)
+    store = SqlitePageStore(str(tmp_path))
+    assert store.exists("old.html")
+    assert store.load("old.html") == "<p>old</p>"
+    assert not (tmp_path / "old.html").exists()
+    assert not (tmp_path / "old.html.meta").exists()
+    assert store.exists("old.html")
+    assert store.load_validators("old.html") == validators
+
+def test_sqlite_compact_evicts_and_shrinks(tmp_path):
+    store = SqlitePageStore(str(tmp_path), max_size=50 * 1024)
+    for index in range(300):
+        _ = store.save(f"{index}.html", make_page(index), RequestClass.TITLE_PAGE)
+    _ = store.flush()
+
+    evicted, removed = store.compact()
+    assert evicted == removed
+    assert 150 < evicted < 300
+    assert get_freelist_count(tmp_path) == 0
+    assert store.exists("299.html")
+    assert not store.exists("0.html")
+    assert store.compact() == (0, 0)
+
+def test_sqlite_keeps_validators_and_renews_expired_page(tmp_path):
+    store = SqlitePageStore(str(tmp_path))
+    validators = {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    _ = store.save("a.html", "<p>a</p>", RequestClass.TITLE_PAGE, None, validators)
+    assert store.load_validators("a.html") == validators
+    _ = store.flush()
+    with store._get_connection() as connection:
+        _ = connection.execute("UPDATE pages SET fetched_at = 0")
+    
+    assert not store.exists("a.html")
+    assert store.load_validators("a.html") == validators
+    assert store.touch("a.html")
+    assert store.load("a.html") == "<p>a</p>"
+    assert not store.touch("b.html")
+    assert store.load_validators("b.html") == dict()
+
+def test_compressed_save_and_load_shares_bodies(tmp_path):
+    store = CompressedPageStore(str(tmp_path))
+    assert store.save("a.html", "<p>тест</p>", RequestClass.TITLE_PAGE)
+    assert store.save("b.html", "<p>тест</p>", RequestClass.TITLE_PAGE)
+    reopened = CompressedPageStore(str(tmp_path))
+    assert reopened.load("a.html") == reopened.load("b.html") == "<p>тест</p>"
+    assert len(list((tmp_path / "objects").rglob("*.*"))) == 1
+
+def test_compressed_compact_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_store, "WEB_PAGES_ORPHAN_GRACE", -1)
+    store = CompressedPageStore(str(tmp_path), max_size=20 * 1024)
+    for index in range(100):
+        _ = store.save(f"{index}.html", make_page(index), RequestClass.TITLE_PAGE)
+    _ = store._append_records([{'name': "0.html", 'accessed_at': time.time() + 60}])
+
+    evicted, removed = CompressedPageStore(str(tmp_path), 
+                                           max_size=20 * 1024).compact()
+    assert evicted == removed
+    assert 30 < evicted < 100
+    assert len(list((tmp_path / "objects").rglob("*.*"))) == 100 - evicted
+    reopened = CompressedPageStore(str(tmp_path))
+    assert reopened.exists("0.html") and reopened.exists("99.html")
+    assert not reopened.exists("1.html")
+    assert store.compact() == (0, 0)
+
+def test_compressed_compact_evicts_expired(tmp_path, monkeypatch):
+    store = CompressedPageStore(str(tmp_path))
+    _ = store.save("a.html", "<p>a</p>", RequestClass.TITLE_PAGE)
+    _ = store.save("b.html", "<p>b</p>", RequestClass.LIST_PAGE)
+    monkeypatch.setattr(page_store, "WEB_PAGES_TTL", 
+                        dict({RequestClass.LIST_PAGE.value: -1}))
+    assert store.compact()[0] == 1
+    assert store.exists("a.html") and not store.exists("b.html")
+
+def test_compressed_keeps_validators_and_renews_expired_page(tmp_path):
+    store = CompressedPageStore(str(tmp_path))
+    validators = {"ETag": '"abc"'}
+    _ = store.save("a.html", "<p>a</p>", RequestClass.TITLE_PAGE, None, validators)
+    _ = store._append_records([{'name': "a.html", 'stored_at': 0, 'accessed_at': 0}])
+    
+    reopened = CompressedPageStore(str(tmp_path))
+    assert not reopened.exists("a.html")
+    assert reopened.load_validators("a.html") == validators
+    assert reopened.touch("a.html")
+    assert CompressedPageStore(str(tmp_path)).load("a.html") == "<p>a</p>"
+
+def test_compressed_touch_fails_without_body(tmp_path):
+    store = CompressedPageStore(str(tmp_path))
+    _ = store.save("a.html", "<p>a</p>", RequestClass.TITLE_PAGE)
+    entry = store._index["a.html"]
+    os.remove(store._get_object_path(entry.hash, entry.codec))
+    assert not store.touch("a.html")
+
+#--Finish functional block
@@ -0,0 +1,75 @@
+#--Start imports block
+#System imports
+import os
+import time
+import pytest
+
+#Custom imports
+import lib.proxy_checker as proxy_checker
+from lib.proxy_checker import ProxyChecker
+from lib.types import ProxyCheck
+#--Finish imports block
+
+
+#--Start functional block
+@pytest.fixture
+def checker(tmp_path, monkeypatch, http_site) -> ProxyChecker:
+    '''Returns the checker of a module with the lists in a temporary dir.'''
+    monkeypatch.setattr(proxy_checker, "PROXY_LISTS_DIR", str(tmp_path))
+    monkeypatch.setattr(proxy_checker, "PROXY_ENOUGH_COUNT", 1)
+    monkeypatch.setattr(ProxyChecker, "local_proxy_files",
+                        dict({"socks5": "socks5.txt"}))
+    monkeypatch.setattr(ProxyChecker, "online_proxy_lists",
+                        dict({"socks5.txt": http_site[0] + "/socks5.txt"}))
+    prx_chk = ProxyChecker("test_module")
+    prx_chk._correct_proxy_filename = str(tmp_path / "correct")
+    prx_chk._checks_filename = str(tmp_path / "checks.json")
+    prx_chk.url_to_check = http_site[0] + "/"
+    return prx_chk
+
+def read_lines(path) -> list:
+    with open(path) as file:
+        return file.read().split()
+
+
+def test_stream_early_exit_keeps_local_list(checker, tmp_path, http_site,
+                                            socks_proxies):
+    hosts = [proxy.partition("://")[2] for proxy in socks_proxies]
+    http_site[1]["/socks5.txt"] = "\n".join(hosts * 50).encode()
+    (tmp_path / "socks5.txt").write_text("1.2.3.4:1080\n")
+
+    correct_proxies = checker.stream_proxy_list()
+    assert socks_proxies[0] in correct_proxies
+    assert read_lines(tmp_path / "socks5.txt") == ["1.2.3.4:1080"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_stream_full_download_replaces_local_list(checker, tmp_path, 
+                                                  monkeypatch, http_site,
+                                                  socks_proxies):
+    monkeypatch.setattr(proxy_checker, "PROXY_ENOUGH_COUNT", None)
+    host = socks_proxies[0].partition("://")[2]
+    http_site[1]["/socks5.txt"] = host.encode()
+    (tmp_path / "socks5.txt").write_text("1.2.3.4:1080\n")
+
+    assert checker.stream_proxy_list() == [socks_proxies[0]]
+    assert read_lines(tmp_path / "socks5.txt") == [host]
+    assert read_lines(tmp_path / "correct") == [socks_proxies[0]]
+
+def test_stream_failure_keeps_correct_list(checker, tmp_path):
+    (tmp_path / "correct").write_text("socks5://5.6.7.8:1080")
+
+    assert checker.stream_proxy_list() == ["socks5://5.6.7.8:1080"]
+    assert read_lines(tmp_path / "correct") == ["socks5://5.6.7.8:1080"]
+
+def test_stream_merges_saved_checks(checker, tmp_path, http_site, 
+                                    socks_proxies, dead_proxy):
+    http_site[1]["/socks5.txt"] = dead_proxy.partition("://")[2].encode()
+    old = ProxyCheck(time.time() - 60, True)
+    checker.save_proxy_checks({socks_proxies[1]: old, dead_proxy: old})
+
+    assert checker.stream_proxy_list() == [socks_proxies[1]]
+    checks = checker.load_proxy_checks()
+    assert checks[socks_proxies[1]] == old
+    assert not checks[dead_proxy].is_valid
+
+#--Finish functional block
@@ -0,0 +1,51 @@
+#--Start imports block
+#System imports
+import threading
+
+#Custom imports
+from lib.proxy_pool import LocalProxyPool
+#--Finish imports block
+
+
+#--Start functional block
+PROXIES = ["socks5://1.1.1.1:1080", "socks5://2.2.2.2:1080"]
+
+
+def test_lease_spreads_over_least_used():
+    pool = LocalProxyPool(limit=2)
+    leased = [pool.lease(PROXIES)[0] for _ in range(4)]
+    assert leased == PROXIES * 2
+
+def test_lease_is_limited_and_released():
+    pool = LocalProxyPool(limit=2)
+    leases = [pool.lease(PROXIES) for _ in range(4)]
+    assert pool.lease(PROXIES) is None
+
+    _ = pool.release(leases[1][1])
+    assert pool.lease(PROXIES) == (PROXIES[1], "local:4")
+    assert pool.lease(PROXIES) is None
+
+def test_released_lease_is_not_returned_twice():
+    pool = LocalProxyPool(limit=1)
+    proxy, lease_id = pool.lease(PROXIES[:1])
+    _ = pool.release(lease_id)
+    _ = pool.release(lease_id)
+    assert pool.lease(PROXIES[:1])[0] == proxy
+    assert pool.lease(PROXIES[:1]) is None
+
+def test_limit_holds_across_threads():
+    pool = LocalProxyPool(limit=3)
+    leases, lock = list(), threading.Lock()
+    def lease():
+        for _ in range(10):
+            result = pool.lease(PROXIES)
+            if result is None: continue
+            with lock: leases.append(result)
+    threads = [threading.Thread(target=lease) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert len(leases) == len(PROXIES) * 3
+    for proxy in PROXIES:
+        assert sum(leased == proxy for leased, _ in leases) == 3
+
+#--Finish functional block
@@ -0,0 +1,55 @@
+#--Start imports block
+#System imports
+import logging
+import pytest
+
+#Custom imports
+import lib.proxy_validator as proxy_validator
+from lib.proxy_validator import AsyncProxyValidator
+#--Finish imports block
+
+
+#--Start functional block
+@pytest.fixture
+def validator() -> AsyncProxyValidator:
+    return AsyncProxyValidator(logging.getLogger("test"), concurrency=8,
+                               timeout=2.0, handshake_timeout=1.0)
+
+
+@pytest.mark.parametrize("is_handshake_checked", [True, False])
+def test_validate_keeps_working_proxies(validator, monkeypatch, http_site,
+                                        socks_proxies, dead_proxy,
+                                        is_handshake_checked):
+    monkeypatch.setattr(proxy_validator, "USE_PROXY_HANDSHAKE_CHECK",
+                        is_handshake_checked)
+    proxies = socks_proxies + [dead_proxy, socks_proxies[0]]
+    valid = validator.validate(proxies, http_site[0] + "/")
+    assert sorted(valid) == sorted(socks_proxies)
+
+def test_validate_drops_proxies_of_incorrect_response(validator, http_site,
+                                                      socks_proxies):
+    assert validator.validate(socks_proxies, http_site[0] + "/missing") == []
+
+def test_filter_alive_drops_dead_proxy(validator, http_site, socks_proxies,
+                                       dead_proxy):
+    alive = validator.filter_alive(socks_proxies + [dead_proxy], http_site[0])
+    assert sorted(alive) == sorted(socks_proxies)
+
+def test_validate_targets_by_site(validator, http_site, socks_proxies):
+    urls = dict({"found": http_site[0] + "/", 
+                 "missing": http_site[0] + "/missing"})
+    valid = validator.validate_targets(socks_proxies, urls)
+    assert sorted(valid["found"]) == sorted(socks_proxies)
+    assert valid["missing"] == []
+
+def test_validate_stream_passes_valid_proxies_to_callback(validator, http_site,
+                                                          socks_proxies,
+                                                          dead_proxy):
+    passed = list()
+    proxies = [dead_proxy] + socks_proxies
+    checked, valid = validator.validate_stream(proxies, http_site[0] + "/",
+                                               passed.append)
+    assert sorted(checked) == sorted(proxies)
+    assert sorted(valid) == sorted(passed) == sorted(socks_proxies)
+
+#--Finish functional block
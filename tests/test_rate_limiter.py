@@ -0,0 +1,42 @@
+#--Start imports block
+#System imports
+import time
+import threading
+
+#Custom imports
+from lib.rate_limiter import TokenBucket, RateLimiter
+#--Finish imports block
+
+
+#--Start functional block
+def take_tokens(bucket: TokenBucket, count: int) -> float:
+    started_at = time.monotonic()
+    for _ in range(count):
+        _ = bucket.acquire()
+    return time.monotonic() - started_at
+
+
+def test_burst_is_not_delayed():
+    assert take_tokens(TokenBucket(rate=10, burst=5), 5) < 0.05
+
+def test_tokens_are_taken_at_the_rate():
+    bucket = TokenBucket(rate=20, burst=1)
+    elapsed = take_tokens(bucket, 11)
+    assert 0.45 < elapsed < 0.8
+
+def test_rate_is_shared_by_threads():
+    bucket = TokenBucket(rate=20, burst=1)
+    started_at = time.monotonic()
+    threads = [threading.Thread(target=take_tokens, args=(bucket, 3))
+               for _ in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert 0.5 < time.monotonic() - started_at < 0.9
+
+def test_bucket_is_shared_by_domain():
+    bucket = RateLimiter.get_bucket("rate.test", 5, 1)
+    assert RateLimiter.get_bucket("rate.test", 5, 1) is bucket
+    assert type(bucket) is TokenBucket
+    assert RateLimiter.get_bucket("free.test", None, 1) is None
+
+#--Finish functional block
@@ -0,0 +1,148 @@
+#--Start imports block
+#System imports
+import time
+import types
+import logging
+import threading
+import requests
+import urllib3
+
+#Custom imports
+from lib.requests_connections import RequestsConnections, RaceExecutor
+from lib.proxy_pool import LocalProxyPool
+from lib.types import FetchError, RetryPolicy, RequestMethod
+from configs.settings import PROXY_RACE_WIDTH
+#--Finish imports block
+
+
+#--Start functional block
+IDEMPOTENT = RetryPolicy()
+NON_IDEMPOTENT = RetryPolicy(max_retries=0, is_idempotent=False)
+
+def make_connection_error(reason: Exception) -> requests.ConnectionError:
+    return requests.ConnectionError(
+        urllib3.exceptions.MaxRetryError(None, "/", reason))
+
+
+def make_req_conn() -> RequestsConnections:
+    req_conn = object.__new__(RequestsConnections)
+    req_conn._state = threading.local()
+    req_conn._logger = logging.getLogger("test")
+    return req_conn
+
+
+def test_status_classes():
+    req_conn = make_req_conn()
+    assert req_conn._classify_status(503, IDEMPOTENT) is FetchError.RETRYABLE
+    assert req_conn._classify_status(403, IDEMPOTENT) is FetchError.PERMANENT
+    assert req_conn._classify_status(404, IDEMPOTENT) is FetchError.PERMANENT
+    assert req_conn._classify_status(503, NON_IDEMPOTENT) is FetchError.PERMANENT
+
+def test_proxy_status_classes():
+    req_conn = make_req_conn()
+    proxy = "socks5://1.1.1.1:1080"
+    for status_code in (403, 407, 404):
+        assert req_conn._classify_status(status_code, IDEMPOTENT, proxy) \
+               is FetchError.RETRYABLE
+    req_conn._state.attempt = IDEMPOTENT.max_retries
+    assert req_conn._classify_status(403, IDEMPOTENT, proxy) \
+           is FetchError.RETRYABLE
+    assert req_conn._classify_status(404, IDEMPOTENT, proxy) \
+           is FetchError.PERMANENT
+
+def test_proxy_failure_moves_on_to_next_proxy():
+    proxies = ["socks5://1.1.1.1:1080", "socks5://2.2.2.2:1080"]
+    statuses = dict({proxies[0]: 403, proxies[1]: 200})
+    req_conn = make_req_conn()
+    req_conn._proxy_pool = LocalProxyPool()
+    req_conn.get_ordered_proxies = lambda: list(proxies)
+    req_conn.get_session = lambda proxy=None: None
+    def get_response(url, session, method, proxy, policy, headers):
+        status_code = statuses[proxy]
+        if status_code == 200: return status_code, None
+        return None, req_conn._classify_status(status_code, policy, proxy)
+    req_conn._get_response = get_response
+
+    response, error = req_conn._get_response_with_proxy(
+        "http://example.test/", RequestMethod.GET, IDEMPOTENT,
+        time.monotonic() + 5)
+    assert response == 200 and error is None
+
+def test_non_idempotent_retried_only_if_not_sent():
+    req_conn = make_req_conn()
+    unsent = [
+        requests.exceptions.ConnectTimeout(),
+        make_connection_error(urllib3.exceptions.NewConnectionError(None, "")),
+    ]
+    sent = [
+        requests.exceptions.ReadTimeout(),
+        make_connection_error(urllib3.exceptions.ProtocolError("reset")),
+    ]
+    for exc in unsent:
+        assert req_conn._classify_exception(exc, NON_IDEMPOTENT) \
+               is FetchError.RETRYABLE
+    for exc in sent:
+        assert req_conn._classify_exception(exc, NON_IDEMPOTENT) \
+               is FetchError.PERMANENT
+        assert req_conn._classify_exception(exc, IDEMPOTENT) \
+               is FetchError.RETRYABLE
+
+def test_race_closes_all_losing_responses():
+    class FakeResponse:
+        def __init__(self):
+            self.is_closed = False
+        def close(self):
+            self.is_closed = True
+
+    responses = [FakeResponse() for _ in range(3)]
+    barrier = threading.Barrier(len(responses))
+    def fetch(response):
+        _ = barrier.wait()
+        return response, None
+    def submit(executor, proxies, tried, **kwargs):
+        if not proxies: return None
+        return executor.submit(fetch, proxies.pop())
+
+    req_conn = make_req_conn()
+    req_conn._url_domain = "example.test"
+    req_conn.get_ordered_proxies = lambda: list(responses)
+    req_conn._submit_proxy_request = submit
+
+    response, error = req_conn._get_response_with_proxy_race(
+        "http://example.test/", RequestMethod.GET, IDEMPOTENT,
+        time.monotonic() + 5)
+    _ = RaceExecutor.get_executor().submit(lambda: None).result()
+    time.sleep(0.1)
+    assert error is None and not response.is_closed
+    assert sum(item.is_closed for item in responses) == 2
+
+def test_race_takes_rate_token_once_and_per_replacement():
+    class CountingBucket:
+        def __init__(self):
+            self.count = 0
+        def acquire(self):
+            self.count += 1
+
+    proxies = [f"socks5://{index}.1.1.1:1080" 
+               for index in range(PROXY_RACE_WIDTH + 1)]
+    barrier = threading.Barrier(PROXY_RACE_WIDTH)
+    req_conn = make_req_conn()
+    req_conn._url_domain = "example.test"
+    req_conn._rate_bucket = CountingBucket()
+    req_conn._proxy_pool = LocalProxyPool()
+    req_conn.get_ordered_proxies = lambda: list(proxies)
+    req_conn.get_session = lambda proxy=None: None
+    def get_response(url, session, method, proxy, policy, headers):
+        _ = req_conn._acquire_rate_token()
+        if proxy == proxies[0]: return None, FetchError.RETRYABLE
+        _ = barrier.wait(timeout=5)
+        return types.SimpleNamespace(close=lambda: None), None
+    req_conn._get_response = get_response
+
+    response, error = req_conn._get_response_with_proxy_race(
+        "http://example.test/", RequestMethod.GET, IDEMPOTENT,
+        time.monotonic() + 5)
+    assert response is not None and error is None
+    assert req_conn._rate_bucket.count == 2
+
+#--Finish functional block
@@ -0,0 +1,42 @@
+#--Start imports block
+#System imports
+from collections import OrderedDict
+
+#Custom imports
+import lib.session_pool as session_pool
+from lib.session_pool import SessionPool
+#--Finish imports block
+
+
+#--Start functional block
+class FakeSession:
+    def __init__(self):
+        self.is_closed = False
+    def close(self):
+        self.is_closed = True
+
+
+def test_least_recently_used_session_is_closed(monkeypatch):
+    monkeypatch.setattr(SessionPool, "_sessions", OrderedDict())
+    monkeypatch.setattr(session_pool, "SESSION_POOL_MAX_SESSIONS", 2)
+    sessions = dict()
+    for proxy in ("a", "b", "a", "c"):
+        key = SessionPool.make_key("test", None, proxy)
+        sessions[proxy] = SessionPool.get_session(key, FakeSession)
+    assert sessions["b"].is_closed
+    assert not sessions["a"].is_closed and not sessions["c"].is_closed
+
+    SessionPool.drop_session(SessionPool.make_key("test", None, "a"))
+    assert sessions["a"].is_closed
+    SessionPool.close_all()
+    assert sessions["c"].is_closed and not SessionPool._sessions
+
+def test_inherited_sessions_are_closed(monkeypatch):
+    monkeypatch.setattr(SessionPool, "_sessions", OrderedDict())
+    key = SessionPool.make_key("test", None)
+    inherited = SessionPool.get_session(key, FakeSession)
+    monkeypatch.setattr(SessionPool, "_pid", -1)
+    session = SessionPool.get_session(key, FakeSession)
+    assert inherited.is_closed and session is not inherited
+
+#--Finish functional block
@@ -0,0 +1,32 @@
+#--Start imports block
+#System imports
+import redis
+
+#Custom imports
+import lib.tools
+from lib.tools import get_redis_client
+#--Finish imports block
+
+
+#--Start functional block
+def test_redis_failure_is_remembered(monkeypatch):
+    calls = list()
+    class DeadRedis:
+        def ping(self):
+            raise redis.ConnectionError("refused")
+    def from_url(url, **kwargs):
+        calls.append(url)
+        return DeadRedis()
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+    monkeypatch.setattr(lib.tools, "_redis_retry_at", dict())
+    url = "redis://dead:6379"
+
+    assert get_redis_client(url) is None
+    assert get_redis_client(url) is None
+    assert calls == [url]
+
+    lib.tools._redis_retry_at[url] = 0.0
+    assert get_redis_client(url) is None
+    assert calls == [url, url]
+
+#--Finish functional block
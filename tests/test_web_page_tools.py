@@ -0,0 +1,56 @@
+#--Start imports block
+#System imports
+import types
+import requests
+
+#Custom imports
+from lib.page_store import PageStore
+from lib.types import RequestMethod, RequestClass, WatchListType
+from modules.web_services.web_page_tools import WebPageService
+#--Finish imports block
+
+
+#--Start functional block
+class StubConnections:
+    '''Requests the pages directly and keeps their status codes.'''
+
+    def __init__(self):
+        self.status_codes = list()
+
+    def get_response(self, type, url, method, request_class, headers=None):
+        response = requests.get(url, headers=headers, timeout=5)
+        self.status_codes.append(response.status_code)
+        return response
+
+    def get_last_error(self):
+        return None
+
+
+def make_web_serv(url: str, dir_path) -> WebPageService:
+    config_module = types.SimpleNamespace(url_domain="127.0.0.1",
+                                          url_wath_lists=url + "/list")
+    web_serv = WebPageService("test", config_module)
+    web_serv.dir_path = str(dir_path)
+    web_serv._page_store = PageStore.get_store(str(dir_path))
+    web_serv._req_conn = StubConnections()
+    return web_serv
+
+
+def test_not_modified_page_is_taken_from_default_store(tmp_path, http_site):
+    url, bodies = http_site
+    bodies["/list"] = b"<p>list</p>"
+    web_serv = make_web_serv(url, tmp_path)
+    saved = list()
+    save = web_serv._page_store.save
+    web_serv._page_store.save = lambda *args: saved.append(args) or save(*args)
+
+    for _ in range(2):
+        web_page = web_serv.get_web_page_file(
+            WatchListType.WATCH, url=url + "/list", reload_page=True,
+            method=RequestMethod.GET, request_class=RequestClass.LIST_PAGE)
+        assert web_page == "<p>list</p>"
+
+    assert web_serv._req_conn.status_codes == [200, 304]
+    assert len(saved) == 1
+
+#--Finish functional block